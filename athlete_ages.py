@@ -0,0 +1,104 @@
+from datetime import datetime
+
+from division_assignment import DivisionAssignmentReport, age_on, load_division_index
+
+
+def parse_dob(dob):
+    """ Parse a MM/DD/YYYY date of birth. Returns None for blank or malformed values. """
+    if not dob:
+        return None
+    if isinstance(dob, datetime):
+        return dob
+    try:
+        # Splitting is several times faster than strptime, which matters when recomputing a whole meet
+        month, day, year = dob.split('/')
+        return datetime(int(year), int(month), int(day))
+    except (AttributeError, ValueError):
+        return None
+
+
+def calculate_age_as_of_december_31(dob, meet_year):
+    """ Age on December 31 of the meet year, the way the athletes table has always shown it. """
+    dob = parse_dob(dob)
+    if dob is None or not meet_year:
+        return None
+    return age_on(dob, datetime(meet_year, 12, 31))
+
+
+class AgeContext:
+    """
+    Everything needed to derive an athlete's stored age and division: the meet
+    year and the division interval index, read once per import or edit.
+    Results are cached per date of birth, which many athletes share.
+    """
+
+    def __init__(self, meet_year, division_index):
+        self.meet_year = meet_year
+        self.division_index = division_index
+        self._cache = {}  # dob -> (age, matching divisions)
+
+    def assign(self, dob):
+        """ Return (age, matches) where matches lists the (division_number, division_name) of each fitting division. """
+        result = self._cache.get(dob)
+        if result is None:
+            dob_date = parse_dob(dob)
+            age = calculate_age_as_of_december_31(dob_date, self.meet_year)
+            matches = self.division_index.lookup(dob_date) if age is not None else ()
+            result = (age, matches)
+            self._cache[dob] = result
+        return result
+
+    def age_and_division(self, dob):
+        """ Return (age, division_number, division_name); the lowest numbered division wins an overlap. """
+        age, matches = self.assign(dob)
+        if not matches:
+            return age, None, None
+        return (age,) + matches[0]
+
+
+def load_age_context(cursor):
+    """ Read the meet year and build the division index with the given cursor. """
+    cursor.execute("SELECT setting_meet_date FROM settings WHERE setting_name = 'use_age_group_birthday'")
+    result = cursor.fetchone()
+    meet_date = parse_dob(result[0]) if result else None
+    meet_year = meet_date.year if meet_date else None
+
+    # Divisions without their own age_as_of_date use the same date as the stored age
+    default_as_of = datetime(meet_year, 12, 31) if meet_year else None
+    return AgeContext(meet_year, load_division_index(cursor, default_as_of))
+
+
+def recompute_athlete_ages(cursor):
+    """
+    Recompute the stored age and division of every athlete in one batch.
+    Run after the meet date or the division ranges change. Returns a
+    DivisionAssignmentReport listing athletes with no division or several.
+    """
+    context = load_age_context(cursor)
+    report = DivisionAssignmentReport()
+    cursor.execute("SELECT id, last_name, first_name, dob, age, division_number, division_name FROM athletes")
+    updates = []
+    for athlete_id, last_name, first_name, dob, *stored in cursor.fetchall():
+        age, matches = context.assign(dob)
+        if context.division_index.division_count:
+            report.add(athlete_id, f"{first_name} {last_name}", age, matches)
+        division_number, division_name = matches[0] if matches else (None, None)
+        if stored != [age, division_number, division_name]:
+            updates.append((age, division_number, division_name, athlete_id))  # Unchanged rows are not rewritten
+    cursor.executemany("""
+        UPDATE athletes SET age = ?, division_number = ?, division_name = ? WHERE id = ?
+    """, updates)
+    return report
+
+
+def reassign_athlete(cursor, athlete_id):
+    """ Recompute the stored age and division of one athlete, e.g. after its DOB was edited. """
+    cursor.execute("SELECT dob FROM athletes WHERE id = ?", (athlete_id,))
+    result = cursor.fetchone()
+    if result is None:
+        return None
+    age, division_number, division_name = load_age_context(cursor).age_and_division(result[0])
+    cursor.execute("""
+        UPDATE athletes SET age = ?, division_number = ?, division_name = ? WHERE id = ?
+    """, (age, division_number, division_name, athlete_id))
+    return age, division_number, division_name
@@ -3,13 +3,21 @@ import sqlite3
 from PyQt6.QtGui import QIcon, QIntValidator
 from PyQt6.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton,
-    QTableWidget, QTableWidgetItem, QMessageBox, QHeaderView, QComboBox, QCalendarWidget, QGridLayout, QApplication,
+    QTableView, QMessageBox, QHeaderView, QComboBox, QCalendarWidget, QGridLayout, QApplication,
     QSizePolicy
 )
 from PyQt6.QtCore import Qt, QDate
-from datetime import datetime
 
+from athlete_ages import reassign_athlete, recompute_athlete_ages
+from athletes_model import (
+    ATHLETE_COLUMNS, MEMBERSHIP_COLUMN, TEAM_CODE_COLUMN, AthletesFilterProxyModel, AthletesTableModel
+)
+from bib_allocator import BibAllocator, BibRangesDialog, assign_missing_bibs
 from bib_assigner import assign_bib_numbers
+from bib_lookup import get_bib_lookup
+from check_in import CheckInDialog
+from db_connection import get_connection, get_read_connection
+from settings_service import get_settings
 from PyQt6.QtWidgets import QSpacerItem, QSizePolicy
 # Global variables
 global_db_file_path = None
@@ -57,6 +65,13 @@ class AthletesWindow(QDialog):
 
 
         team_selection_layout.addWidget(self.team_selection_combo)
+
+        team_selection_layout.addWidget(QLabel("Select Division:"))
+        self.division_selection_combo = QComboBox()
+        self.division_selection_combo.addItem("All Divisions")
+        self.load_divisions_data()
+        self.division_selection_combo.currentIndexChanged.connect(self.update_division_selection)
+        team_selection_layout.addWidget(self.division_selection_combo)
         main_layout.addLayout(team_selection_layout)
 
         # Athlete Count Label
@@ -64,19 +79,20 @@ class AthletesWindow(QDialog):
         main_layout.addWidget(self.athlete_count_label)
 
         # Table to display athletes data
-        self.table = QTableWidget()
-        self.table.setColumnCount(10)
-        self.table.setHorizontalHeaderLabels([
-            "Bib Number", "Last Name", "First Name", "MI", "Gender", "DOB", "Age", "Team ID",
-            "Team Name", "Membership Number"
-        ])
+        # The model holds all athletes; sorting and team filtering happen in the proxy
+        self.athletes_model = AthletesTableModel(self)
+        self.athletes_proxy = AthletesFilterProxyModel(self)
+        self.athletes_proxy.setSourceModel(self.athletes_model)
 
+        self.table = QTableView()
+        self.table.setModel(self.athletes_proxy)
         self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
         self.table.verticalHeader().setVisible(False)
-        self.table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
-        self.table.setSelectionMode(QTableWidget.SelectionMode.SingleSelection)
+        self.table.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
+        self.table.setSelectionMode(QTableView.SelectionMode.SingleSelection)
+        self.table.setEditTriggers(QTableView.EditTrigger.NoEditTriggers)
         self.table.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
-        self.table.cellClicked.connect(self.select_athlete)
+        self.table.clicked.connect(self.select_athlete)
         main_layout.addWidget(self.table)
 
         # Sorting Buttons Layout
@@ -163,11 +179,27 @@ class AthletesWindow(QDialog):
         self.assign_bib_btn = QPushButton("Assign Bib Numbers")
         self.assign_bib_btn.clicked.connect(lambda: assign_bib_numbers(self))
 
+        self.assign_missing_bibs_btn = QPushButton("Assign Missing Bibs")
+        self.assign_missing_bibs_btn.clicked.connect(lambda: assign_missing_bibs(self))
+
+        self.bib_ranges_btn = QPushButton("Bib Ranges")
+        self.bib_ranges_btn.clicked.connect(lambda: BibRangesDialog(self).exec())
+
+        self.check_in_btn = QPushButton("Check-In")
+        self.check_in_btn.clicked.connect(lambda: CheckInDialog(self).exec())
+
+        self.recompute_ages_btn = QPushButton("Recompute Ages/Divisions")
+        self.recompute_ages_btn.clicked.connect(self.recompute_ages)
+
         btn_layout.addWidget(self.add_btn)
         btn_layout.addWidget(self.update_btn)
         btn_layout.addWidget(self.delete_btn)
         btn_layout.addWidget(self.clear_btn)
         btn_layout.addWidget(self.assign_bib_btn)
+        btn_layout.addWidget(self.assign_missing_bibs_btn)
+        btn_layout.addWidget(self.bib_ranges_btn)
+        btn_layout.addWidget(self.check_in_btn)
+        btn_layout.addWidget(self.recompute_ages_btn)
 
         main_layout.addLayout(btn_layout)
 
@@ -177,89 +209,36 @@ class AthletesWindow(QDialog):
         self.load_athletes_data()
 
     def update_team_selection(self):
-        """ Update the selected team filter and reload athlete data. """
+        """ Update the selected team filter; filtering happens in memory. """
         self.selected_team = self.team_selection_combo.currentText()
-        self.load_athletes_data()
+        self.athletes_proxy.set_team_filter(None if self.selected_team == "All Teams" else self.selected_team)
+        self.update_athlete_count()
+
+    def update_division_selection(self):
+        """ Update the selected division filter; filtering happens in memory. """
+        division_name = self.division_selection_combo.currentText()
+        self.athletes_proxy.set_division_filter(None if division_name == "All Divisions" else division_name)
+        self.update_athlete_count()
+
+    def update_athlete_count(self):
+        self.athlete_count_label.setText(f"Athlete Count: {self.athletes_proxy.rowCount()}")
 
     def load_athletes_data(self):
-        """ Load athlete data from the database into the table, filtered by the selected team and sorted by the specified column. """
+        """ Load all athletes from the database into the table model, then apply the team filter and sort column. """
         try:
-            conn = self.connect_db()
+            conn = self.connect_read_db()
             cursor = conn.cursor()
-            if self.selected_team == "All Teams":
-                cursor.execute("""
-                    SELECT bib_number, last_name, first_name, middle_initials, gender, dob, age, 
-                    team_code, team_name, membership_number
-                    FROM athletes
-                """)
-            else:
-                cursor.execute("""
-                    SELECT bib_number, last_name, first_name, middle_initials, gender, dob, age, 
-                    team_code, team_name, membership_number
-                    FROM athletes
-                    WHERE team_name = ?
-                """, (self.selected_team,))
-
-            athletes_data = cursor.fetchall()
-
-            # Get the meet year from the settings
-            meet_year = self.get_meet_year()
-
-            # Update the athlete count label
-            self.athlete_count_label.setText(f"Athlete Count: {len(athletes_data)}")
-
-            # Sort the data based on the selected column
-            column_mapping = {
-                "Bib Number": 0,
-                "Last Name": 1,
-                "First Name": 2,
-                "Team Name": 8  # Adjusted to match the index in athletes_data
-            }
-            col_index = column_mapping.get(self.sort_by_column, 0)
-
-            # Apply sorting as integer if sorting by "Bib Number"
-            if self.sort_by_column == "Bib Number":
-                sorted_data = sorted(athletes_data, key=lambda x: self.safe_cast(x[col_index], int, 0))
-            else:
-                sorted_data = sorted(athletes_data, key=lambda x: self.safe_cast(x[col_index], str))
-
-            self.table.setRowCount(0)  # Clear all rows before reloading
-
-            # Iterate over each athlete's data and display it
-            for row_data in sorted_data:
-                row = self.table.rowCount()
-                self.table.insertRow(row)
-
-                # Parse DOB and calculate age if needed
-                dob = row_data[5]  # `dob` is at index 5
-                if dob and meet_year:
-                    try:
-                        dob_date = datetime.strptime(dob, '%m/%d/%Y') if isinstance(dob, str) else dob
-                        age = self.calculate_age_as_of_december_31(dob_date, meet_year)
-                    except ValueError:
-                        age = None
-                else:
-                    age = None
-
-                # Construct display_data to match the table columns
-                display_data = [
-                    row_data[0],  # Bib Number
-                    row_data[1],  # Last Name
-                    row_data[2],  # First Name
-                    row_data[3],  # Middle Initials
-                    row_data[4],  # Gender
-                    row_data[5],  # DOB
-                    age,  # Calculated Age
-                    row_data[7],  # Team ID
-                    row_data[8],  # Team Name
-                    row_data[9]  # Membership Number
-                ]
-                for col, data in enumerate(display_data):
-                    item = QTableWidgetItem(str(data) if data is not None else "")
-                    item.setFlags(item.flags() & ~Qt.ItemFlag.ItemIsEditable)  # Make cells non-editable
-                    self.table.setItem(row, col, item)
-
-            conn.close()
+            cursor.execute("""
+                SELECT id, bib_number, last_name, first_name, middle_initials, gender, dob, age,
+                division_name, team_code, team_name, membership_number
+                FROM athletes
+            """)
+            # Age and division are stored at write time, so rows go to the model as they are
+            rows = cursor.fetchall()
+
+            self.athletes_model.load(rows)
+            self.apply_sorting()
+            self.update_athlete_count()
         except sqlite3.Error as e:
             QMessageBox.critical(self, "Database Error", f"Failed to fetch athletes data: {e}")
         except Exception as e:
@@ -268,20 +247,56 @@ class AthletesWindow(QDialog):
     def load_teams_data(self):
         """ Load team data from the database into the team combo box for filtering. """
         try:
-            conn = self.connect_db()
+            conn = self.connect_read_db()
             cursor = conn.cursor()
             cursor.execute("SELECT DISTINCT team_name FROM teams ORDER BY team_name ASC")
             teams = cursor.fetchall()
             for team in teams:
                 self.team_selection_combo.addItem(team[0])
-            conn.close()
         except sqlite3.Error as e:
             QMessageBox.critical(self, "Database Error", f"Failed to load teams data: {e}")
 
+    def load_divisions_data(self):
+        """ Load the age-group division names into the division combo box for filtering. """
+        try:
+            conn = self.connect_read_db()
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT DISTINCT division_name FROM athletes
+                WHERE division_name IS NOT NULL ORDER BY division_number ASC
+            """)
+            for division in cursor.fetchall():
+                self.division_selection_combo.addItem(division[0])
+        except sqlite3.Error as e:
+            QMessageBox.critical(self, "Database Error", f"Failed to load divisions data: {e}")
+
+    def recompute_ages(self):
+        """ Recompute every athlete's stored age and division from the meet date and division ranges. """
+        try:
+            conn = self.connect_db()
+            cursor = conn.cursor()
+            report = recompute_athlete_ages(cursor)
+            conn.commit()
+        except sqlite3.Error as e:
+            conn.rollback()
+            QMessageBox.critical(self, "Database Error", f"Failed to recompute ages: {e}")
+            return
+
+        # Division names may have changed, so rebuild the division filter
+        self.division_selection_combo.blockSignals(True)
+        self.division_selection_combo.setCurrentIndex(0)
+        while self.division_selection_combo.count() > 1:
+            self.division_selection_combo.removeItem(1)
+        self.load_divisions_data()
+        self.division_selection_combo.blockSignals(False)
+        self.athletes_proxy.set_division_filter(None)
+        self.load_athletes_data()
+        QMessageBox.information(self, "Recompute Ages", report.summary())
+
     def load_teams_data_for_inputs(self):
         """ Load team data into the team combo box for form inputs. """
         try:
-            conn = self.connect_db()
+            conn = self.connect_read_db()
             cursor = conn.cursor()
             cursor.execute("SELECT team_name, team_code FROM teams ORDER BY team_name ASC")
             teams = cursor.fetchall()
@@ -294,7 +309,6 @@ class AthletesWindow(QDialog):
             if unattached_index != -1:
                 self.team_combo.setCurrentIndex(unattached_index)
 
-            conn.close()
         except sqlite3.Error as e:
             QMessageBox.critical(self, "Database Error", f"Failed to load teams data: {e}")
 
@@ -350,9 +364,17 @@ class AthletesWindow(QDialog):
         self.calendar_dialog.close()
 
     def connect_db(self):
-        """ Connect to the SQLite database. """
+        """ Return the shared write connection to the SQLite database. """
         try:
-            return sqlite3.connect(self.db_file_path)
+            return get_connection(self.db_file_path)
+        except sqlite3.Error as e:
+            QMessageBox.critical(self, "Database Error", f"Failed to connect to the database: {e}")
+            sys.exit(1)
+
+    def connect_read_db(self):
+        """ Return the shared read-only connection used for display queries. """
+        try:
+            return get_read_connection(self.db_file_path)
         except sqlite3.Error as e:
             QMessageBox.critical(self, "Database Error", f"Failed to connect to the database: {e}")
             sys.exit(1)
@@ -360,72 +382,36 @@ class AthletesWindow(QDialog):
     def set_sorting_column(self, column_name):
         """ Set the column by which the athletes data should be sorted. """
         self.sort_by_column = column_name
-        self.load_athletes_data()
+        self.apply_sorting()
 
-    def get_meet_year(self):
-        """Fetch the meet year from the settings table."""
-        try:
-            conn = self.connect_db()
-            cursor = conn.cursor()
-            cursor.execute("SELECT setting_meet_date FROM settings WHERE setting_name = 'use_age_group_birthday'")
-            result = cursor.fetchone()
-            conn.close()
-
-            if result and result[0]:
-                meet_year = datetime.strptime(result[0], "%m/%d/%Y").year
-                return meet_year
-            else:
-                return None
-
-        except sqlite3.Error as e:
-            QMessageBox.critical(self, "Database Error", f"Failed to fetch meet year: {e}")
-            return None
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Unexpected error occurred: {e}")
-            return None
+    def apply_sorting(self):
+        """ Sort the proxy in memory by the selected column. """
+        self.athletes_proxy.sort(ATHLETE_COLUMNS.index(self.sort_by_column), Qt.SortOrder.AscendingOrder)
 
-    def calculate_age_as_of_december_31(self, dob, meet_year):
-        try:
-            # Ensure `dob` is a datetime object
-            if isinstance(dob, str):
-                dob = datetime.strptime(dob, '%m/%d/%Y')  # Adjust format as needed
-            december_31 = datetime(meet_year, 12, 31)
-            age = december_31.year - dob.year - ((december_31.month, december_31.day) < (dob.month, dob.day))
-            return age
-        except ValueError as e:
-            QMessageBox.critical(self, "Error", f"Date parsing error for DOB: {dob}. {e}")
+    def selected_athlete(self):
+        """ Return (athlete id, row values) of the selected row, or None when nothing is selected. """
+        rows = self.table.selectionModel().selectedRows()
+        if not rows:
             return None
-
-    def safe_cast(self, value, to_type, default=None):
-        """Safely cast a value to a given type."""
-        try:
-            return to_type(value)
-        except (ValueError, TypeError):
-            return default if default is not None else value
+        source_row = self.athletes_proxy.mapToSource(rows[0]).row()
+        return self.athletes_model.athlete_id(source_row), self.athletes_model.row_values(source_row)
 
     def add_athlete(self):
         """ Add a new athlete to the database. """
         if not self.validate_inputs():
             return
 
-        # Check for unique bib number
-        if self.check_if_bib_exists(self.entry_bib_number.text()):
+        # Check for unique bib number; a blank bib is stored as NULL
+        bib_number = self.entry_bib_number.text() or None
+        if bib_number is not None and self.check_if_bib_exists(bib_number):
             QMessageBox.warning(self, "Duplicate Bib Number", "Bib Number must be unique.")
             return
 
-        # Calculate age based on dob and current meet year
-        dob = self.entry_dob.text()
-        meet_year = self.get_meet_year()
-        age = self.calculate_age_as_of_december_31(dob, meet_year) if dob and meet_year else None
-
-        # Debug: Print the age to ensure it is being calculated correctly
-        print(f"Calculated age for manual entry: {age}")
-
         athlete_data = (
             self.entry_last_name.text(), self.entry_first_name.text(), self.entry_mi.text(),
-            self.entry_gender.currentText(), dob, age,  # Include the calculated age
+            self.entry_gender.currentText(), self.entry_dob.text(),
             self.team_combo.currentData(), self.team_combo.currentText(),
-            self.entry_bib_number.text(), self.entry_membership_number.text()
+            bib_number, self.entry_membership_number.text()
         )
 
         try:
@@ -433,73 +419,76 @@ class AthletesWindow(QDialog):
             cursor = conn.cursor()
             cursor.execute("""
                 INSERT INTO athletes 
-                (last_name, first_name, middle_initials, gender, dob, age, 
+                (last_name, first_name, middle_initials, gender, dob,
                 team_code, team_name, bib_number, membership_number)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
             """, athlete_data)
+            # Age and division as of the meet year are stored with the athlete
+            athlete_id = cursor.lastrowid
+            division_number = reassign_athlete(cursor, athlete_id)[1]
+            allocator = BibAllocator(cursor)
+            if bib_number is None and allocator.find_range(self.team_combo.currentData(), division_number):
+                # Late registrations draw the next free bib of their team or division range
+                bib = allocator.next_bib(self.team_combo.currentData(), division_number)
+                cursor.execute("UPDATE athletes SET bib_number = ? WHERE id = ?", (bib, athlete_id))
             conn.commit()
-            conn.close()
 
             self.clear_inputs()
             self.load_athletes_data()
 
         except sqlite3.Error as e:
+            conn.rollback()
             QMessageBox.critical(self, "Database Error", f"Failed to add athlete: {e}")
 
     def check_if_athlete_exists(self, last_name, first_name, dob):
         """ Check if an athlete with the same last name, first name, and dob exists. """
         try:
-            conn = self.connect_db()
+            conn = self.connect_read_db()
             cursor = conn.cursor()
             cursor.execute("""
                 SELECT COUNT(*) FROM athletes
                 WHERE last_name = ? AND first_name = ? AND dob = ?
             """, (last_name, first_name, dob))
             result = cursor.fetchone()
-            conn.close()
             return result[0] > 0
         except sqlite3.Error as e:
             QMessageBox.critical(self, "Database Error", f"Failed to check athlete: {e}")
             return False
 
     def check_if_bib_exists(self, bib_number):
-        """ Check if a bib number is unique in the database. """
+        """ Check if a bib number is already taken, using the in-memory bib lookup. """
         try:
-            conn = self.connect_db()
-            cursor = conn.cursor()
-            cursor.execute("SELECT COUNT(*) FROM athletes WHERE bib_number = ?", (bib_number,))
-            result = cursor.fetchone()
-            conn.close()
-            return result[0] > 0  # Returns True if bib number exists
+            return get_bib_lookup(self.db_file_path).exists(bib_number)
         except sqlite3.Error as e:
             QMessageBox.critical(self, "Database Error", f"Failed to check bib number: {e}")
             return False
 
     def get_age_group_birthday_setting(self):
-        """ Fetch the 'use_age_group_birthday' setting from the settings table. """
+        """ Return the 'use_age_group_birthday' setting from the cached meet settings. """
         try:
-            conn = self.connect_db()
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT setting_value FROM settings WHERE setting_name = 'use_age_group_birthday'
-            """)
-            result = cursor.fetchone()
-            conn.close()
-            return result[0] == 'True'
+            return get_settings(self.db_file_path).use_age_group_birthday
         except sqlite3.Error as e:
             QMessageBox.critical(self, "Database Error", f"Failed to fetch settings: {e}")
             return False
 
     def update_athlete(self):
         """ Update the selected athlete's information. """
-        selected_items = self.table.selectedItems()
-        if not selected_items:
+        selected = self.selected_athlete()
+        if not selected:
             QMessageBox.warning(self, "Selection Error", "Please select an athlete to update.")
             return
 
         if not self.validate_inputs():
             return
 
+        bib_number = self.entry_bib_number.text() or None
+        if bib_number is not None:
+            holder = get_bib_lookup(self.db_file_path).find(bib_number)
+            if holder is not None and holder.athlete_id != selected[0]:
+                QMessageBox.warning(self, "Duplicate Bib Number",
+                                    f"Bib {bib_number} already belongs to {holder.first_name} {holder.last_name}.")
+                return
+
         updated_athlete_data = (
             self.entry_last_name.text(),
             self.entry_first_name.text(),
@@ -508,9 +497,9 @@ class AthletesWindow(QDialog):
             self.entry_dob.text(),
             self.team_combo.currentData(),
             self.team_combo.currentText(),
-            self.entry_bib_number.text(),
+            bib_number,
             self.entry_membership_number.text(),
-            selected_items[0].text()
+            selected[0]
         )
 
         try:
@@ -519,35 +508,40 @@ class AthletesWindow(QDialog):
             cursor.execute("""
                 UPDATE athletes SET 
                     last_name = ?, first_name = ?, middle_initials = ?, gender = ?, 
-                    dob = ?, team_code = ?, team_name = ?, bib_number = ?, membership_number = ? 
-                WHERE bib_number = ?
+                    dob = ?, team_code = ?, team_name = ?, bib_number = ?, membership_number = ?,
+                    import_hash = NULL
+                WHERE id = ?
             """, updated_athlete_data)
+            reassign_athlete(cursor, selected[0])  # Only this athlete's age and division can have changed
             conn.commit()
-            conn.close()
             self.load_athletes_data()
 
         except sqlite3.Error as e:
+            conn.rollback()
             QMessageBox.critical(self, "Database Error", f"Failed to update athlete: {e}")
 
     def delete_athlete(self):
         """ Delete the selected athlete from the database. """
-        selected_items = self.table.selectedItems()
-        if not selected_items:
+        selected = self.selected_athlete()
+        if not selected:
             QMessageBox.warning(self, "Selection Error", "Please select an athlete to delete.")
             return
 
-        athlete_last_name = selected_items[1].text()
+        athlete_id = selected[0]
 
         try:
             conn = self.connect_db()
             cursor = conn.cursor()
-            cursor.execute("DELETE FROM athletes WHERE last_name = ?", (athlete_last_name,))
+            cursor.execute("DELETE FROM entries WHERE athlete_id = ?", (athlete_id,))
+            # The relay keeps the leg by name, as for a participant who is not a known athlete
+            cursor.execute("UPDATE relay_legs SET athlete_id = NULL WHERE athlete_id = ?", (athlete_id,))
+            cursor.execute("DELETE FROM athletes WHERE id = ?", (athlete_id,))
             conn.commit()
-            conn.close()
 
             self.load_athletes_data()
 
         except sqlite3.Error as e:
+            conn.rollback()
             QMessageBox.critical(self, "Database Error", f"Failed to delete athlete: {e}")
 
     def validate_inputs(self):
@@ -575,24 +569,25 @@ class AthletesWindow(QDialog):
 
     def select_athlete(self):
         """ Populate the input fields with the selected athlete's data. """
-        selected_items = self.table.selectedItems()
-        if selected_items:
-            self.entry_bib_number.setText(selected_items[0].text())
-            self.entry_last_name.setText(selected_items[1].text())
-            self.entry_first_name.setText(selected_items[2].text())
-            self.entry_mi.setText(selected_items[3].text())
-
-            gender_index = self.entry_gender.findText(selected_items[4].text())
+        selected = self.selected_athlete()
+        if selected:
+            values = ["" if value is None else str(value) for value in selected[1]]
+            self.entry_bib_number.setText(values[0])
+            self.entry_last_name.setText(values[1])
+            self.entry_first_name.setText(values[2])
+            self.entry_mi.setText(values[3])
+
+            gender_index = self.entry_gender.findText(values[4])
             if gender_index != -1:
                 self.entry_gender.setCurrentIndex(gender_index)
 
-            self.entry_dob.setText(selected_items[5].text())
-            team_code = selected_items[6].text()
+            self.entry_dob.setText(values[5])
+            team_code = values[TEAM_CODE_COLUMN]
             index = self.team_combo.findData(team_code)
             if index != -1:
                 self.team_combo.setCurrentIndex(index)
 
-            self.entry_membership_number.setText(selected_items[8].text())
+            self.entry_membership_number.setText(values[MEMBERSHIP_COLUMN])
 
 # if __name__ == '__main__':
 #     app = QApplication(sys.argv)
@@ -0,0 +1,100 @@
+from PyQt6.QtCore import QAbstractTableModel, QModelIndex, QSortFilterProxyModel, Qt
+
+# Display headers, in column order
+ATHLETE_COLUMNS = [
+    "Bib Number", "Last Name", "First Name", "MI", "Gender", "DOB", "Age", "Division", "Team ID",
+    "Team Name", "Membership Number"
+]
+BIB_COLUMN = 0
+AGE_COLUMN = 6
+DIVISION_COLUMN = 7
+TEAM_CODE_COLUMN = 8
+TEAM_NAME_COLUMN = 9
+MEMBERSHIP_COLUMN = 10
+NUMERIC_COLUMNS = (BIB_COLUMN, AGE_COLUMN)
+
+
+class AthletesTableModel(QAbstractTableModel):
+    """
+    Read-only athlete table backed by one tuple per column.
+
+    The view only asks for the cells it paints, so no per-cell objects are
+    created and reloading is a single model reset.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.ids = ()
+        self.columns = tuple(() for _ in ATHLETE_COLUMNS)
+
+    def load(self, rows):
+        """ Replace the contents with rows of (id, bib, last, first, mi, gender, dob, age, division, team_code, team_name, membership). """
+        self.beginResetModel()
+        if rows:
+            columns = tuple(zip(*rows))
+            self.ids = columns[0]
+            self.columns = columns[1:]
+        else:
+            self.ids = ()
+            self.columns = tuple(() for _ in ATHLETE_COLUMNS)
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.ids)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(ATHLETE_COLUMNS)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        value = self.columns[index.column()][index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return "" if value is None else str(value)
+        if role == Qt.ItemDataRole.UserRole:
+            # Sort key: numeric columns sort as integers with blanks first, text case-insensitively
+            if index.column() in NUMERIC_COLUMNS:
+                try:
+                    return int(value)
+                except (TypeError, ValueError):
+                    return -1
+            return "" if value is None else str(value).lower()
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return ATHLETE_COLUMNS[section]
+        return None
+
+    def athlete_id(self, row):
+        return self.ids[row]
+
+    def row_values(self, row):
+        """ Return the display values of one row as a list, in column order. """
+        return [column[row] for column in self.columns]
+
+
+class AthletesFilterProxyModel(QSortFilterProxyModel):
+    """ In-memory sorting and team and division filtering on top of AthletesTableModel. """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.team_name = None  # None shows all teams
+        self.division_name = None  # None shows all divisions
+        self.setSortRole(Qt.ItemDataRole.UserRole)
+
+    def set_team_filter(self, team_name):
+        self.team_name = team_name
+        self.invalidateFilter()
+
+    def set_division_filter(self, division_name):
+        self.division_name = division_name
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        columns = self.sourceModel().columns
+        if self.team_name is not None and columns[TEAM_NAME_COLUMN][source_row] != self.team_name:
+            return False
+        if self.division_name is not None and columns[DIVISION_COLUMN][source_row] != self.division_name:
+            return False
+        return True
@@ -0,0 +1,302 @@
+from bisect import bisect_right
+
+from PyQt6.QtCore import Qt
+from PyQt6.QtGui import QIntValidator
+from PyQt6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QComboBox, QLineEdit, QPushButton, QMessageBox,
+    QTableWidget, QTableWidgetItem, QHeaderView
+)
+import sqlite3
+
+MAX_BIB = 99999  # Same upper limit as the bib inputs of the athletes window and bib dialog
+
+SCOPE_LABELS = {"team": "Team", "division": "Division"}
+
+
+class FreeBibs:
+    """
+    Free bib numbers of one range, kept as sorted, disjoint [start, end] gaps.
+    Finding the gap that holds a bib is a bisect over the gap starts.
+    """
+
+    def __init__(self, start, end, taken=(), blocked=()):
+        # taken: single bibs in use; blocked: (start, end) ranges that are not part of this pool
+        self.starts = []
+        self.ends = []
+        next_free = start
+        for block_start, block_end in sorted([(bib, bib) for bib in taken] + list(blocked)):
+            if block_end < next_free or block_start > end:
+                continue
+            if block_start > next_free:
+                self.starts.append(next_free)
+                self.ends.append(block_start - 1)
+            next_free = max(next_free, block_end + 1)
+        if next_free <= end:
+            self.starts.append(next_free)
+            self.ends.append(end)
+
+    def __len__(self):
+        return sum(gap_end - gap_start + 1 for gap_start, gap_end in zip(self.starts, self.ends))
+
+    def is_free(self, bib):
+        position = bisect_right(self.starts, bib) - 1
+        return position >= 0 and bib <= self.ends[position]
+
+    def take(self, bib):
+        """ Mark one bib as used, splitting its gap. Returns False if it was not free. """
+        position = bisect_right(self.starts, bib) - 1
+        if position < 0 or bib > self.ends[position]:
+            return False
+        gap_start, gap_end = self.starts[position], self.ends[position]
+        if gap_start == gap_end:
+            del self.starts[position]
+            del self.ends[position]
+        elif bib == gap_start:
+            self.starts[position] = bib + 1
+        elif bib == gap_end:
+            self.ends[position] = bib - 1
+        else:
+            self.ends[position] = bib - 1
+            self.starts.insert(position + 1, bib + 1)
+            self.ends.insert(position + 1, gap_end)
+        return True
+
+    def take_next(self):
+        """ Take and return the lowest free bib, or None when the range is full. """
+        if not self.starts:
+            return None
+        bib = self.starts[0]
+        self.take(bib)
+        return bib
+
+
+class BibAllocator:
+    """
+    Hands out bib numbers from the ranges reserved in the bib_ranges table.
+
+    An athlete draws from the range of its team, then the range of its
+    division, then the general pool: every bib outside the reserved ranges.
+    Used bibs are loaded once, so each allocation only touches the gaps of one pool.
+    """
+
+    def __init__(self, cursor):
+        self.cursor = cursor
+        self.cursor.execute("SELECT id, scope, scope_value, start_bib, end_bib FROM bib_ranges")
+        self.ranges = {(scope, str(scope_value)): (range_id, start_bib, end_bib)
+                       for range_id, scope, scope_value, start_bib, end_bib in self.cursor.fetchall()}
+
+        self.cursor.execute("SELECT bib_number FROM athletes WHERE bib_number IS NOT NULL")
+        self.taken = set()
+        for (bib_number,) in self.cursor.fetchall():
+            try:
+                self.taken.add(int(bib_number))
+            except (TypeError, ValueError):
+                continue
+        self.pools = {}  # range id (None for the general pool) -> FreeBibs, built on first use
+
+    def find_range(self, team_code=None, division_number=None):
+        """ Return (range_id, start_bib, end_bib) reserved for the team or division, or None. """
+        for scope, value in (("team", team_code), ("division", division_number)):
+            if value is not None and (scope, str(value)) in self.ranges:
+                return self.ranges[(scope, str(value))]
+        return None
+
+    def pool(self, reserved_range):
+        range_id = reserved_range[0] if reserved_range else None
+        free_bibs = self.pools.get(range_id)
+        if free_bibs is None:
+            if reserved_range:
+                free_bibs = FreeBibs(reserved_range[1], reserved_range[2], self.taken)
+            else:
+                blocked = [(start_bib, end_bib) for _, start_bib, end_bib in self.ranges.values()]
+                free_bibs = FreeBibs(1, MAX_BIB, self.taken, blocked)
+            self.pools[range_id] = free_bibs
+        return free_bibs
+
+    def next_bib(self, team_code=None, division_number=None):
+        """ Take the next free bib for an athlete of the team and division. Returns None when its range is full. """
+        bib = self.pool(self.find_range(team_code, division_number)).take_next()
+        if bib is not None:
+            self.taken.add(bib)
+        return bib
+
+    def overlapping_range(self, start_bib, end_bib, ignore_key=None):
+        """ Return the (scope, scope_value) of a reserved range overlapping start..end, if any. """
+        for key, (_, range_start, range_end) in self.ranges.items():
+            if key != ignore_key and range_start <= end_bib and start_bib <= range_end:
+                return key
+        return None
+
+    def assign_missing(self):
+        """
+        Give every athlete without a bib the next free bib of its range, in
+        team and name order, with one executemany. The caller commits.
+        Returns (assigned, unassigned): the count given a bib and the count whose range is full.
+        """
+        self.cursor.execute("""
+            SELECT id, team_code, division_number FROM athletes
+            WHERE bib_number IS NULL
+            ORDER BY team_name ASC, last_name ASC, first_name ASC, id ASC
+        """)
+        updates = []
+        unassigned = 0
+        for athlete_id, team_code, division_number in self.cursor.fetchall():
+            bib = self.next_bib(team_code, division_number)
+            if bib is None:
+                unassigned += 1
+            else:
+                updates.append((bib, athlete_id))
+        self.cursor.executemany("UPDATE athletes SET bib_number = ? WHERE id = ?", updates)
+        return len(updates), unassigned
+
+
+def assign_missing_bibs(window):
+    """ Give bibs to the athletes that have none, e.g. late registrations on meet day. """
+    conn = window.connect_db()
+    try:
+        assigned, unassigned = BibAllocator(conn.cursor()).assign_missing()
+        conn.commit()
+    except sqlite3.Error as e:
+        conn.rollback()
+        QMessageBox.critical(window, "Database Error", f"Failed to assign bib numbers: {e}")
+        return
+
+    window.load_athletes_data()
+    message = f"Bib numbers assigned to {assigned} athletes."
+    if unassigned:
+        message += f"\n{unassigned} athletes were left without a bib because their reserved range is full."
+    QMessageBox.information(window, "Assign Missing Bibs", message)
+
+
+class BibRangesDialog(QDialog):
+    """ Lists and edits the bib ranges reserved for teams and divisions. """
+
+    def __init__(self, window):
+        super().__init__(window)
+        self.setWindowTitle("Reserved Bib Ranges")
+        self.setGeometry(150, 150, 600, 400)
+        self.window = window
+        self.layout = QVBoxLayout(self)
+
+        self.table = QTableWidget(self)
+        self.table.setColumnCount(5)
+        self.table.setHorizontalHeaderLabels(["Scope", "Team/Division", "Start Bib", "End Bib", "Free"])
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        self.table.setSelectionMode(QTableWidget.SelectionMode.SingleSelection)
+        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.layout.addWidget(self.table)
+
+        form_layout = QHBoxLayout()
+        self.scope_combobox = QComboBox(self)
+        for scope, label in SCOPE_LABELS.items():
+            self.scope_combobox.addItem(label, scope)
+        self.scope_combobox.currentIndexChanged.connect(self.load_scope_values)
+        self.value_combobox = QComboBox(self)
+        self.start_bib_input = QLineEdit(self)
+        self.start_bib_input.setValidator(QIntValidator(1, MAX_BIB))
+        self.start_bib_input.setPlaceholderText("Start Bib")
+        self.end_bib_input = QLineEdit(self)
+        self.end_bib_input.setValidator(QIntValidator(1, MAX_BIB))
+        self.end_bib_input.setPlaceholderText("End Bib")
+        for widget in (self.scope_combobox, self.value_combobox, self.start_bib_input, self.end_bib_input):
+            form_layout.addWidget(widget)
+        self.layout.addLayout(form_layout)
+
+        btn_layout = QHBoxLayout()
+        self.save_btn = QPushButton("Save Range")
+        self.save_btn.clicked.connect(self.save_range)
+        self.delete_btn = QPushButton("Delete Range")
+        self.delete_btn.clicked.connect(self.delete_range)
+        btn_layout.addWidget(self.save_btn)
+        btn_layout.addWidget(self.delete_btn)
+        self.layout.addLayout(btn_layout)
+
+        self.load_scope_values()
+        self.load_ranges()
+
+    def load_scope_values(self):
+        """ Fill the second combo box with the teams or the divisions, depending on the scope. """
+        self.value_combobox.clear()
+        cursor = self.window.connect_read_db().cursor()
+        if self.scope_combobox.currentData() == "team":
+            cursor.execute("SELECT team_name, team_code FROM teams ORDER BY team_name ASC")
+        else:
+            cursor.execute("""
+                SELECT division_name, division_number FROM divisions_age_group
+                UNION
+                SELECT division_name, division_number FROM divisions_non_age_groups
+                ORDER BY 2 ASC
+            """)
+        for label, value in cursor.fetchall():
+            self.value_combobox.addItem(str(label), str(value))
+
+    def load_ranges(self):
+        cursor = self.window.connect_read_db().cursor()
+        allocator = BibAllocator(cursor)
+        cursor.execute("""
+            SELECT r.id, r.scope, r.scope_value, COALESCE(t.team_name, r.scope_value), r.start_bib, r.end_bib
+            FROM bib_ranges AS r
+            LEFT JOIN teams AS t ON r.scope = 'team' AND t.team_code = r.scope_value
+            ORDER BY r.start_bib ASC
+        """)
+        rows = cursor.fetchall()
+        self.table.setRowCount(len(rows))
+        for row, (range_id, scope, scope_value, label, start_bib, end_bib) in enumerate(rows):
+            free = len(allocator.pool((range_id, start_bib, end_bib)))
+            values = (SCOPE_LABELS.get(scope, scope), label, start_bib, end_bib, free)
+            for column, value in enumerate(values):
+                item = QTableWidgetItem(str(value))
+                if column == 0:
+                    item.setData(Qt.ItemDataRole.UserRole, (scope, scope_value))
+                self.table.setItem(row, column, item)
+
+    def save_range(self):
+        """ Add a range, or replace the range of a team or division that already has one. """
+        scope = self.scope_combobox.currentData()
+        scope_value = self.value_combobox.currentData()
+        if scope_value is None or not self.start_bib_input.text() or not self.end_bib_input.text():
+            QMessageBox.warning(self, "Input Error", "Choose a team or division and enter both bib numbers.")
+            return
+        start_bib, end_bib = int(self.start_bib_input.text()), int(self.end_bib_input.text())
+        if start_bib > end_bib:
+            QMessageBox.warning(self, "Input Error",
+                                "The starting bib number cannot be greater than the ending bib number.")
+            return
+
+        conn = self.window.connect_db()
+        try:
+            cursor = conn.cursor()
+            overlap = BibAllocator(cursor).overlapping_range(start_bib, end_bib, ignore_key=(scope, scope_value))
+            if overlap:
+                QMessageBox.warning(self, "Range Conflict",
+                                    f"Bibs {start_bib}-{end_bib} overlap the range reserved for "
+                                    f"{SCOPE_LABELS[overlap[0]].lower()} {overlap[1]}.")
+                return
+            cursor.execute("""
+                INSERT INTO bib_ranges (scope, scope_value, start_bib, end_bib) VALUES (?, ?, ?, ?)
+                ON CONFLICT (scope, scope_value) DO UPDATE SET start_bib = excluded.start_bib, end_bib = excluded.end_bib
+            """, (scope, scope_value, start_bib, end_bib))
+            conn.commit()
+        except sqlite3.Error as e:
+            conn.rollback()
+            QMessageBox.critical(self, "Database Error", f"Failed to save bib range: {e}")
+            return
+        self.load_ranges()
+
+    def delete_range(self):
+        rows = self.table.selectionModel().selectedRows()
+        if not rows:
+            QMessageBox.warning(self, "Selection Error", "Please select a range to delete.")
+            return
+        scope, scope_value = self.table.item(rows[0].row(), 0).data(Qt.ItemDataRole.UserRole)
+        conn = self.window.connect_db()
+        try:
+            conn.execute("DELETE FROM bib_ranges WHERE scope = ? AND scope_value = ?", (scope, scope_value))
+            conn.commit()
+        except sqlite3.Error as e:
+            conn.rollback()
+            QMessageBox.critical(self, "Database Error", f"Failed to delete bib range: {e}")
+            return
+        self.load_ranges()
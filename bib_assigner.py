@@ -1,9 +1,67 @@
 from PyQt6.QtWidgets import (
-    QDialog, QVBoxLayout, QLabel, QComboBox, QLineEdit, QPushButton, QMessageBox, QDialogButtonBox, QCheckBox
+    QDialog, QVBoxLayout, QLabel, QComboBox, QLineEdit, QMessageBox, QDialogButtonBox, QCheckBox
 )
 from PyQt6.QtGui import QIntValidator
 import sqlite3
 
+# Orderings offered for bib assignment: label -> ORDER BY clause. id keeps ties deterministic.
+BIB_ORDERINGS = {
+    "Team, Last Name": "team_name ASC, last_name ASC, first_name ASC, id ASC",
+    "Last Name": "last_name ASC, first_name ASC, id ASC",
+    "Division, Last Name": "division_number ASC, last_name ASC, first_name ASC, id ASC",
+    "Gender, Last Name": "gender ASC, last_name ASC, first_name ASC, id ASC",
+}
+
+
+def numbered_athletes(start_bib, team_name=None, ordering="Team, Last Name"):
+    """ Return (sql, params) of a query pairing each selected athlete id with its new bib. """
+    where = "WHERE team_name = ?" if team_name is not None else ""
+    sql = f"""
+        SELECT id, ? - 1 + ROW_NUMBER() OVER (ORDER BY {BIB_ORDERINGS[ordering]}) AS new_bib
+        FROM athletes {where}
+    """
+    return sql, [start_bib] + ([team_name] if team_name is not None else [])
+
+
+def find_bib_collisions(cursor, start_bib, end_bib=None, team_name=None, ordering="Team, Last Name"):
+    """
+    Return (bib_number, first_name, last_name, team_name) of the athletes outside
+    the selection that already hold one of the bibs the assignment would hand out.
+    """
+    numbered, params = numbered_athletes(start_bib, team_name, ordering)
+    last_bib = end_bib if end_bib is not None else -1
+    cursor.execute(f"""
+        WITH numbered AS ({numbered})
+        SELECT bib_number, first_name, last_name, team_name FROM athletes
+        WHERE bib_number IN (SELECT new_bib FROM numbered WHERE ? < 0 OR new_bib <= ?)
+          AND id NOT IN (SELECT id FROM numbered WHERE ? < 0 OR new_bib <= ?)
+        ORDER BY bib_number ASC
+    """, params + [last_bib, last_bib, last_bib, last_bib])
+    return cursor.fetchall()
+
+
+def assign_bibs(cursor, start_bib, end_bib=None, team_name=None, ordering="Team, Last Name"):
+    """
+    Number athletes from start_bib in the chosen order with two set-based
+    statements. The selected athletes' current bibs are released first so the
+    new numbers cannot collide with them under the unique bib index. The caller
+    commits, or rolls back if another athlete already holds one of the numbers.
+    Returns the number of athletes given a bib.
+    """
+    numbered, params = numbered_athletes(start_bib, team_name, ordering)
+    last_bib = end_bib if end_bib is not None else -1  # -1 lifts the limit below
+
+    cursor.execute(f"""
+        UPDATE athletes SET bib_number = NULL
+        WHERE id IN (SELECT id FROM ({numbered}) WHERE ? < 0 OR new_bib <= ?)
+    """, params + [last_bib, last_bib])
+    cursor.execute(f"""
+        UPDATE athletes SET bib_number = numbered.new_bib
+        FROM ({numbered}) AS numbered
+        WHERE athletes.id = numbered.id AND (? < 0 OR numbered.new_bib <= ?)
+    """, params + [last_bib, last_bib])
+    return cursor.rowcount
+
 
 class BibAssignerDialog(QDialog):
     """Custom dialog to handle team selection, starting and ending bib numbers in one popup."""
@@ -24,13 +82,12 @@ class BibAssignerDialog(QDialog):
         self.team_combobox.addItem("All Teams")
 
         # Fetch all teams from the database and add them to the combobox
-        conn = self.window.connect_db()
+        conn = self.window.connect_read_db()
         cursor = conn.cursor()
         cursor.execute("SELECT DISTINCT team_name FROM teams")
         teams = cursor.fetchall()
         for team in teams:
             self.team_combobox.addItem(team[0])
-        conn.close()
 
         # Connect the combobox selection to update the athlete count
         self.team_combobox.currentIndexChanged.connect(self.update_athlete_count)
@@ -44,6 +101,10 @@ class BibAssignerDialog(QDialog):
         self.end_bib_input = QLineEdit(self)
         self.end_bib_input.setValidator(QIntValidator(1, 99999))  # Only allow integers, adjust range as needed
 
+        # Order in which bib numbers are handed out
+        self.ordering_combobox = QComboBox(self)
+        self.ordering_combobox.addItems(BIB_ORDERINGS)
+
         # Add checkbox to make ending bib optional
         self.assign_all_checkbox = QCheckBox("Assign bib numbers to all athletes (ignore ending bib)", self)
         self.assign_all_checkbox.stateChanged.connect(self.toggle_end_bib)
@@ -56,6 +117,8 @@ class BibAssignerDialog(QDialog):
         self.layout.addWidget(self.end_bib_label)
         self.layout.addWidget(self.end_bib_input)
         self.layout.addWidget(self.assign_all_checkbox)
+        self.layout.addWidget(QLabel("Assign in order of:", self))
+        self.layout.addWidget(self.ordering_combobox)
 
         # Create buttons for OK and Cancel
         self.button_box = QDialogButtonBox(QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel)
@@ -75,16 +138,16 @@ class BibAssignerDialog(QDialog):
         self.end_bib_input.setEnabled(state == 0)  # Disable if checkbox is checked
 
     def get_inputs(self):
-        """Return the selected team, start bib number, and optionally the end bib number."""
+        """Return the selected team, start bib number, optionally the end bib number, and the ordering."""
         start_bib = int(self.start_bib_input.text()) if self.start_bib_input.text() else None
         end_bib = int(
             self.end_bib_input.text()) if self.end_bib_input.isEnabled() and self.end_bib_input.text() else None
-        return (self.team_combobox.currentText(), start_bib, end_bib)
+        return (self.team_combobox.currentText(), start_bib, end_bib, self.ordering_combobox.currentText())
 
     def update_athlete_count(self):
         """Update the athlete count based on the selected team."""
         selected_team = self.team_combobox.currentText()
-        conn = self.window.connect_db()
+        conn = self.window.connect_read_db()
         cursor = conn.cursor()
 
         # Fetch the number of athletes based on the selected team
@@ -94,7 +157,6 @@ class BibAssignerDialog(QDialog):
             cursor.execute("SELECT COUNT(*) FROM athletes WHERE team_name = ?", (selected_team,))
 
         athlete_count = cursor.fetchone()[0]
-        conn.close()
 
         # Update the athlete count label
         self.athlete_count_label.setText(f"Athlete Count: {athlete_count}")
@@ -106,7 +168,7 @@ def assign_bib_numbers(window):
         # Show the custom BibAssignerDialog to get inputs
         dialog = BibAssignerDialog(window)
         if dialog.exec() == QDialog.DialogCode.Accepted:
-            team_selection, start_bib, end_bib = dialog.get_inputs()
+            team_selection, start_bib, end_bib, ordering = dialog.get_inputs()
 
             # Validate that starting bib is provided
             if start_bib is None:
@@ -123,50 +185,38 @@ def assign_bib_numbers(window):
             conn = window.connect_db()
             cursor = conn.cursor()
 
-            # Build the query based on team selection and ensure athletes are sorted by team name and last name
-            if team_selection == "All Teams":
-                cursor.execute("""
-                    SELECT id, last_name, first_name, team_name, bib_number 
-                    FROM athletes 
-                    ORDER BY team_name ASC, last_name ASC
-                """)
-            else:
-                cursor.execute("""
-                    SELECT id, last_name, first_name, team_name, bib_number
-                    FROM athletes 
-                    WHERE team_name = ? 
-                    ORDER BY last_name ASC
-                """, (team_selection,))
-
-            athletes = cursor.fetchall()
+            team_name = None if team_selection == "All Teams" else team_selection
+
+            # Report bibs the assignment would take from other athletes instead of failing halfway
+            collisions = find_bib_collisions(cursor, start_bib, end_bib, team_name, ordering)
+            if collisions:
+                listed = "\n".join(f"  {bib}: {first} {last} ({team})" for bib, first, last, team in collisions[:10])
+                QMessageBox.warning(window, "Bib Collision",
+                                    f"{len(collisions)} bibs in this range already belong to other athletes:\n"
+                                    f"{listed}\n\nChoose another range or renumber those athletes first.")
+                return
+
+            # Number the athletes in one pass; commit only if every bib was assigned
+            assigned = assign_bibs(cursor, start_bib, end_bib, team_name, ordering)
 
             # Check if there are athletes to assign bib numbers to
-            if not athletes:
+            if not assigned:
+                conn.rollback()
                 QMessageBox.warning(window, "No Athletes", "No athletes found for the selected team.")
-                conn.close()
                 return
 
-            # Assign bib numbers sequentially as integers
-            bib_number = start_bib
-            for athlete in athletes:
-                if end_bib is not None and bib_number > end_bib:
-                    break
-                athlete_id = athlete[0]
-                cursor.execute("""
-                    UPDATE athletes 
-                    SET bib_number = ? 
-                    WHERE id = ?
-                """, (bib_number, athlete_id))
-                bib_number += 1
-
             conn.commit()
-            conn.close()
 
             # Reload athletes data to reflect changes
             window.load_athletes_data()
-            QMessageBox.information(window, "Success", "Bib numbers assigned successfully.")
+            QMessageBox.information(window, "Success", f"Bib numbers assigned to {assigned} athletes.")
 
+    except sqlite3.IntegrityError as e:
+        window.connect_db().rollback()
+        QMessageBox.critical(window, "Database Error",
+                             f"Failed to assign bib numbers: another athlete already holds a bib in that range. {e}")
     except sqlite3.Error as e:
+        window.connect_db().rollback()
         QMessageBox.critical(window, "Database Error", f"Failed to assign bib numbers: {e}")
     except Exception as e:
         QMessageBox.critical(window, "Error", f"An unexpected error occurred: {e}")
@@ -0,0 +1,93 @@
+from collections import namedtuple
+from datetime import datetime
+
+from db_connection import get_connection, get_read_connection
+
+# One cached lookup per open meet database: db_file_path -> BibLookup
+_lookup_cache = {}
+
+BibAthlete = namedtuple("BibAthlete", "athlete_id bib_number last_name first_name team_name division_name checked_in_at")
+
+
+def normalize_bib(bib):
+    """ Return the bib as an int, so scanned '00123' and stored 123 match. None when it is not a number. """
+    try:
+        return int(str(bib).strip())
+    except (TypeError, ValueError):
+        return None
+
+
+class BibLookup:
+    """
+    In-memory bib -> athlete map of one meet database.
+
+    The map is rebuilt only when PRAGMA data_version on the read connection
+    reports a commit since the last load, so a lookup is a dictionary hit plus
+    one pragma, and writes from any window are picked up automatically.
+    """
+
+    def __init__(self, db_file_path):
+        self.db_file_path = db_file_path
+        self._athletes = None
+        self._data_version = None
+
+    def _load(self):
+        conn = get_read_connection(self.db_file_path)
+        data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+        if self._athletes is None or data_version != self._data_version:
+            cursor = conn.execute("""
+                SELECT id, bib_number, last_name, first_name, team_name, division_name, checked_in_at
+                FROM athletes WHERE bib_number IS NOT NULL
+            """)
+            athletes = {}
+            for row in cursor.fetchall():
+                bib = normalize_bib(row[1])
+                if bib is not None:
+                    athletes[bib] = BibAthlete(*row)
+            self._athletes = athletes
+            self._data_version = data_version
+        return self._athletes
+
+    def find(self, bib):
+        """ Return the BibAthlete wearing the bib, or None. """
+        bib = normalize_bib(bib)
+        return None if bib is None else self._load().get(bib)
+
+    def exists(self, bib):
+        return self.find(bib) is not None
+
+    def checked_in_count(self):
+        """ Return (checked in, athletes with a bib). """
+        athletes = self._load()
+        return sum(1 for athlete in athletes.values() if athlete.checked_in_at), len(athletes)
+
+    def set_checked_in(self, bib, checked_in=True):
+        """ Check the athlete wearing the bib in or out. Returns the updated BibAthlete, or None for an unknown bib. """
+        athlete = self.find(bib)
+        if athlete is None:
+            return None
+        checked_in_at = datetime.now().strftime("%m/%d/%Y %H:%M:%S") if checked_in else None
+        conn = get_connection(self.db_file_path)
+        with conn:
+            conn.execute("UPDATE athletes SET checked_in_at = ? WHERE id = ?", (checked_in_at, athlete.athlete_id))
+
+        # Apply the change in place instead of reloading the whole map for our own write
+        athlete = athlete._replace(checked_in_at=checked_in_at)
+        self._athletes[normalize_bib(bib)] = athlete
+        self._data_version = get_read_connection(self.db_file_path).execute("PRAGMA data_version").fetchone()[0]
+        return athlete
+
+
+def get_bib_lookup(db_file_path):
+    """ Return the cached bib lookup of a meet database, creating it on first use. """
+    lookup = _lookup_cache.get(db_file_path)
+    if lookup is None:
+        lookup = BibLookup(db_file_path)
+        _lookup_cache[db_file_path] = lookup
+    return lookup
+
+
+def invalidate_bib_lookups(db_file_path=None):
+    """ Forget the cached bib lookup of one meet database, or of all of them. """
+    for path in [path for path in _lookup_cache if db_file_path is None or path == db_file_path]:
+        del _lookup_cache[path]
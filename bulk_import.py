@@ -0,0 +1,520 @@
+from athlete_ages import load_age_context, recompute_athlete_ages
+from bib_lookup import normalize_bib
+from event_catalog import get_event_catalog
+from event_ordering import renumber_events
+from event_store import add_events
+from import_hashes import record_hash
+from import_report import ImportReport
+
+
+# Records imported between two calls of an importer's progress callback
+PROGRESS_INTERVAL = 500
+
+
+def bib_key(bib_number):
+    """
+    A bib as stored under the unique athletes.bib_number index: an int for
+    numeric bibs, so '0123' and '123 ' match a stored 123, the stripped text
+    otherwise, and None for a blank bib.
+    """
+    bib = normalize_bib(bib_number)
+    if bib is None and bib_number is not None:
+        bib = str(bib_number).strip() or None
+    return bib
+
+
+def athlete_record_hash(last_name, first_name, middle_initials, gender, dob, team_code, team_name,
+                        membership_number, bib_number):
+    """ Content hash stored in athletes.import_hash; the import preview checks the same hash. """
+    return record_hash(last_name, first_name, middle_initials, gender, dob, team_code, team_name,
+                       membership_number, bib_number)
+
+
+def entry_record_hash(last_name, first_name, team_code, event_code, seed_mark, division_number, division_name):
+    """ Content hash stored in entries.import_hash. """
+    return record_hash(last_name, first_name, team_code, event_code, seed_mark, division_number, division_name)
+
+
+class ImportCancelled(Exception):
+    """ Raised from an import progress callback to abandon the import; the importer rolls back. """
+
+
+class BulkImporter:
+    """
+    Set-based write path for team and athlete imports.
+
+    The existing team and athlete keys are loaded once into dictionaries, every
+    incoming record is resolved to an insert or an update in Python, and the
+    pending rows are written with executemany. The caller owns the transaction
+    and commits once when the whole file has been added.
+
+    Each athlete row keeps the content hash of the record it was last imported
+    from, so a re-imported record that did not change is skipped with a single
+    set membership test.
+    """
+
+    BATCH_SIZE = 5000  # Pending athlete rows kept in memory before an intermediate flush
+
+    def __init__(self, cursor, report=None):
+        self.cursor = cursor
+        self.report = report if report is not None else ImportReport()  # Shared with the other writers
+        self.teams = {}  # team_code -> team_name
+        self.athletes = {}  # (last_name, first_name, team_code) -> membership_number
+        self.athlete_ids = {}  # (last_name, first_name, team_code) -> athletes.id of written rows
+        self.max_athlete_id = 0
+        self.bib_numbers = set()  # Bibs already taken; the athletes.bib_number index is unique
+        self.athlete_hashes = set()  # Content hashes of the records the stored athletes were imported from
+        self.age_context = None  # Meet year and division ranges, loaded on the first athlete
+        self.recompute_ages = False  # Set when division ranges change after athletes were queued
+        self.pending_teams = []
+        self.pending_athletes = {}  # key -> row tuple waiting to be inserted
+        self.pending_updates = {}  # key -> (new membership number, record hash)
+        self.pending_hashes = {}  # key -> record hash of a changed record that needs no other write
+        self.counts = {"teams_inserted": 0, "athletes_inserted": 0, "athletes_updated": 0, "athletes_skipped": 0,
+                       "athletes_unchanged": 0, "bibs_dropped": 0}
+        self.load_existing()
+
+    def load_existing(self):
+        """ Preload the team codes and athlete keys already in the database. """
+        self.cursor.execute("SELECT team_code, team_name FROM teams")
+        self.teams = {team_code: team_name for team_code, team_name in self.cursor.fetchall()}
+
+        self.cursor.execute("""
+            SELECT id, last_name, first_name, team_code, membership_number, bib_number, import_hash FROM athletes
+        """)
+        for athlete_id, last_name, first_name, team_code, membership_number, bib_number, import_hash in \
+                self.cursor.fetchall():
+            key = (last_name, first_name, team_code)
+            self.athletes[key] = membership_number
+            self.athlete_ids.setdefault(key, athlete_id)
+            self.max_athlete_id = max(self.max_athlete_id, athlete_id)
+            if bib_number is not None:
+                self.bib_numbers.add(bib_key(bib_number))
+            if import_hash is not None:
+                self.athlete_hashes.add(import_hash)
+
+    def load_new_athlete_ids(self):
+        """ Add the ids of rows inserted by the last flush to the identity map. """
+        self.cursor.execute("""
+            SELECT id, last_name, first_name, team_code FROM athletes WHERE id > ? ORDER BY id
+        """, (self.max_athlete_id,))
+        for athlete_id, last_name, first_name, team_code in self.cursor.fetchall():
+            self.athlete_ids.setdefault((last_name, first_name, team_code), athlete_id)
+            self.max_athlete_id = athlete_id
+
+    def reload_age_context(self):
+        """
+        Called when division ranges are imported. Athletes queued from now on use
+        the new ranges; athletes queued earlier are recomputed by the final flush.
+        """
+        if self.age_context is not None:
+            self.recompute_ages = True
+        self.age_context = None
+
+    def add_team(self, team_code, team_name):
+        """ Queue a team for insertion unless its code is already known. """
+        if team_code in self.teams:
+            return
+        self.teams[team_code] = team_name
+        self.pending_teams.append((team_name, team_code))
+
+    def add_athlete(self, last_name, first_name, middle_initials="", gender="", dob="", age=None,
+                    team_code="", team_name="", membership_number="", bib_number=None):
+        """ Resolve one athlete record to an insert, a membership update, or a skip. """
+        if not last_name or not first_name:
+            self.counts["athletes_skipped"] += 1
+            self.report.warn(f"Athlete '{first_name or ''} {last_name or ''}' ({team_code}) skipped: "
+                             f"missing first or last name")
+            return
+
+        import_hash = athlete_record_hash(last_name, first_name, middle_initials, gender, dob, team_code, team_name,
+                                          membership_number, bib_number)
+        if import_hash in self.athlete_hashes:
+            # Same record as the one the stored athlete came from; its team was written along with it
+            self.counts["athletes_unchanged"] += 1
+            return
+        self.athlete_hashes.add(import_hash)
+
+        self.add_team(team_code, team_name)
+
+        key = (last_name, first_name, team_code)
+        if key not in self.athletes:
+            if self.age_context is None:
+                self.age_context = load_age_context(self.cursor)
+            computed_age, division_number, division_name = self.age_context.age_and_division(dob)
+            if computed_age is not None:
+                age = computed_age
+            bib_number = bib_key(bib_number)
+            if bib_number is not None:
+                if bib_number in self.bib_numbers:
+                    # Keep the athlete but leave the bib for assignment rather than break the unique index
+                    self.counts["bibs_dropped"] += 1
+                    self.report.warn(f"Bib {bib_number} of {first_name} {last_name} ({team_code}) already "
+                                     f"belongs to another athlete; left blank")
+                    bib_number = None
+                else:
+                    self.bib_numbers.add(bib_number)
+            self.athletes[key] = membership_number
+            self.pending_athletes[key] = (bib_number, last_name, first_name, middle_initials, gender, dob, age,
+                                          division_number, division_name, team_code, team_name, membership_number,
+                                          import_hash)
+            if len(self.pending_athletes) >= self.BATCH_SIZE:
+                self.flush()
+            return
+
+        existing_membership_number = self.athletes[key]
+        if membership_number and existing_membership_number != membership_number:
+            self.athletes[key] = membership_number
+            if key in self.pending_athletes:
+                # Not written yet, so correct the queued row instead of issuing an UPDATE
+                self.pending_athletes[key] = self.pending_athletes[key][:-2] + (membership_number, import_hash)
+            else:
+                self.pending_updates[key] = (membership_number, import_hash)
+        else:
+            # Nothing to write, but store the hash so this record is skipped outright next time
+            self.pending_hashes[key] = import_hash
+            self.counts["athletes_skipped"] += 1
+
+    def flush(self):
+        """ Write all pending teams, athletes and membership updates with executemany. """
+        if self.pending_teams:
+            self.cursor.executemany("INSERT INTO teams (team_name, team_code) VALUES (?, ?)", self.pending_teams)
+            self.counts["teams_inserted"] += len(self.pending_teams)
+            self.pending_teams = []
+
+        if self.pending_athletes:
+            self.cursor.executemany("""
+                INSERT INTO athletes (bib_number, last_name, first_name, middle_initials, gender, dob, age,
+                                      division_number, division_name, team_code, team_name, membership_number,
+                                      import_hash)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, list(self.pending_athletes.values()))
+            self.counts["athletes_inserted"] += len(self.pending_athletes)
+            self.pending_athletes = {}
+            self.load_new_athlete_ids()
+
+        if self.pending_updates:
+            self.cursor.executemany("""
+                UPDATE athletes
+                SET membership_number = ?, import_hash = ?
+                WHERE last_name = ? AND first_name = ? AND team_code = ?
+            """, [update + key for key, update in self.pending_updates.items()])
+            self.counts["athletes_updated"] += len(self.pending_updates)
+            self.pending_updates = {}
+
+        if self.pending_hashes:
+            self.cursor.executemany("""
+                UPDATE athletes SET import_hash = ? WHERE last_name = ? AND first_name = ? AND team_code = ?
+            """, [(import_hash,) + key for key, import_hash in self.pending_hashes.items()])
+            self.pending_hashes = {}
+
+        if self.recompute_ages:
+            recompute_athlete_ages(self.cursor)
+            self.recompute_ages = False
+
+        return self.counts
+
+
+class EntryBulkImporter:
+    """
+    Batched writer for the 'entries' table.
+
+    Entries are resolved to athlete ids through the identity map kept by a
+    BulkImporter, so no per-row lookups are issued. Pending entries are
+    upserted with executemany on (athlete_id, event_code). Entries re-imported
+    from an unchanged record are skipped by their content hash.
+    """
+
+    BATCH_SIZE = 5000
+
+    def __init__(self, cursor, athletes):
+        self.cursor = cursor
+        self.athletes = athletes  # BulkImporter owning the athlete identity map
+        self.report = athletes.report
+        self.pending_entries = []
+        self.counts = {"entries_written": 0, "entries_unresolved": 0, "entries_unchanged": 0}
+        # Only entries of athletes that still exist count; an orphaned entry must not hide a record
+        self.cursor.execute("""
+            SELECT entries.import_hash FROM entries JOIN athletes ON athletes.id = entries.athlete_id
+            WHERE entries.import_hash IS NOT NULL
+        """)
+        self.entry_hashes = {import_hash for import_hash, in self.cursor.fetchall()}
+
+    def add_entry(self, last_name, first_name, team_code, event_code, seed_mark="", division_number="",
+                  division_name=""):
+        """ Queue one athlete entry. The athlete is resolved when the batch is flushed. """
+        if not event_code:
+            self.counts["entries_unresolved"] += 1
+            self.report.warn(f"Entry of {first_name} {last_name} ({team_code}) skipped: no event code")
+            return
+        import_hash = entry_record_hash(last_name, first_name, team_code, event_code, seed_mark, division_number,
+                                        division_name)
+        if import_hash in self.entry_hashes:
+            self.counts["entries_unchanged"] += 1
+            return
+        self.entry_hashes.add(import_hash)
+        self.pending_entries.append(((last_name, first_name, team_code), event_code, seed_mark,
+                                     division_number, division_name, import_hash))
+        if len(self.pending_entries) >= self.BATCH_SIZE:
+            self.flush()
+
+    def flush(self):
+        """ Resolve pending entries against the athlete identity map and upsert them. """
+        if not self.pending_entries:
+            return self.counts
+
+        # Athletes queued in the same file must be written before their ids are known
+        self.athletes.flush()
+        athlete_ids = self.athletes.athlete_ids
+
+        rows = []
+        for key, event_code, seed_mark, division_number, division_name, import_hash in self.pending_entries:
+            athlete_id = athlete_ids.get(key)
+            if athlete_id is None:
+                self.counts["entries_unresolved"] += 1
+                self.report.warn(f"Entry {event_code} of {key[1]} {key[0]} ({key[2]}) skipped: athlete not found")
+                continue
+            rows.append((athlete_id, event_code, seed_mark, division_number, division_name, import_hash))
+        self.pending_entries = []
+
+        self.cursor.executemany("""
+            INSERT INTO entries (athlete_id, event_code, seed_mark, division_number, division_name, import_hash)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (athlete_id, event_code) DO UPDATE SET
+                seed_mark = excluded.seed_mark,
+                division_number = excluded.division_number,
+                division_name = excluded.division_name,
+                import_hash = excluded.import_hash
+        """, rows)
+        self.counts["entries_written"] += len(rows)
+        return self.counts
+
+
+class RelayBulkImporter:
+    """
+    Batched writer for the 'relay_teams' and 'relay_legs' tables.
+
+    Meet exports list relay participants across several records for the same
+    team, event and division, so records are merged per relay before writing.
+    A relay is keyed on the gender of its event, never on its participants',
+    so the records of a mixed relay merge into one team.
+    Participants are resolved with a single hash join against the athletes
+    table on (last_name, first_name, dob, team_code), falling back to the
+    (last_name, first_name, team_code) identity map when no DOB was stored.
+    """
+
+    BATCH_SIZE = 2000
+
+    def __init__(self, cursor, athletes):
+        self.cursor = cursor
+        self.athletes = athletes  # BulkImporter owning the athlete identity map
+        self.report = athletes.report
+        self.pending_relays = {}  # (team_code, event_code, division_number, event gender) -> relay dict
+        self.replaced_relay_ids = set()  # Relays whose legs were already reset during this import
+        self.leg_keys = {}  # relay_team_id -> set of athlete keys already written as legs
+        self.counts = {"relay_teams_written": 0, "relay_legs_written": 0, "relay_legs_unresolved": 0}
+
+    def add_relay(self, team_code, team_name, event_code, seed_mark="", division_number="", participants=(),
+                  gender=""):
+        """
+        Queue one relay record. Participants are dicts with lastname, firstname
+        and birthdate; gender is the relay event's gender, blank when the file
+        does not give it.
+        """
+        if not team_code or not event_code:
+            return
+        self.athletes.add_team(team_code, team_name)
+
+        key = (team_code, event_code, division_number or "", gender or "")
+
+        relay = self.pending_relays.setdefault(key, {"seed_mark": "", "participants": []})
+        if (seed_mark and seed_mark != "0.00") or not relay["seed_mark"]:
+            relay["seed_mark"] = seed_mark
+        relay["participants"].extend(participants)
+
+        if len(self.pending_relays) >= self.BATCH_SIZE:
+            self.flush()
+
+    def load_athlete_index(self):
+        """ Build the (last_name, first_name, dob, team_code) -> id hash table in one query. """
+        self.cursor.execute("SELECT id, last_name, first_name, dob, team_code FROM athletes")
+        index = {}
+        for athlete_id, last_name, first_name, dob, team_code in self.cursor.fetchall():
+            index.setdefault((last_name, first_name, dob or "", team_code), athlete_id)
+        return index
+
+    def flush(self):
+        """ Upsert the pending relay teams, then write their legs in one batch. """
+        if not self.pending_relays:
+            return self.counts
+
+        # Legs can only be resolved once every athlete of the file is written
+        self.athletes.flush()
+
+        self.cursor.executemany("""
+            INSERT INTO relay_teams (team_code, event_code, division_number, gender, seed_mark)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (team_code, event_code, division_number, gender) DO UPDATE SET
+                seed_mark = excluded.seed_mark
+        """, [key + (relay["seed_mark"],) for key, relay in self.pending_relays.items()])
+        self.counts["relay_teams_written"] += len(self.pending_relays)
+
+        self.cursor.execute("SELECT id, team_code, event_code, division_number, gender FROM relay_teams")
+        relay_ids = {tuple(row[1:]): row[0] for row in self.cursor.fetchall()}
+        athlete_index = self.load_athlete_index()
+        athlete_ids = self.athletes.athlete_ids
+
+        stale_relay_ids = []
+        legs = []
+        for key, relay in self.pending_relays.items():
+            relay_id = relay_ids[key]
+            team_code = key[0]
+            if relay_id not in self.replaced_relay_ids:
+                # First time this relay is seen in this import: its legs are replaced, not appended to
+                self.replaced_relay_ids.add(relay_id)
+                self.leg_keys[relay_id] = set()
+                stale_relay_ids.append((relay_id,))
+
+            seen = self.leg_keys[relay_id]
+            for participant in relay["participants"]:
+                last_name = participant.get("lastname")
+                first_name = participant.get("firstname")
+                dob = participant.get("birthdate", "")
+                athlete_key = (last_name, first_name, dob, team_code)
+                if athlete_key in seen:
+                    continue
+                seen.add(athlete_key)
+
+                athlete_id = athlete_index.get(athlete_key) or athlete_ids.get((last_name, first_name, team_code))
+                if athlete_id is None:
+                    self.counts["relay_legs_unresolved"] += 1
+                    self.report.warn(f"Relay {key[1]} of {team_code}: leg {first_name} {last_name} is not a "
+                                     f"known athlete")
+                legs.append((relay_id, len(seen), athlete_id, last_name, first_name, dob))
+        self.pending_relays = {}
+
+        self.cursor.executemany("DELETE FROM relay_legs WHERE relay_team_id = ?", stale_relay_ids)
+        self.cursor.executemany("""
+            INSERT INTO relay_legs (relay_team_id, leg_number, athlete_id, last_name, first_name, dob)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, legs)
+        self.counts["relay_legs_written"] += len(legs)
+        return self.counts
+
+
+class MeetEventBulkImporter:
+    """
+    Import stage that builds the 'events' table from the meet_events section.
+
+    Rows are mapped to catalog event names, de-duplicated on (event_name,
+    division_name, gender), inserted with one INSERT ... ON CONFLICT statement
+    that skips events already present, and numbered with one set-based renumber.
+    """
+
+    def __init__(self, cursor, event_names=None, report=None):
+        self.cursor = cursor
+        self.report = report if report is not None else ImportReport()
+        if event_names is None:
+            catalog = get_event_catalog()
+            if catalog.error:
+                self.report.warn(f"Failed to load the event catalog: {catalog.error}")
+            event_names = catalog.name_index()
+        self.event_names = event_names
+        self.pending_events = {}  # (event_name, division_name, gender) -> None, in file order
+        self.counts = {"events_inserted": 0}
+
+    def add_meet_event(self, event, division_name, gender):
+        """ Queue one (event, division, gender) row. Unknown event names are kept as given. """
+        if not event or not division_name or not gender:
+            return
+        event_name = self.event_names.get(event.strip().lower())
+        if event_name is None:
+            event_name = event.strip()
+            if (event_name, division_name, gender) not in self.pending_events:
+                self.report.warn(f"Event '{event_name}' ({division_name}, {gender}) is not in the event catalog; "
+                                 f"kept as given")
+        self.pending_events.setdefault((event_name, division_name, gender), None)
+
+    def flush(self):
+        """ Insert the events that do not exist yet and renumber the whole table. """
+        if not self.pending_events:
+            return self.counts
+
+        self.counts["events_inserted"] += add_events(self.cursor, self.pending_events)
+        self.pending_events = {}
+
+        renumber_events(self.cursor)
+        return self.counts
+
+
+class RecordCollector:
+    """
+    Stands in for the bulk writers while a file is parsed without writing.
+
+    It has the add_* interface of BulkImporter, EntryBulkImporter,
+    RelayBulkImporter and MeetEventBulkImporter, and records each call so a
+    RecordWriter can replay the file later. Calls are plain tuples, so they
+    pickle cheaply from a worker process and can be kept for a preview.
+    """
+
+    def __init__(self):
+        self.calls = []  # (method name, args, kwargs) in file order
+
+    def add_team(self, *args, **kwargs):
+        self.calls.append(("add_team", args, kwargs))
+
+    def add_athlete(self, *args, **kwargs):
+        self.calls.append(("add_athlete", args, kwargs))
+
+    def add_entry(self, *args, **kwargs):
+        self.calls.append(("add_entry", args, kwargs))
+
+    def add_relay(self, *args, **kwargs):
+        self.calls.append(("add_relay", args, kwargs))
+
+    def add_meet_event(self, *args, **kwargs):
+        self.calls.append(("add_meet_event", args, kwargs))
+
+    def add_division(self, division):
+        self.calls.append(("add_division", (division,), {}))
+
+
+class RecordWriter:
+    """
+    Replays calls recorded by a RecordCollector through one set of bulk writers.
+
+    import_division(bulk, division) writes one division record; it is only
+    needed for calls recorded from .json files.
+    """
+
+    def __init__(self, cursor, import_division=None, report=None):
+        self.report = report if report is not None else ImportReport()
+        self.bulk = BulkImporter(cursor, self.report)
+        self.entries = EntryBulkImporter(cursor, self.bulk)
+        self.relays = RelayBulkImporter(cursor, self.bulk)
+        self.meet_events = MeetEventBulkImporter(cursor, report=self.report)
+        self.writers = (self.bulk, self.entries, self.relays, self.meet_events)
+        self.targets = {
+            "add_team": self.bulk.add_team,
+            "add_athlete": self.bulk.add_athlete,
+            "add_entry": self.entries.add_entry,
+            "add_relay": self.relays.add_relay,
+            "add_meet_event": self.meet_events.add_meet_event,
+            "add_division": lambda division: import_division(self.bulk, division),
+        }
+
+    def counts(self):
+        return {key: value for writer in self.writers for key, value in writer.counts.items()}
+
+    def replay(self, calls):
+        """ Replay and flush the calls of one file. Returns the counts of this file alone. """
+        before = self.counts()
+        with self.report.stage("Queue records"):
+            for method, args, kwargs in calls:
+                self.targets[method](*args, **kwargs)
+        with self.report.stage("Write records"):
+            for writer in self.writers:
+                writer.flush()
+        after = self.counts()
+        self.report.update(after)
+        return {key: after[key] - before[key] for key in after}
@@ -0,0 +1,101 @@
+from PyQt6.QtCore import Qt
+from PyQt6.QtGui import QIntValidator
+from PyQt6.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton, QListWidget, QMessageBox
+import sqlite3
+
+from bib_lookup import get_bib_lookup
+
+
+class CheckInDialog(QDialog):
+    """
+    Meet-day check-in table. Bibs typed or scanned with a barcode scanner (which
+    types the digits followed by Enter) resolve through the in-memory bib lookup.
+    """
+
+    MAX_RECENT = 50  # Check-ins kept in the recent list
+
+    def __init__(self, window):
+        super().__init__(window)
+        self.setWindowTitle("Athlete Check-In")
+        self.setGeometry(150, 150, 500, 450)
+        self.window = window
+        self.lookup = get_bib_lookup(window.db_file_path)
+        self.last_bib = None
+
+        layout = QVBoxLayout(self)
+
+        layout.addWidget(QLabel("Scan or enter a bib number:", self))
+        self.bib_input = QLineEdit(self)
+        self.bib_input.setValidator(QIntValidator(1, 99999))
+        self.bib_input.returnPressed.connect(self.check_in)
+        layout.addWidget(self.bib_input)
+
+        self.result_label = QLabel("", self)
+        self.result_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.result_label.setStyleSheet("font-size: 16pt;")
+        layout.addWidget(self.result_label)
+
+        self.count_label = QLabel("", self)
+        layout.addWidget(self.count_label)
+
+        self.recent_list = QListWidget(self)
+        layout.addWidget(self.recent_list)
+
+        btn_layout = QHBoxLayout()
+        self.undo_btn = QPushButton("Undo Last Check-In")
+        self.undo_btn.clicked.connect(self.undo_check_in)
+        self.close_btn = QPushButton("Close")
+        self.close_btn.clicked.connect(self.accept)
+        btn_layout.addWidget(self.undo_btn)
+        btn_layout.addWidget(self.close_btn)
+        layout.addLayout(btn_layout)
+
+        self.update_count()
+        self.bib_input.setFocus()
+
+    def update_count(self):
+        checked_in, total = self.lookup.checked_in_count()
+        self.count_label.setText(f"Checked In: {checked_in} of {total}")
+
+    def check_in(self):
+        """ Resolve the entered bib and mark its athlete as checked in. """
+        bib = self.bib_input.text()
+        self.bib_input.clear()
+        if not bib:
+            return
+
+        try:
+            athlete = self.lookup.find(bib)
+            if athlete is None:
+                self.result_label.setText(f"Bib {bib} not found")
+                return
+            if athlete.checked_in_at:
+                self.result_label.setText(
+                    f"{athlete.first_name} {athlete.last_name} already checked in at {athlete.checked_in_at}")
+                return
+            athlete = self.lookup.set_checked_in(bib)
+        except sqlite3.Error as e:
+            QMessageBox.critical(self, "Database Error", f"Failed to check in bib {bib}: {e}")
+            return
+
+        self.last_bib = bib
+        self.result_label.setText(f"{athlete.bib_number}: {athlete.first_name} {athlete.last_name}")
+        self.recent_list.insertItem(0, f"{athlete.bib_number}  {athlete.last_name}, {athlete.first_name}  "
+                                       f"({athlete.team_name or ''})  {athlete.checked_in_at}")
+        if self.recent_list.count() > self.MAX_RECENT:
+            self.recent_list.takeItem(self.recent_list.count() - 1)
+        self.update_count()
+
+    def undo_check_in(self):
+        if self.last_bib is None:
+            return
+        try:
+            athlete = self.lookup.set_checked_in(self.last_bib, checked_in=False)
+        except sqlite3.Error as e:
+            QMessageBox.critical(self, "Database Error", f"Failed to undo check-in: {e}")
+            return
+        if athlete is not None:
+            self.result_label.setText(f"Check-in undone for {athlete.first_name} {athlete.last_name}")
+            self.recent_list.takeItem(0)
+        self.last_bib = None
+        self.update_count()
@@ -4,9 +4,10 @@ import platform  # Import platform to detect OS
 from PyQt6.QtWidgets import QDialog, QVBoxLayout, QLabel, QLineEdit, QCheckBox, QPushButton, QFileDialog, QMessageBox, QDateEdit
 from PyQt6.QtCore import QDate
 
-def create_table(cursor, table_name, columns):
-    query = f"CREATE TABLE IF NOT EXISTS {table_name} ({columns})"
-    cursor.execute(query)
+from schema import create_table, migrate_database
+from bib_lookup import invalidate_bib_lookups
+from settings_service import invalidate_settings
+
 
 def create_database(file_path, use_age_group_birthday, meet_date):
     try:
@@ -96,6 +97,9 @@ def create_database(file_path, use_age_group_birthday, meet_date):
                        ('use_age_group_birthday', str(use_age_group_birthday), meet_date,int(4)))
 
         conn.commit()
+        migrate_database(conn)
+        invalidate_settings(file_path)  # A recreated meet file must not reuse cached settings
+        invalidate_bib_lookups(file_path)
         conn.close()
         print(f"Database created successfully at: {file_path}")
 
@@ -0,0 +1,56 @@
+import sqlite3
+
+# Long-lived connections shared by the windows of the open meet: db_file_path -> connection
+_write_connections = {}
+_read_connections = {}
+
+# Applied to every connection. WAL lets the read connection see committed data while a
+# write is in progress, and synchronous=NORMAL is safe under WAL while avoiding an fsync per commit.
+CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -16000",  # Negative value is in KiB: 16 MB page cache
+    "PRAGMA mmap_size = 268435456",  # 256 MB memory-mapped I/O
+    "PRAGMA busy_timeout = 5000",
+)
+
+
+def open_connection(db_file_path, read_only=False):
+    """
+    Open a new tuned connection. Used directly by code that needs a private
+    connection, such as importers running on a worker thread; the caller closes it.
+    """
+    conn = sqlite3.connect(db_file_path)
+    for pragma in CONNECTION_PRAGMAS:
+        conn.execute(pragma)
+    if read_only:
+        conn.execute("PRAGMA query_only = ON")
+    return conn
+
+
+def get_connection(db_file_path):
+    """ Return the shared write connection for the meet database, opening it on first use. """
+    conn = _write_connections.get(db_file_path)
+    if conn is None:
+        conn = open_connection(db_file_path)
+        _write_connections[db_file_path] = conn
+    return conn
+
+
+def get_read_connection(db_file_path):
+    """ Return the shared read-only connection used by display queries. """
+    conn = _read_connections.get(db_file_path)
+    if conn is None:
+        # Make sure the file exists and WAL is set up before opening the query-only connection
+        get_connection(db_file_path)
+        conn = open_connection(db_file_path, read_only=True)
+        _read_connections[db_file_path] = conn
+    return conn
+
+
+def close_connections(db_file_path=None):
+    """ Close the shared connections of one meet database, or of all of them. """
+    for connections in (_read_connections, _write_connections):
+        for path in [path for path in connections if db_file_path is None or path == db_file_path]:
+            connections.pop(path).close()
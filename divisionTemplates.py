@@ -6,6 +6,9 @@ from PyQt6.QtWidgets import (
     QComboBox, QMessageBox, QApplication, QTableWidget, QTableWidgetItem
 )
 from PyQt6.QtCore import Qt
+from athlete_ages import recompute_athlete_ages
+from db_connection import get_connection
+from settings_service import get_settings
 
 
 
@@ -108,8 +111,9 @@ class ImportDivisionsWindow(QDialog):
         self.setLayout(layout)
 
     def connect_db(self):
+        """ Return the shared write connection to the SQLite database. """
         try:
-            return sqlite3.connect(self.db_file_path)
+            return get_connection(self.db_file_path)
         except sqlite3.Error as e:
             QMessageBox.critical(self, "Database Error", f"Failed to connect to the database: {e}")
             raise
@@ -168,26 +172,20 @@ class ImportDivisionsWindow(QDialog):
 
                 cursor.execute(query, params)
 
+            # Athletes keep their age but may now fall into a different division
+            report = recompute_athlete_ages(cursor)
             conn.commit()
-            conn.close()
-            QMessageBox.information(self, "Success", "Template imported successfully.")
+            QMessageBox.information(self, "Success", f"Template imported successfully.\n\n{report.summary()}")
         except sqlite3.Error as e:
+            conn.rollback()
             QMessageBox.critical(self, "Database Error", f"Failed to import template: {e}")
         except Exception as e:
+            conn.rollback()
             QMessageBox.critical(self, "Error", f"An unexpected error occurred: {e}")
 
     def check_use_age_group_birthday(self):
         try:
-            conn = self.connect_db()
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT setting_value 
-                FROM settings 
-                WHERE setting_name = 'use_age_group_birthday'
-            """)
-            result = cursor.fetchone()
-            conn.close()
-            return result and result[0].lower() == 'true'
+            return get_settings(self.db_file_path).use_age_group_birthday
         except sqlite3.Error as e:
             QMessageBox.critical(self, "Database Error", f"Failed to check settings: {e}")
             return False
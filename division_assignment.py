@@ -0,0 +1,113 @@
+from bisect import bisect_right
+from datetime import datetime
+
+
+def age_on(dob, as_of):
+    """ Age in whole years on the as-of date; both arguments are datetimes. """
+    return as_of.year - dob.year - ((as_of.month, as_of.day) < (dob.month, dob.day))
+
+
+def parse_as_of_date(value):
+    """ Parse a division's age_as_of_date (MM/DD/YYYY). Returns None when it is blank or malformed. """
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, '%m/%d/%Y')
+    except (TypeError, ValueError):
+        return None
+
+
+class DivisionIndex:
+    """
+    Sorted interval index over the age-group divisions.
+
+    Divisions are grouped by the date their ages are taken on: their own
+    age_as_of_date, or default_as_of when they have none. Within a group the
+    from_age/to_age boundaries split the age line into non-overlapping
+    segments, each holding every division that covers it, so one bisect finds
+    all the divisions of an age, including overlapping ones.
+    """
+
+    def __init__(self, divisions, default_as_of):
+        # divisions: rows of (division_number, division_name, from_age, to_age, age_as_of_date)
+        self.default_as_of = default_as_of
+        ranges_by_date = {}
+        for division_number, division_name, from_age, to_age, age_as_of_date in divisions:
+            try:
+                from_age, to_age = int(from_age), int(to_age)
+            except (TypeError, ValueError):
+                continue  # Ranges typed into the divisions grid may not be numbers yet
+            as_of = parse_as_of_date(age_as_of_date) or default_as_of
+            if as_of is None or from_age > to_age:
+                continue
+            ranges_by_date.setdefault(as_of, []).append((from_age, to_age, division_number, division_name))
+
+        self.groups = [(as_of,) + self.build_segments(ranges) for as_of, ranges in ranges_by_date.items()]
+        self.division_count = sum(len(ranges) for ranges in ranges_by_date.values())
+
+    @staticmethod
+    def build_segments(ranges):
+        """ Return (starts, segments): segments[i] holds the divisions covering ages starts[i] to starts[i + 1] - 1. """
+        starts = sorted({from_age for from_age, _, _, _ in ranges} | {to_age + 1 for _, to_age, _, _ in ranges})
+        segments = []
+        for start in starts:
+            segments.append(tuple(sorted(
+                (division_number, division_name)
+                for from_age, to_age, division_number, division_name in ranges
+                if from_age <= start <= to_age
+            )))
+        return starts, segments
+
+    def lookup(self, dob):
+        """ Return the (division_number, division_name) of every division the athlete born on dob falls into. """
+        matches = []
+        for as_of, starts, segments in self.groups:
+            position = bisect_right(starts, age_on(dob, as_of)) - 1
+            if position >= 0:
+                matches.extend(segments[position])
+        if len(self.groups) > 1:
+            matches = sorted(set(matches))
+        return tuple(matches)
+
+
+class DivisionAssignmentReport:
+    """ Outcome of an assignment pass: how many athletes were placed and which ones need a look. """
+
+    MAX_LISTED = 10  # Athletes named per problem in summary()
+
+    def __init__(self):
+        self.assigned = 0
+        self.without_dob = 0
+        self.unassigned = []  # (athlete_id, name, age)
+        self.ambiguous = []  # (athlete_id, name, [division names])
+
+    def add(self, athlete_id, name, age, matches):
+        if age is None:
+            self.without_dob += 1
+        elif not matches:
+            self.unassigned.append((athlete_id, name, age))
+        else:
+            self.assigned += 1
+            if len(matches) > 1:
+                self.ambiguous.append((athlete_id, name, [division_name for _, division_name in matches]))
+
+    def summary(self):
+        lines = [f"Assigned {self.assigned} athletes to a division."]
+        if self.unassigned:
+            lines.append(f"{len(self.unassigned)} athletes fall into no division:")
+            lines += [f"  {name} (age {age})" for _, name, age in self.unassigned[:self.MAX_LISTED]]
+        if self.ambiguous:
+            lines.append(f"{len(self.ambiguous)} athletes fall into more than one division "
+                         f"and were placed in the lowest numbered one:")
+            lines += [f"  {name}: {', '.join(divisions)}" for _, name, divisions in self.ambiguous[:self.MAX_LISTED]]
+        return "\n".join(lines)
+
+
+def load_division_index(cursor, default_as_of):
+    """ Build the interval index from the divisions_age_group table. """
+    cursor.execute("""
+        SELECT division_number, division_name, from_age, to_age, age_as_of_date
+        FROM divisions_age_group
+        WHERE from_age IS NOT NULL AND to_age IS NOT NULL
+    """)
+    return DivisionIndex(cursor.fetchall(), default_as_of)
@@ -7,6 +7,9 @@ from PyQt6.QtWidgets import (
     QTableWidget, QTableWidgetItem, QMessageBox, QHeaderView
 )
 from PyQt6.QtCore import Qt
+from athlete_ages import recompute_athlete_ages
+from db_connection import get_connection, get_read_connection
+from settings_service import get_settings
 from resource_path import resource_path
 
 
@@ -97,31 +100,31 @@ class DivisionsWindow(QDialog):
         self.setLayout(main_layout)
 
     def connect_db(self):
+        """ Return the shared write connection to the SQLite database. """
         try:
-            return sqlite3.connect(self.db_file_path)
+            return get_connection(self.db_file_path)
+        except sqlite3.Error as e:
+            QMessageBox.critical(self, "Database Error", f"Failed to connect to the database: {e}")
+            raise
+
+    def connect_read_db(self):
+        """ Return the shared read-only connection used for display queries. """
+        try:
+            return get_read_connection(self.db_file_path)
         except sqlite3.Error as e:
             QMessageBox.critical(self, "Database Error", f"Failed to connect to the database: {e}")
             raise
 
     def check_use_age_group_birthday(self):
         try:
-            conn = self.connect_db()
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT setting_value 
-                FROM settings 
-                WHERE setting_name = 'use_age_group_birthday'
-            """)
-            result = cursor.fetchone()
-            conn.close()
-            return result and result[0].lower() == 'true'
+            return get_settings(self.db_file_path).use_age_group_birthday
         except sqlite3.Error as e:
             QMessageBox.critical(self, "Database Error", f"Failed to check settings: {e}")
             return False
 
     def load_age_group_divisions_data(self):
         try:
-            conn = self.connect_db()
+            conn = self.connect_read_db()
             cursor = conn.cursor()
 
             cursor.execute("""
@@ -132,13 +135,12 @@ class DivisionsWindow(QDialog):
 
 
             self.populate_table(cursor.fetchall(), ["Division Number", "Division Abbr", "Division Name", "From Age", "To Age", "Age As Of Date"])
-            conn.close()
         except sqlite3.Error as e:
             QMessageBox.critical(self, "Database Error", f"Failed to fetch age group divisions data: {e}")
 
     def load_non_age_group_divisions_data(self):
         try:
-            conn = self.connect_db()
+            conn = self.connect_read_db()
             cursor = conn.cursor()
 
 
@@ -149,7 +151,6 @@ class DivisionsWindow(QDialog):
                 ORDER BY division_number ASC
             """)
             self.populate_table(cursor.fetchall(), ["Division Number", "Division Abbr", "Division Name"])
-            conn.close()
         except sqlite3.Error as e:
             QMessageBox.critical(self, "Database Error", f"Failed to fetch non-age group divisions data: {e}")
 
@@ -195,10 +196,12 @@ class DivisionsWindow(QDialog):
             conn = self.connect_db()
             cursor = conn.cursor()
             cursor.execute(query, params)
+            if table_name == "divisions_age_group":
+                recompute_athlete_ages(cursor)  # Age ranges changed, so stored athlete divisions may be stale
             conn.commit()
-            conn.close()
             QMessageBox.information(self, "Success", "Value updated successfully.")
         except sqlite3.Error as e:
+            conn.rollback()
             QMessageBox.critical(self, "Database Error", f"Failed to update value: {e}")
             self.refresh_data()
         finally:
@@ -238,11 +241,13 @@ class DivisionsWindow(QDialog):
             conn = self.connect_db()
             cursor = conn.cursor()
             cursor.execute(query, params)
+            if self.check_use_age_group_birthday():
+                recompute_athlete_ages(cursor)
             conn.commit()
-            conn.close()
             self.refresh_data()
             QMessageBox.information(self, "Success", "Row added successfully.")
         except sqlite3.Error as e:
+            conn.rollback()
             QMessageBox.critical(self, "Database Error", f"Failed to add row: {e}")
 
     def refresh_data(self):
@@ -271,11 +276,13 @@ class DivisionsWindow(QDialog):
                 conn = self.connect_db()
                 cursor = conn.cursor()
                 cursor.execute(f"DELETE FROM {table_name}")
+                if table_name == "divisions_age_group":
+                    recompute_athlete_ages(cursor)
                 conn.commit()
-                conn.close()
                 self.refresh_data()
                 QMessageBox.information(self, "Success", "All data cleared successfully.")
             except sqlite3.Error as e:
+                conn.rollback()
                 QMessageBox.critical(self, "Database Error", f"Failed to clear data: {e}")
 
     def open_division_templates(self):
@@ -0,0 +1,68 @@
+import json
+import os
+
+from resource_path import resource_path
+
+DEFAULT_CATALOG_PATH = "json/events4.json"
+
+# One parsed catalog per catalog file: absolute path -> EventCatalog
+_catalog_cache = {}
+
+
+class EventCatalog:
+    """
+    The event catalog (json/events4.json) parsed once and indexed in memory
+    by type, by name and by uniqueid. Events keep their catalog order in every
+    index. error holds the reason when the file could not be read, in which
+    case the catalog is empty.
+    """
+
+    def __init__(self, events, mtime=None, error=None):
+        self.events = events
+        self.mtime = mtime
+        self.error = error
+        self.by_type = {}
+        self.by_uniqueid = {}
+        self.by_name = {}
+        for event in events:
+            self.by_type.setdefault(event.get("type"), []).append(event)
+            self.by_uniqueid.setdefault(str(event.get("uniqueid", "")).lower(), event)
+            self.by_name.setdefault(event["event_name"].lower(), event)
+        self._name_index = None
+
+    def event_names(self, event_type=None):
+        """ Sorted names of the events of one type, or of every event. """
+        events = self.by_type.get(event_type, []) if event_type is not None else self.events
+        return sorted(event["event_name"] for event in events)
+
+    def name_index(self):
+        """ Map lower-cased event names and unique ids to the catalog event name. Names win over ids. """
+        if self._name_index is None:
+            index = {uniqueid: event["event_name"] for uniqueid, event in self.by_uniqueid.items()}
+            index.update((name, event["event_name"]) for name, event in self.by_name.items())
+            self._name_index = index
+        return self._name_index
+
+
+def get_event_catalog(json_file_path=DEFAULT_CATALOG_PATH):
+    """
+    Return the parsed catalog, reading the file only on first use and again
+    after it was modified. A missing or broken file gives an empty catalog
+    whose error the caller reports.
+    """
+    path = resource_path(json_file_path)
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError as e:
+        return EventCatalog([], error=str(e))
+
+    catalog = _catalog_cache.get(path)
+    if catalog is None or catalog.mtime != mtime:
+        try:
+            with open(path, 'r') as file:
+                events = json.load(file)
+        except (OSError, json.JSONDecodeError) as e:
+            return EventCatalog([], error=str(e))
+        catalog = EventCatalog(events, mtime)
+        _catalog_cache[path] = catalog
+    return catalog
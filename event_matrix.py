@@ -0,0 +1,197 @@
+import sqlite3
+
+from PyQt6.QtCore import Qt
+from PyQt6.QtGui import QIcon
+from PyQt6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QGroupBox, QListWidget, QListWidgetItem, QTreeWidget, QTreeWidgetItem,
+    QCheckBox, QComboBox, QLabel, QPushButton, QMessageBox
+)
+
+from db_connection import get_connection, get_read_connection
+from event_catalog import DEFAULT_CATALOG_PATH, get_event_catalog
+from event_store import save_event_matrix
+from resource_path import resource_path
+
+GENDERS = ["Male", "Female", "Mixed"]
+
+# Event groups shown for selection: title -> catalog type, in the EventSelector's order
+EVENT_GROUPS = [
+    ("Run", "run"), ("Dash", "dash"), ("Hurdles", "hurdles"), ("Jumps", "jump"), ("Throws", "throw"),
+    ("Multi Events", "multi"), ("Relay Events", "relay"),
+]
+
+ADD_MODE = "Add to existing events"
+REPLACE_MODE = "Replace existing events"
+
+
+class EventMatrixDialog(QDialog):
+    """
+    Applies one set of events to many divisions and genders at once. The whole
+    divisions x genders x events matrix is written in one transaction, instead
+    of one EventSelector save per division and gender.
+
+    In replace mode the unchecked catalog events are removed from the chosen
+    divisions and genders; in add mode existing events are left as they are.
+    """
+
+    def __init__(self, db_file_path, json_file_path=DEFAULT_CATALOG_PATH, selected_events=(), division_name=None,
+                 gender=None, parent=None):
+        super().__init__(parent)
+        self.db_file_path = db_file_path
+        self.applied_pairs = []  # (division_name, gender) pairs written by the last apply
+        self.setWindowTitle("Event Matrix")
+        self.setGeometry(100, 100, 900, 600)
+        self.setWindowIcon(QIcon(resource_path("images/ms.png")))
+
+        main_layout = QVBoxLayout()
+        matrix_layout = QHBoxLayout()
+
+        # Divisions
+        division_group = QGroupBox("Divisions")
+        division_layout = QVBoxLayout()
+        self.division_list = QListWidget()
+        for name in self.load_division_names():
+            item = QListWidgetItem(name)
+            item.setFlags(item.flags() | Qt.ItemFlag.ItemIsUserCheckable)
+            item.setCheckState(Qt.CheckState.Checked if name == division_name else Qt.CheckState.Unchecked)
+            self.division_list.addItem(item)
+        division_layout.addWidget(self.division_list)
+        division_buttons = QHBoxLayout()
+        all_button = QPushButton("All")
+        all_button.clicked.connect(lambda: self.check_all_divisions(Qt.CheckState.Checked))
+        none_button = QPushButton("None")
+        none_button.clicked.connect(lambda: self.check_all_divisions(Qt.CheckState.Unchecked))
+        division_buttons.addWidget(all_button)
+        division_buttons.addWidget(none_button)
+        division_layout.addLayout(division_buttons)
+        division_group.setLayout(division_layout)
+        matrix_layout.addWidget(division_group)
+
+        # Genders
+        gender_group = QGroupBox("Genders")
+        gender_layout = QVBoxLayout()
+        self.gender_checkboxes = {}
+        for name in GENDERS:
+            checkbox = QCheckBox(name)
+            checkbox.setChecked(name == gender)
+            checkbox.toggled.connect(self.update_summary)
+            gender_layout.addWidget(checkbox)
+            self.gender_checkboxes[name] = checkbox
+        gender_layout.addStretch()
+        gender_group.setLayout(gender_layout)
+        matrix_layout.addWidget(gender_group)
+
+        # Events, grouped by type; checking a group checks all of its events
+        event_group = QGroupBox("Events")
+        event_layout = QVBoxLayout()
+        self.event_tree = QTreeWidget()
+        self.event_tree.setHeaderHidden(True)
+        self.event_items = {}  # event_name -> QTreeWidgetItem
+        catalog = get_event_catalog(json_file_path)
+        if catalog.error:
+            QMessageBox.critical(self, "Event Catalog Error", f"Failed to load the event catalog:\n{catalog.error}")
+        selected_events = set(selected_events)
+        for title, event_type in EVENT_GROUPS:
+            group_item = QTreeWidgetItem(self.event_tree, [title])
+            group_item.setFlags(group_item.flags() | Qt.ItemFlag.ItemIsUserCheckable | Qt.ItemFlag.ItemIsAutoTristate)
+            for event_name in catalog.event_names(event_type):
+                item = QTreeWidgetItem(group_item, [event_name])
+                item.setFlags(item.flags() | Qt.ItemFlag.ItemIsUserCheckable)
+                item.setCheckState(0, Qt.CheckState.Checked if event_name in selected_events
+                                   else Qt.CheckState.Unchecked)
+                self.event_items[event_name] = item
+        event_layout.addWidget(self.event_tree)
+        event_group.setLayout(event_layout)
+        matrix_layout.addWidget(event_group, 2)
+
+        main_layout.addLayout(matrix_layout)
+
+        # Mode, summary and actions
+        actions_layout = QHBoxLayout()
+        self.mode_combo = QComboBox()
+        self.mode_combo.addItems([ADD_MODE, REPLACE_MODE])
+        self.summary_label = QLabel()
+        self.apply_button = QPushButton("Apply")
+        self.apply_button.clicked.connect(self.apply)
+        close_button = QPushButton("Close")
+        close_button.clicked.connect(self.reject)
+        actions_layout.addWidget(self.mode_combo)
+        actions_layout.addWidget(self.summary_label, 1)
+        actions_layout.addWidget(self.apply_button)
+        actions_layout.addWidget(close_button)
+        main_layout.addLayout(actions_layout)
+
+        self.setLayout(main_layout)
+
+        self.division_list.itemChanged.connect(self.update_summary)
+        self.event_tree.itemChanged.connect(self.update_summary)
+        self.update_summary()
+
+    def load_division_names(self):
+        try:
+            cursor = get_read_connection(self.db_file_path).cursor()
+            cursor.execute("SELECT division_name FROM divisions_age_group ORDER BY division_number ASC")
+            return [row[0] for row in cursor.fetchall()]
+        except sqlite3.Error as e:
+            QMessageBox.critical(self, "Database Error", f"Failed to load divisions:\n{e}")
+            return []
+
+    def check_all_divisions(self, state):
+        for row in range(self.division_list.count()):
+            self.division_list.item(row).setCheckState(state)
+
+    def selected_divisions(self):
+        return [self.division_list.item(row).text() for row in range(self.division_list.count())
+                if self.division_list.item(row).checkState() == Qt.CheckState.Checked]
+
+    def selected_genders(self):
+        return [name for name, checkbox in self.gender_checkboxes.items() if checkbox.isChecked()]
+
+    def selection(self):
+        """ {event_name: checked}; in add mode only the checked events, so nothing is removed. """
+        selection = {name: item.checkState(0) == Qt.CheckState.Checked for name, item in self.event_items.items()}
+        if self.mode_combo.currentText() == ADD_MODE:
+            selection = {name: True for name, checked in selection.items() if checked}
+        return selection
+
+    def update_summary(self):
+        events = sum(1 for item in self.event_items.values() if item.checkState(0) == Qt.CheckState.Checked)
+        divisions = len(self.selected_divisions())
+        genders = len(self.selected_genders())
+        self.summary_label.setText(f"{divisions} divisions x {genders} genders x {events} events "
+                                   f"= {divisions * genders * events} events")
+
+    def apply(self):
+        divisions = self.selected_divisions()
+        genders = self.selected_genders()
+        selection = self.selection()
+        if not divisions or not genders:
+            QMessageBox.warning(self, "Selection Error", "Please select at least one division and one gender.")
+            return
+        if self.mode_combo.currentText() == REPLACE_MODE:
+            reply = QMessageBox.question(
+                self, "Confirm Replace",
+                f"Unchecked events will be deleted from {len(divisions)} divisions and {len(genders)} genders. "
+                f"Continue?",
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+            )
+            if reply != QMessageBox.StandardButton.Yes:
+                return
+
+        conn = get_connection(self.db_file_path)
+        try:
+            added, removed = save_event_matrix(conn.cursor(), divisions, genders, selection)
+            conn.commit()
+        except sqlite3.Error as e:
+            conn.rollback()
+            QMessageBox.critical(self, "Database Error", f"Failed to save the events:\n{e}")
+            return
+        self.applied_pairs = [(division_name, gender) for division_name in divisions for gender in genders]
+        QMessageBox.information(self, "Success", f"Events saved: {added} added, {removed} removed.")
+        self.accept()
+
+
+def show_event_matrix(db_file_path, parent=None):
+    """ Open the event matrix as a modal dialog. """
+    dialog = EventMatrixDialog(db_file_path, parent=parent)
+    dialog.exec()
@@ -0,0 +1,114 @@
+import json
+
+from event_catalog import DEFAULT_CATALOG_PATH, get_event_catalog
+
+# Schedule position of each catalog event type: track events first, then field events
+EVENT_TYPE_ORDER = ("hurdles", "dash", "run", "walk", "relay", "jump", "throw", "multi")
+
+# Orderings offered for event numbering: label -> ORDER BY clause over the ranked events below.
+# ROWID keeps ties in the order the events were added.
+EVENT_ORDERINGS = {
+    "Entry Order": "row_id",
+    "Event Type, Division, Gender": "type_rank, catalog_rank, event_name, division_rank, gender_rank, row_id",
+    "Division, Gender, Event Type": "division_rank, gender_rank, type_rank, catalog_rank, event_name, row_id",
+    "Custom Order": "custom_rank, row_id",
+}
+DEFAULT_EVENT_ORDERING = "Entry Order"
+
+ORDERING_SETTING_NAME = 'event_ordering'  # settings row holding the chosen ordering label
+
+
+def load_catalog_ranks(json_file_path=DEFAULT_CATALOG_PATH):
+    """ Return [event_name, type_rank, catalog_rank] rows of the event catalog, as a JSON array. """
+    ranks = {}
+    for position, event in enumerate(get_event_catalog(json_file_path).events):
+        event_type = event.get("type")
+        type_rank = EVENT_TYPE_ORDER.index(event_type) if event_type in EVENT_TYPE_ORDER else len(EVENT_TYPE_ORDER)
+        ranks.setdefault(event["event_name"], [event["event_name"], type_rank, position])
+    return json.dumps(list(ranks.values()))
+
+
+def get_event_ordering(cursor):
+    """ The ordering label saved for this meet, or DEFAULT_EVENT_ORDERING. """
+    cursor.execute("SELECT setting_value FROM settings WHERE setting_name = ?", (ORDERING_SETTING_NAME,))
+    row = cursor.fetchone()
+    return row[0] if row and row[0] in EVENT_ORDERINGS else DEFAULT_EVENT_ORDERING
+
+
+def set_event_ordering(cursor, ordering):
+    """ Save the ordering used by every later renumber. The caller commits. """
+    if ordering not in EVENT_ORDERINGS:
+        raise ValueError(f"Unknown event ordering: {ordering}")
+    cursor.execute("""
+        INSERT INTO settings (setting_name, setting_value) VALUES (?, ?)
+        ON CONFLICT (setting_name) DO UPDATE SET setting_value = excluded.setting_value
+    """, (ORDERING_SETTING_NAME, ordering))
+
+
+def save_custom_order(cursor):
+    """
+    Save the current event numbering as the custom order, e.g. after events
+    were renumbered by hand to match the printed schedule. The caller commits.
+    """
+    cursor.execute("DELETE FROM event_order")
+    cursor.execute("""
+        INSERT INTO event_order (position, event_name, division_name, gender)
+        SELECT ROW_NUMBER() OVER (ORDER BY event_number IS NULL, event_number, ROWID),
+               event_name, division_name, gender
+        FROM events
+        WHERE event_name IS NOT NULL AND division_name IS NOT NULL AND gender IS NOT NULL
+        ON CONFLICT (event_name, division_name, gender) DO NOTHING
+    """)
+
+
+def renumber_events(cursor, ordering=None):
+    """
+    Renumber the 'event_number' column sequentially (1, 2, 3, ...) with a
+    single UPDATE driven by ROW_NUMBER(). The order is one of EVENT_ORDERINGS,
+    by default the ordering saved for the meet. Event types and catalog
+    positions are passed in as one JSON parameter; events missing from the
+    catalog, the divisions or the custom order sort after the known ones.
+    """
+    if ordering is None:
+        ordering = get_event_ordering(cursor)
+    cursor.execute(f"""
+        UPDATE events
+        SET event_number = numbered.row_number
+        FROM (
+            SELECT row_id, ROW_NUMBER() OVER (ORDER BY {EVENT_ORDERINGS[ordering]}) AS row_number
+            FROM (
+                SELECT events.ROWID AS row_id,
+                       events.event_name,
+                       COALESCE(catalog.type_rank, {len(EVENT_TYPE_ORDER) + 1}) AS type_rank,
+                       COALESCE(catalog.catalog_rank, 1000000) AS catalog_rank,
+                       COALESCE(divisions.division_rank, 1000000) AS division_rank,
+                       CASE
+                           WHEN lower(events.gender) IN ('f', 'female', 'girls', 'women') THEN 0
+                           WHEN lower(events.gender) IN ('m', 'male', 'boys', 'men') THEN 1
+                           ELSE 2
+                       END AS gender_rank,
+                       COALESCE(event_order.position, 1000000) AS custom_rank
+                FROM events
+                LEFT JOIN (
+                    SELECT json_extract(value, '$[0]') AS event_name,
+                           json_extract(value, '$[1]') AS type_rank,
+                           json_extract(value, '$[2]') AS catalog_rank
+                    FROM json_each(?)
+                ) AS catalog ON catalog.event_name = events.event_name
+                LEFT JOIN (
+                    SELECT division_name, MIN(division_number) AS division_rank
+                    FROM (
+                        SELECT division_name, division_number FROM divisions_age_group
+                        UNION ALL
+                        SELECT division_name, division_number FROM divisions_non_age_groups
+                    )
+                    GROUP BY division_name
+                ) AS divisions ON divisions.division_name = events.division_name
+                LEFT JOIN event_order
+                    ON event_order.event_name = events.event_name
+                   AND event_order.division_name = events.division_name
+                   AND event_order.gender = events.gender
+            )
+        ) AS numbered
+        WHERE events.ROWID = numbered.row_id
+    """, (load_catalog_ranks() if ordering != "Entry Order" else "[]",))
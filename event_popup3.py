@@ -1,11 +1,14 @@
 import sqlite3
-import json
 from PyQt6.QtGui import QIcon
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QVBoxLayout, QHBoxLayout, QLabel, QComboBox,
-    QCheckBox, QPushButton, QWidget, QGroupBox, QGridLayout, QSizePolicy
+    QCheckBox, QPushButton, QWidget, QGroupBox, QGridLayout, QSizePolicy, QDialog, QMessageBox
 )
 from PyQt6.QtCore import Qt
+from db_connection import get_connection, get_read_connection
+from event_catalog import get_event_catalog
+from event_matrix import EventMatrixDialog
+from event_store import load_event_selection, save_event_selection
 from resource_path import resource_path
 
 
@@ -47,7 +50,11 @@ class EventSelector(QMainWindow):
         dropdown_layout.addStretch()  # This pushes all elements to the left
         main_layout.addLayout(dropdown_layout)
 
-        # Event categories layout
+        # Event categories layout; the catalog is parsed once and shared, each group only looks up its type
+        self.catalog = get_event_catalog(self.json_file_path)
+        if self.catalog.error:
+            QMessageBox.critical(self, "Event Catalog Error", f"Failed to load the event catalog:\n{self.catalog.error}")
+        self.checkboxes = {}  # event_name -> QCheckBox, filled by create_event_group
         self.event_layout = QVBoxLayout()
         self.event_groups = {
             "Run": self.create_event_group("Run", self.load_run_events()),
@@ -64,10 +71,15 @@ class EventSelector(QMainWindow):
 
         main_layout.addLayout(self.event_layout)
 
-        # Save button
+        # Save buttons
+        buttons_layout = QHBoxLayout()
         self.save_button = QPushButton("Save")
         self.save_button.clicked.connect(self.save_selection)
-        main_layout.addWidget(self.save_button)
+        self.matrix_button = QPushButton("Apply to Many Divisions...")
+        self.matrix_button.clicked.connect(self.open_event_matrix)
+        buttons_layout.addWidget(self.save_button)
+        buttons_layout.addWidget(self.matrix_button)
+        main_layout.addLayout(buttons_layout)
 
         # Set the main layout
         container = QWidget()
@@ -79,14 +91,13 @@ class EventSelector(QMainWindow):
 
     def populate_division_dropdown(self):
         try:
-            conn = sqlite3.connect(self.db_file_path)
+            conn = get_read_connection(self.db_file_path)
             cursor = conn.cursor()
             cursor.execute("SELECT division_name FROM divisions_age_group ORDER BY division_number ASC")
             divisions = cursor.fetchall()
             self.division_dropdown.clear()
             for division in divisions:
                 self.division_dropdown.addItem(division[0])
-            conn.close()
         except sqlite3.Error as e:
             print(f"Database error: {e}")
 
@@ -99,6 +110,7 @@ class EventSelector(QMainWindow):
             col = index % 6
             checkbox = QCheckBox(event)
             layout.addWidget(checkbox, row, col)
+            self.checkboxes[event] = checkbox
         group_box.setLayout(layout)
         return group_box
 
@@ -124,14 +136,7 @@ class EventSelector(QMainWindow):
         return self.load_events_by_type("multi")
 
     def load_events_by_type(self, event_type):
-        try:
-            with open(self.json_file_path, 'r') as file:
-                events = json.load(file)
-                filtered_events = [event['event_name'] for event in events if event['type'] == event_type]
-                return sorted(filtered_events)
-        except (FileNotFoundError, json.JSONDecodeError) as e:
-            print(f"Error loading or parsing JSON file: {e}")
-            return []
+        return self.catalog.event_names(event_type)
 
     def handle_division_gender_change(self):
         current_division = self.division_dropdown.currentText()
@@ -140,22 +145,13 @@ class EventSelector(QMainWindow):
 
         # Save current state
         if hasattr(self, 'previous_key'):
-            self.state_storage[self.previous_key] = {
-                checkbox.text(): checkbox.isChecked()
-                for group in self.event_groups.values()
-                for checkbox in group.findChildren(QCheckBox)
-            }
-
-        # Clear UI
-        for group in self.event_groups.values():
-            for checkbox in group.findChildren(QCheckBox):
-                checkbox.setChecked(False)
+            self.state_storage[self.previous_key] = self.current_selection()
 
-        # Restore state for the new selection
-        if key in self.state_storage:
-            for group in self.event_groups.values():
-                for checkbox in group.findChildren(QCheckBox):
-                    checkbox.setChecked(self.state_storage[key].get(checkbox.text(), False))
+        # Restore state for the new selection; a pair not edited yet shows what is saved,
+        # since unchecked events are deleted on save
+        if key not in self.state_storage:
+            self.state_storage[key] = self.load_saved_selection(current_division, current_gender)
+        self.show_selection(self.state_storage[key])
 
         self.previous_key = key
 
@@ -164,78 +160,63 @@ class EventSelector(QMainWindow):
         current_gender = self.gender_dropdown.currentText()
         key = (current_division, current_gender)
 
-        selected_events = {
-            checkbox.text(): checkbox.isChecked()
-            for group in self.event_groups.values()
-            for checkbox in group.findChildren(QCheckBox)
-        }
+        selected_events = self.current_selection()
 
         self.state_storage[key] = selected_events
 
         # Persist to database
-        self.save_to_database([(event, current_division, current_gender)
-                               for event, checked in selected_events.items() if checked])
+        self.save_to_database(current_division, current_gender, selected_events)
 
-    def save_to_database(self, events):
+    def current_selection(self):
+        """ {event_name: checked} of the checkboxes on screen. """
+        return {event: checkbox.isChecked() for event, checkbox in self.checkboxes.items()}
+
+    def show_selection(self, selection):
+        for event, checkbox in self.checkboxes.items():
+            checkbox.setChecked(selection.get(event, False))
+
+    def open_event_matrix(self):
         """
-        Saves the selected events into the database, ensuring event numbers are sequential.
-        Renumbers event numbers after any insert or update operation.
+        Apply the events on screen to many divisions and genders at once, then
+        show the saved events of every pair the matrix wrote.
         """
+        current_division = self.division_dropdown.currentText()
+        current_gender = self.gender_dropdown.currentText()
+        selected = [event for event, checked in self.current_selection().items() if checked]
+        dialog = EventMatrixDialog(self.db_file_path, self.json_file_path, selected, current_division,
+                                   current_gender, self)
+        if dialog.exec() != QDialog.DialogCode.Accepted:
+            return
+        for key in dialog.applied_pairs:
+            self.state_storage.pop(key, None)
+        if (current_division, current_gender) in dialog.applied_pairs:
+            self.state_storage[(current_division, current_gender)] = self.load_saved_selection(current_division,
+                                                                                                current_gender)
+            self.show_selection(self.state_storage[(current_division, current_gender)])
+
+    def load_saved_selection(self, division_name, gender):
+        """ {event_name: True} for the events saved for a division and gender. """
         try:
-            conn = sqlite3.connect(self.db_file_path)
-            cursor = conn.cursor()
-
-            # Insert or update events
-            for event in events:
-                # Check if the event already exists
-                cursor.execute("""
-                    SELECT event_number FROM events
-                    WHERE event_name = ? AND division_name = ? AND gender = ?
-                """, (event[0], event[1], event[2]))
-
-                result = cursor.fetchone()
-
-                if result is not None:
-                    # Update existing event
-                    cursor.execute("""
-                        UPDATE events
-                        SET gender = ?, division_name = ?, event_name = ?
-                        WHERE event_number = ?
-                    """, (event[2], event[1], event[0], result[0]))
-                else:
-                    # Insert new event
-                    seeding = "Not Seeded"
-                    cursor.execute("""
-                        INSERT INTO events (seeding, gender, division_name, event_name)
-                        VALUES (?, ?, ?, ?)
-                    """, (seeding, event[2], event[1], event[0]))
-
-            # Renumber event numbers sequentially
-            self.renumber_event_numbers(cursor)
-
-            conn.commit()
-            print("Events saved and renumbered successfully.")
+            cursor = get_read_connection(self.db_file_path).cursor()
+            return dict.fromkeys(load_event_selection(cursor, division_name, gender), True)
         except sqlite3.Error as e:
             print(f"Database error: {e}")
-        finally:
-            conn.close()
+            return {}
 
-    def renumber_event_numbers(self, cursor):
+    def save_to_database(self, division_name, gender, selection):
         """
-        Renumbers the 'event_number' column sequentially (1, 2, 3, ...) based on row order.
+        Saves the {event_name: checked} selection of one division and gender in a
+        single transaction: checked events are upserted, unchecked ones deleted,
+        and the events renumbered in the order chosen for the meet.
         """
+        conn = get_connection(self.db_file_path)
         try:
-            # Fetch all rows ordered by ROWID (default insertion order)
-            cursor.execute("SELECT ROWID, event_number FROM events ORDER BY ROWID")
-            rows = cursor.fetchall()
-
-            # Renumber event numbers
-            for index, (rowid, _) in enumerate(rows, start=1):
-                cursor.execute("UPDATE events SET event_number = ? WHERE ROWID = ?", (index, rowid))
-
-            print("Event numbers renumbered successfully.")
+            added, removed = save_event_selection(conn.cursor(), division_name, gender, selection)
+            conn.commit()
+            print(f"Events saved: {added} added, {removed} removed.")
         except sqlite3.Error as e:
-            print(f"Failed to renumber event numbers: {e}")
+            conn.rollback()
+            print(f"Database error: {e}")
 
 
 if __name__ == "__main__":
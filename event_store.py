@@ -0,0 +1,73 @@
+import json
+
+from event_ordering import renumber_events
+
+# Seeding of events added from a selection or an import
+DEFAULT_SEEDING = "Not Seeded"
+
+
+def add_events(cursor, events):
+    """
+    Add (event_name, division_name, gender) rows with one INSERT ... ON CONFLICT
+    statement. Events that already exist keep their number, rounds and lanes.
+    Returns the number of events added. The caller renumbers and commits.
+    """
+    if not events:
+        return 0
+    cursor.execute("""
+        INSERT INTO events (seeding, gender, division_name, event_name)
+        SELECT ?, json_extract(value, '$[2]'), json_extract(value, '$[1]'), json_extract(value, '$[0]')
+        FROM json_each(?)
+        WHERE true
+        ON CONFLICT (division_name, gender, event_name) DO NOTHING
+    """, (DEFAULT_SEEDING, json.dumps([list(event) for event in events])))
+    return cursor.rowcount
+
+
+def remove_events(cursor, events):
+    """ Delete (event_name, division_name, gender) rows with one statement. Returns the number deleted. """
+    if not events:
+        return 0
+    cursor.execute("""
+        DELETE FROM events
+        WHERE (event_name, division_name, gender) IN (
+            SELECT json_extract(value, '$[0]'), json_extract(value, '$[1]'), json_extract(value, '$[2]')
+            FROM json_each(?)
+        )
+    """, (json.dumps([list(event) for event in events]),))
+    return cursor.rowcount
+
+
+def load_event_selection(cursor, division_name, gender):
+    """ Names of the events saved for one division and gender. """
+    cursor.execute("SELECT event_name FROM events WHERE division_name = ? AND gender = ?", (division_name, gender))
+    return {row[0] for row in cursor.fetchall()}
+
+
+def save_event_selection(cursor, division_name, gender, selection):
+    """
+    Apply a {event_name: checked} selection of one division and gender: checked
+    events are added, unchecked ones deleted, and the events are renumbered.
+    Events missing from the selection are left alone. Returns (added, removed);
+    the caller commits, so the whole save is one transaction.
+    """
+    return save_event_matrix(cursor, [division_name], [gender], selection)
+
+
+def save_event_matrix(cursor, division_names, genders, selection):
+    """
+    Apply one {event_name: checked} selection to every division x gender pair
+    with a single add, a single delete and a single renumber, e.g. to set up
+    20 events for 10 divisions and 3 genders at once. Returns (added, removed);
+    the caller commits.
+    """
+    pairs = [(division_name, gender) for division_name in division_names for gender in genders]
+    added = add_events(cursor, [(event_name, division_name, gender)
+                                for division_name, gender in pairs
+                                for event_name, checked in selection.items() if checked])
+    removed = remove_events(cursor, [(event_name, division_name, gender)
+                                     for division_name, gender in pairs
+                                     for event_name, checked in selection.items() if not checked])
+    if added or removed:
+        renumber_events(cursor)
+    return added, removed
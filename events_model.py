@@ -0,0 +1,212 @@
+import sqlite3
+
+from PyQt6.QtCore import QAbstractTableModel, QModelIndex, QSortFilterProxyModel, Qt, pyqtSignal
+from PyQt6.QtGui import QIntValidator
+from PyQt6.QtWidgets import QStyledItemDelegate, QComboBox, QLineEdit
+
+from db_connection import get_connection, get_read_connection
+
+# Display headers and the events column behind each, in column order
+EVENT_COLUMNS = [
+    ("Evt #", "event_number"), ("Seeding", "seeding"), ("Gender", "gender"), ("Division Name", "division_name"),
+    ("Event Name", "event_name"), ("# of Rounds", "number_of_rounds"), ("Round Names", "round_names"),
+    ("Lanes/Pos", "number_of_lanes"), ("Advancement", "advancement"),
+]
+EVENT_NUMBER_COLUMN = 0
+GENDER_COLUMN = 2
+ROUNDS_COLUMN = 5
+ROUND_NAMES_COLUMN = 6
+LANES_COLUMN = 7
+ADVANCEMENT_COLUMN = 8
+EDITABLE_COLUMNS = (ROUNDS_COLUMN, LANES_COLUMN, ADVANCEMENT_COLUMN)
+NUMERIC_COLUMNS = (EVENT_NUMBER_COLUMN, ROUNDS_COLUMN, LANES_COLUMN)
+
+# Number of rounds -> round names stored with it
+ROUND_NAMES = {
+    "1": "Finals Only",
+    "2": "Prelims/Finals",
+    "3": "Prelims/Semi_Finals/Finals",
+    "4": "Prelims/Quarter/Semis/Finals",
+}
+ADVANCEMENT_OPTIONS = ["Time", "Place Then Time"]
+MAX_LANES = 99
+
+
+class EventsTableModel(QAbstractTableModel):
+    """
+    Editable events grid. Rows are plain lists keyed by the events ROWID.
+
+    An edit writes one UPDATE for its event and repaints only that row, and a
+    delete removes only its row, so the grid is never rebuilt for a change.
+    Database errors are reported through the error signal.
+    """
+
+    error = pyqtSignal(str)
+
+    def __init__(self, db_file_path, parent=None):
+        super().__init__(parent)
+        self.db_file_path = db_file_path
+        self.row_ids = []
+        self.rows = []
+
+    def load(self):
+        """ Read every event in schedule order with one query and reset the model. """
+        cursor = get_read_connection(self.db_file_path).cursor()
+        cursor.execute(f"""
+            SELECT ROWID, {', '.join(column for _, column in EVENT_COLUMNS)}
+            FROM events ORDER BY event_number IS NULL, event_number, ROWID
+        """)
+        rows = cursor.fetchall()
+        self.beginResetModel()
+        self.row_ids = [row[0] for row in rows]
+        self.rows = [list(row[1:]) for row in rows]
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(EVENT_COLUMNS)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        value = self.rows[index.row()][index.column()]
+        if role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole):
+            return "" if value is None else str(value)
+        if role == Qt.ItemDataRole.UserRole:
+            # Sort key: numeric columns sort as integers with blanks first, text case-insensitively
+            if index.column() in NUMERIC_COLUMNS:
+                try:
+                    return int(value)
+                except (TypeError, ValueError):
+                    return -1
+            return "" if value is None else str(value).lower()
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return EVENT_COLUMNS[section][0]
+        return None
+
+    def flags(self, index):
+        flags = super().flags(index)
+        if index.isValid() and index.column() in EDITABLE_COLUMNS:
+            flags |= Qt.ItemFlag.ItemIsEditable
+        return flags
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        if not index.isValid() or role != Qt.ItemDataRole.EditRole or index.column() not in EDITABLE_COLUMNS:
+            return False
+        column = index.column()
+        if column == ROUNDS_COLUMN:
+            if value not in ROUND_NAMES:
+                return False
+            changes = {ROUNDS_COLUMN: int(value), ROUND_NAMES_COLUMN: ROUND_NAMES[value]}
+        elif column == LANES_COLUMN:
+            if not str(value).isdigit():
+                return False
+            changes = {LANES_COLUMN: int(value)}
+        else:
+            if value not in ADVANCEMENT_OPTIONS:
+                return False
+            changes = {ADVANCEMENT_COLUMN: value}
+        return self.update_event(index.row(), changes)
+
+    def update_event(self, row, changes):
+        """ Write {column: value} changes of one event and repaint only its row. """
+        conn = get_connection(self.db_file_path)
+        try:
+            assignments = ", ".join(f"{EVENT_COLUMNS[column][1]} = ?" for column in changes)
+            conn.execute(f"UPDATE events SET {assignments} WHERE ROWID = ?",
+                         list(changes.values()) + [self.row_ids[row]])
+            conn.commit()
+        except sqlite3.Error as e:
+            conn.rollback()
+            self.error.emit(f"Failed to update the event:\n{e}")
+            return False
+        for column, value in changes.items():
+            self.rows[row][column] = value
+        self.dataChanged.emit(self.index(row, min(changes)), self.index(row, max(changes)))
+        return True
+
+    def remove_event(self, row):
+        """ Delete one event and remove only its row. Returns True on success. """
+        conn = get_connection(self.db_file_path)
+        try:
+            conn.execute("DELETE FROM events WHERE ROWID = ?", (self.row_ids[row],))
+            conn.commit()
+        except sqlite3.Error as e:
+            conn.rollback()
+            self.error.emit(f"Failed to delete event:\n{e}")
+            return False
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self.row_ids[row]
+        del self.rows[row]
+        self.endRemoveRows()
+        return True
+
+    def event_number(self, row):
+        return self.rows[row][EVENT_NUMBER_COLUMN]
+
+
+class EventsFilterProxyModel(QSortFilterProxyModel):
+    """ In-memory sorting and gender filtering on top of EventsTableModel. """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.gender = None  # None shows every gender
+        self.setSortRole(Qt.ItemDataRole.UserRole)
+
+    def set_gender_filter(self, gender):
+        self.gender = gender
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        return self.gender is None or self.sourceModel().rows[source_row][GENDER_COLUMN] == self.gender
+
+
+class ComboBoxDelegate(QStyledItemDelegate):
+    """ Edits a cell with a combo box of fixed options; the editor exists only while the cell is edited. """
+
+    def __init__(self, options, parent=None):
+        super().__init__(parent)
+        self.options = list(options)
+
+    def createEditor(self, parent, option, index):
+        editor = QComboBox(parent)
+        editor.addItems(self.options)
+        # Commit as soon as an option is picked, like the old per-row combo boxes did
+        editor.activated.connect(lambda: self.commit_and_close(editor))
+        return editor
+
+    def commit_and_close(self, editor):
+        self.commitData.emit(editor)
+        self.closeEditor.emit(editor)
+
+    def setEditorData(self, editor, index):
+        editor.setCurrentIndex(editor.findText(index.data(Qt.ItemDataRole.EditRole)))
+
+    def setModelData(self, editor, model, index):
+        if editor.currentIndex() >= 0:
+            model.setData(index, editor.currentText(), Qt.ItemDataRole.EditRole)
+
+
+class IntegerDelegate(QStyledItemDelegate):
+    """ Edits a cell with a line edit that only accepts whole numbers from 1 to maximum. """
+
+    def __init__(self, maximum, parent=None):
+        super().__init__(parent)
+        self.maximum = maximum
+
+    def createEditor(self, parent, option, index):
+        editor = QLineEdit(parent)
+        editor.setValidator(QIntValidator(1, self.maximum, editor))
+        return editor
+
+    def setEditorData(self, editor, index):
+        editor.setText(index.data(Qt.ItemDataRole.EditRole))
+
+    def setModelData(self, editor, model, index):
+        if editor.text():
+            model.setData(index, editor.text(), Qt.ItemDataRole.EditRole)
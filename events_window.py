@@ -1,10 +1,16 @@
 import sqlite3
 from PyQt6.QtWidgets import (
-    QVBoxLayout, QTableWidget, QGroupBox, QRadioButton, QHBoxLayout,
-    QPushButton, QHeaderView, QTableWidgetItem, QMessageBox, QDialog,QMainWindow
+    QVBoxLayout, QTableView, QGroupBox, QRadioButton, QHBoxLayout,
+    QPushButton, QHeaderView, QMessageBox, QDialog, QComboBox, QLabel
 )
 from PyQt6.QtGui import QIcon
 from PyQt6.QtCore import Qt
+from db_connection import get_connection, get_read_connection
+from event_ordering import EVENT_ORDERINGS, get_event_ordering, renumber_events, save_custom_order, set_event_ordering
+from events_model import (
+    ADVANCEMENT_COLUMN, ADVANCEMENT_OPTIONS, LANES_COLUMN, MAX_LANES, ROUND_NAMES, ROUNDS_COLUMN,
+    ComboBoxDelegate, EventsFilterProxyModel, EventsTableModel, IntegerDelegate
+)
 from resource_path import resource_path
 
 _events_window_instance = None  # Global reference to the EventsWindow instance
@@ -40,23 +46,29 @@ class EventsWindow(QDialog):
         gender_layout.addWidget(self.gender_female)
         gender_layout.addWidget(self.gender_mixed)
         gender_group.setLayout(gender_layout)
+        self.gender_all.setChecked(True)  # Default selection
 
         # Add filters to layout
         filters_layout.addWidget(gender_group)
         filters_group.setLayout(filters_layout)
         main_layout.addWidget(filters_group)
 
-        # Table Section
-        self.table = QTableWidget()
-        self.table.setColumnCount(7)
-        self.table.setHorizontalHeaderLabels([
-            "Evt #","Seeding","Gender","Division Name",
-            "Event Name", "Rnd", "Finals", "Lanes/Pos"
-        ])
+        # Table Section: a model with delegates, so editors only exist while a cell is edited
+        self.model = EventsTableModel(self.db_file_path, self)
+        self.model.error.connect(lambda message: QMessageBox.critical(self, "Database Error", message))
+        self.proxy_model = EventsFilterProxyModel(self)
+        self.proxy_model.setSourceModel(self.model)
+        self.table = QTableView()
+        self.table.setModel(self.proxy_model)
+        self.table.setItemDelegateForColumn(ROUNDS_COLUMN, ComboBoxDelegate(ROUND_NAMES, self.table))
+        self.table.setItemDelegateForColumn(LANES_COLUMN, IntegerDelegate(MAX_LANES, self.table))
+        self.table.setItemDelegateForColumn(ADVANCEMENT_COLUMN, ComboBoxDelegate(ADVANCEMENT_OPTIONS, self.table))
+        self.table.setEditTriggers(QTableView.EditTrigger.DoubleClicked | QTableView.EditTrigger.SelectedClicked
+                                   | QTableView.EditTrigger.EditKeyPressed)
         self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
         self.table.verticalHeader().setVisible(False)
-        self.table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
-        self.table.setSelectionMode(QTableWidget.SelectionMode.SingleSelection)
+        self.table.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
+        self.table.setSelectionMode(QTableView.SelectionMode.SingleSelection)
 
         main_layout.addWidget(self.table)
 
@@ -71,6 +83,21 @@ class EventsWindow(QDialog):
         buttons_group.setLayout(buttons_layout)
         main_layout.addWidget(buttons_group)
 
+        # Event numbering order
+        ordering_group = QGroupBox("Event Order")
+        ordering_layout = QHBoxLayout()
+        self.ordering_combo = QComboBox()
+        self.ordering_combo.addItems(EVENT_ORDERINGS)
+        self.ordering_combo.setCurrentText(get_event_ordering(get_read_connection(self.db_file_path).cursor()))
+        self.renumber_button = QPushButton("Renumber")
+        self.save_order_button = QPushButton("Save Current Order as Custom")
+        ordering_layout.addWidget(QLabel("Number events by:"))
+        ordering_layout.addWidget(self.ordering_combo)
+        ordering_layout.addWidget(self.renumber_button)
+        ordering_layout.addWidget(self.save_order_button)
+        ordering_group.setLayout(ordering_layout)
+        main_layout.addWidget(ordering_group)
+
         # Set Main Layout
         self.setLayout(main_layout)
 
@@ -79,35 +106,33 @@ class EventsWindow(QDialog):
 
         # Connect signals
         self.delete_button.clicked.connect(self.delete_selected_row)
+        for button in (self.gender_all, self.gender_male, self.gender_female, self.gender_mixed):
+            button.toggled.connect(self.filter_rows)
+        self.renumber_button.clicked.connect(self.renumber)
+        self.save_order_button.clicked.connect(self.save_custom_order)
 
     def load_events_data(self):
         try:
-            conn = sqlite3.connect(self.db_file_path)
-            cursor = conn.cursor()
-            cursor.execute("SELECT * FROM events")  # Load all events
-
-            rows = cursor.fetchall()
-            self.table.setRowCount(len(rows))
-            for row_idx, row_data in enumerate(rows):
-                for col_idx, col_data in enumerate(row_data):
-                    self.table.setItem(row_idx, col_idx, QTableWidgetItem(str(col_data)))
-            conn.close()
+            self.model.load()  # One query; edits and deletes afterwards only touch their own row
         except sqlite3.Error as e:
             QMessageBox.critical(self, "Database Error", f"Failed to load events data:\n{e}")
 
+    def filter_rows(self):
+        """ Show only the events of the selected gender. """
+        for button, gender in ((self.gender_male, "Male"), (self.gender_female, "Female"),
+                               (self.gender_mixed, "Mixed")):
+            if button.isChecked():
+                self.proxy_model.set_gender_filter(gender)
+                return
+        self.proxy_model.set_gender_filter(None)
+
     def delete_selected_row(self):
-        selected_row = self.table.currentRow()
-        if selected_row == -1:
+        selected = self.table.selectionModel().selectedRows()
+        if not selected:
             QMessageBox.warning(self, "Selection Error", "Please select a row to delete.")
             return
-
-        # Get the event number of the selected row
-        event_number_item = self.table.item(selected_row, 0)
-        if event_number_item is None:
-            QMessageBox.warning(self, "Error", "Failed to get selected row data.")
-            return
-
-        event_number = event_number_item.text()
+        row = self.proxy_model.mapToSource(selected[0]).row()
+        event_number = self.model.event_number(row)
 
         # Confirm deletion
         reply = QMessageBox.question(
@@ -118,20 +143,37 @@ class EventsWindow(QDialog):
         if reply != QMessageBox.StandardButton.Yes:
             return
 
-        # Delete the row from the database
+        # Removes only this row from the model; failures are reported through model.error
+        if self.model.remove_event(row):
+            QMessageBox.information(self, "Success", "Event deleted successfully.")
+
+    def renumber(self):
+        """ Save the chosen ordering and renumber every event with it. """
+        ordering = self.ordering_combo.currentText()
+        conn = get_connection(self.db_file_path)
         try:
-            conn = sqlite3.connect(self.db_file_path)
             cursor = conn.cursor()
-            cursor.execute("DELETE FROM events WHERE event_number = ?", (event_number,))
+            set_event_ordering(cursor, ordering)
+            renumber_events(cursor, ordering)
             conn.commit()
-            QMessageBox.information(self, "Success", "Event deleted successfully.")
-
-            # Reload the data to update the table
             self.load_events_data()
         except sqlite3.Error as e:
-            QMessageBox.critical(self, "Database Error", f"Failed to delete event:\n{e}")
-        finally:
-            conn.close()
+            conn.rollback()
+            QMessageBox.critical(self, "Database Error", f"Failed to renumber events:\n{e}")
+
+    def save_custom_order(self):
+        """ Keep the current numbering as the 'Custom Order' for later renumbers. """
+        conn = get_connection(self.db_file_path)
+        try:
+            cursor = conn.cursor()
+            save_custom_order(cursor)
+            set_event_ordering(cursor, "Custom Order")
+            conn.commit()
+            self.ordering_combo.setCurrentText("Custom Order")
+            QMessageBox.information(self, "Success", "The current event order was saved as the custom order.")
+        except sqlite3.Error as e:
+            conn.rollback()
+            QMessageBox.critical(self, "Database Error", f"Failed to save the event order:\n{e}")
 
 
 def show_event_window(db_file_path):
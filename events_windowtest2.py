@@ -7,6 +7,7 @@ from PyQt6.QtWidgets import (
 from PyQt6.QtGui import QIcon
 from PyQt6.QtCore import Qt
 from functools import partial
+from db_connection import get_connection, get_read_connection
 from resource_path import resource_path
 
 _events_window_instance = None  # Global reference to the EventsWindow instance
@@ -129,7 +130,7 @@ class EventsWindow(QMainWindow):
 
         event_id = self.table.item(row, 0).text()
         try:
-            with sqlite3.connect(self.db_file_path) as conn:
+            with get_connection(self.db_file_path) as conn:
                 cursor = conn.cursor()
                 cursor.execute("""
                     UPDATE events 
@@ -142,7 +143,7 @@ class EventsWindow(QMainWindow):
 
     def load_events_data(self):
         try:
-            with sqlite3.connect(self.db_file_path) as conn:
+            with get_read_connection(self.db_file_path) as conn:
                 cursor = conn.cursor()
                 cursor.execute("SELECT * FROM events")
                 rows = cursor.fetchall()
@@ -185,7 +186,7 @@ class EventsWindow(QMainWindow):
         rnd_names = rounds_mapping[selected_number]
         event_id = self.table.item(row_idx, 0).text()
         try:
-            with sqlite3.connect(self.db_file_path) as conn:
+            with get_connection(self.db_file_path) as conn:
                 cursor = conn.cursor()
                 cursor.execute("""
                     UPDATE events 
@@ -203,7 +204,7 @@ class EventsWindow(QMainWindow):
             return
         event_id = self.table.item(row_idx, 0).text()
         try:
-            with sqlite3.connect(self.db_file_path) as conn:
+            with get_connection(self.db_file_path) as conn:
                 cursor = conn.cursor()
                 cursor.execute("""
                     UPDATE events 
@@ -235,7 +236,7 @@ class EventsWindow(QMainWindow):
             return
 
         try:
-            with sqlite3.connect(self.db_file_path) as conn:
+            with get_connection(self.db_file_path) as conn:
                 cursor = conn.cursor()
                 cursor.execute("DELETE FROM events WHERE event_number = ?", (event_number,))
                 conn.commit()
@@ -0,0 +1,120 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+from bulk_import import RecordCollector, RecordWriter
+from db_connection import open_connection
+from import_hashes import file_fingerprint, is_file_imported, record_file_import
+from import_json import ImportJson
+from import_txt import ImportData
+from schema import migrate_database
+
+IMPORT_EXTENSIONS = ('.json', '.txt', '.csv')
+
+
+def parse_file(file_path, use_age_group_birthday):
+    """
+    Worker: parse one meet file into recorded writer calls.
+    Returns (file_path, calls, error); error is None when the file parsed.
+    """
+    collector = RecordCollector()
+    try:
+        if os.path.splitext(file_path)[1].lower() == '.json':
+            ImportJson(None).collect_records(file_path, collector, use_age_group_birthday)
+        else:
+            ImportData(None).collect_records(file_path, collector)
+    except Exception as e:
+        return file_path, [], str(e)
+    return file_path, collector.calls, None
+
+
+def list_import_files(folder_path):
+    """ Return the meet files directly inside the folder, in name order. """
+    return sorted(
+        os.path.join(folder_path, name) for name in os.listdir(folder_path)
+        if name.lower().endswith(IMPORT_EXTENSIONS) and os.path.isfile(os.path.join(folder_path, name))
+    )
+
+
+def import_folder(db_file_path, folder_path, use_age_group_birthday, max_workers=None, report=None, progress=None):
+    """
+    Import every meet file of a folder. Files are parsed in parallel by a
+    process pool; their records are then replayed file by file through one set
+    of bulk writers, so athletes and teams are de-duplicated across files, and
+    the whole folder is written in a single transaction. Files imported before
+    and unchanged since are skipped by their fingerprint. Totals, stage timings
+    and warnings of the whole folder are collected on report when one is given.
+    progress(files done, bytes done) is called as files are written; it may raise
+    ImportCancelled to roll the whole folder back.
+    Returns a list of (file name, counts, error), one per file.
+    """
+    files = list_import_files(folder_path)
+    if not files:
+        return []
+
+    conn = open_connection(db_file_path)
+    summaries = {}
+    try:
+        migrate_database(conn)
+        cursor = conn.cursor()
+
+        # Files already imported unchanged are neither parsed nor replayed
+        fingerprints = {file_path: file_fingerprint(file_path) for file_path in files}
+        changed = []
+        files_done = bytes_done = 0
+        for file_path in files:
+            if is_file_imported(cursor, fingerprints[file_path]):
+                summaries[file_path] = (os.path.basename(file_path), {"file_unchanged": 1}, None)
+                files_done += 1
+                bytes_done += os.path.getsize(file_path)
+            else:
+                changed.append(file_path)
+        if progress is not None:
+            progress(files_done, bytes_done)
+
+        json_importer = ImportJson(db_file_path)
+        writer = RecordWriter(cursor, lambda bulk, division: json_importer.import_division(
+            cursor, bulk, division, use_age_group_birthday), report)
+
+        with writer.report.stage("Parse files"):
+            if len(changed) <= 1 or max_workers == 1:
+                results = [parse_file(file_path, use_age_group_birthday) for file_path in changed]
+            else:
+                with ProcessPoolExecutor(max_workers=max_workers) as pool:
+                    results = list(pool.map(parse_file, changed, repeat(use_age_group_birthday)))
+
+        for file_path, calls, error in results:
+            name = os.path.basename(file_path)
+            if error is not None:
+                summaries[file_path] = (name, {}, error)
+                writer.report.warn(f"{name} could not be parsed: {error}")
+            else:
+                # Flushed per file so every count belongs to this file
+                summaries[file_path] = (name, writer.replay(calls), None)
+                record_file_import(cursor, file_path, fingerprints[file_path])
+            files_done += 1
+            bytes_done += os.path.getsize(file_path)
+            if progress is not None:
+                progress(files_done, bytes_done)
+
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    return [summaries[file_path] for file_path in files]
+
+
+def format_summaries(summaries):
+    """ One line per file for the import message box. """
+    lines = []
+    for name, counts, error in summaries:
+        if error is not None:
+            lines.append(f"{name}: failed to parse ({error})")
+        elif counts.get("file_unchanged"):
+            lines.append(f"{name}: unchanged since the last import")
+        else:
+            details = ", ".join(f"{key.replace('_', ' ')} {value}" for key, value in counts.items() if value)
+            lines.append(f"{name}: {details or 'nothing new'}")
+    return "\n".join(lines)
@@ -0,0 +1,396 @@
+from PyQt6.QtCore import QAbstractTableModel, QModelIndex, QSortFilterProxyModel, Qt
+from PyQt6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QComboBox, QPushButton, QTableView, QHeaderView, QMessageBox,
+    QApplication
+)
+
+from bulk_import import athlete_record_hash, bib_key, entry_record_hash
+from event_catalog import get_event_catalog
+from import_report import show_import_report
+
+# Kinds of change listed in the preview, in display order
+CHANGE_TYPES = [
+    "New team", "New athlete", "Membership update", "Bib dropped", "Skipped athlete", "New division",
+    "New entry", "Entry update", "Unresolved entry", "New relay", "Relay update", "New event"
+]
+# Records that match the database exactly are only counted, not listed
+UNCHANGED_TYPES = ["Unchanged athlete", "Unchanged entry", "Unchanged event", "Unchanged division"]
+# Listed change types that write nothing by themselves
+SKIPPED_TYPES = ("Bib dropped", "Skipped athlete", "Unresolved entry")
+CHANGESET_COLUMNS = ["Change", "Record", "Team", "Details"]
+
+
+def text(value):
+    """ Compare imported values with the TEXT columns they are stored in. """
+    return "" if value is None else str(value)
+
+
+def number(value):
+    """ Compare imported values with INTEGER columns, which store '01' as 1. """
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return text(value)
+
+
+def athlete_fields(last_name, first_name, middle_initials="", gender="", dob="", age=None,
+                   team_code="", team_name="", membership_number="", bib_number=None):
+    """ Bind recorded add_athlete arguments the way BulkImporter.add_athlete does. """
+    return last_name, first_name, middle_initials, gender, dob, team_code, team_name, membership_number, bib_number
+
+
+def entry_fields(last_name, first_name, team_code, event_code, seed_mark="", division_number="",
+                 division_name=""):
+    return last_name, first_name, team_code, event_code, seed_mark, division_number, division_name
+
+
+def relay_fields(team_code, team_name, event_code, seed_mark="", division_number="", participants=(), gender=""):
+    return team_code, team_name, event_code, seed_mark, division_number, participants, gender
+
+
+class Changeset:
+    """
+    What an import would change, computed without writing anything.
+
+    rows holds one (change, record, team, details) tuple per listed change;
+    counts holds the number of records of every change type, including the
+    unchanged ones. calls are the recorded writer calls that apply it.
+    file_unchanged is set, with no calls, when the file's fingerprint shows it
+    was imported before and its data was not deleted since.
+    """
+
+    def __init__(self, file_path, calls, use_age_group_birthday, fingerprint=None, file_unchanged=False):
+        self.file_path = file_path
+        self.calls = calls
+        self.use_age_group_birthday = use_age_group_birthday
+        self.fingerprint = fingerprint
+        self.file_unchanged = file_unchanged
+        self.rows = []
+        self.counts = dict.fromkeys(CHANGE_TYPES + UNCHANGED_TYPES, 0)
+
+    def add(self, change, record, team="", details=""):
+        self.rows.append((change, record, team, details))
+        self.counts[change] += 1
+
+    def is_empty(self):
+        return not any(self.counts[change] for change in CHANGE_TYPES if change not in SKIPPED_TYPES)
+
+    def summary(self):
+        if self.file_unchanged:
+            return "Unchanged since the last import"
+        return ", ".join(f"{change}: {count}" for change, count in self.counts.items() if count) or "No changes"
+
+
+class ChangesetBuilder:
+    """
+    Hash-joins recorded writer calls against the current tables.
+
+    The team, athlete, bib, entry, relay, event and division keys are loaded
+    once into dictionaries and every record is resolved in memory with the same
+    rules the bulk writers apply, including the content hashes that let them skip
+    unchanged records, so the preview matches what the import writes.
+    """
+
+    def __init__(self, cursor, use_age_group_birthday, event_names=None):
+        self.cursor = cursor
+        self.use_age_group_birthday = use_age_group_birthday
+        self.event_names = event_names if event_names is not None else get_event_catalog().name_index()
+        self.load_existing()
+
+    def load_existing(self):
+        cursor = self.cursor
+        cursor.execute("SELECT team_code, team_name FROM teams")
+        self.teams = dict(cursor.fetchall())
+
+        self.athletes = {}  # (last_name, first_name, team_code) -> (athletes.id, membership_number)
+        self.athlete_dobs = set()  # (last_name, first_name, dob, team_code) of stored athletes
+        self.bib_numbers = set()
+        cursor.execute("SELECT id, last_name, first_name, dob, team_code, membership_number, bib_number FROM athletes")
+        for athlete_id, last_name, first_name, dob, team_code, membership_number, bib_number in cursor.fetchall():
+            self.athletes.setdefault((last_name, first_name, team_code), (athlete_id, membership_number))
+            self.athlete_dobs.add((last_name, first_name, dob or "", team_code))
+            if bib_number is not None:
+                self.bib_numbers.add(bib_key(bib_number))
+        cursor.execute("SELECT import_hash FROM athletes WHERE import_hash IS NOT NULL")
+        self.athlete_hashes = {import_hash for import_hash, in cursor.fetchall()}
+
+        cursor.execute("SELECT athlete_id, event_code, seed_mark, division_number, division_name FROM entries")
+        self.entries = {(row[0], row[1]): tuple(text(value) for value in row[2:]) for row in cursor.fetchall()}
+        # As in EntryBulkImporter, only entries of athletes that still exist count
+        cursor.execute("""
+            SELECT entries.import_hash FROM entries JOIN athletes ON athletes.id = entries.athlete_id
+            WHERE entries.import_hash IS NOT NULL
+        """)
+        self.entry_hashes = {import_hash for import_hash, in cursor.fetchall()}
+
+        cursor.execute("SELECT team_code, event_code, division_number, gender FROM relay_teams")
+        self.relays = set(cursor.fetchall())
+
+        cursor.execute("SELECT event_name, division_name, gender FROM events")
+        self.events = set(cursor.fetchall())
+
+        if self.use_age_group_birthday:
+            cursor.execute("SELECT division_number, division_name, from_age, to_age FROM divisions_age_group")
+        else:
+            cursor.execute("SELECT division_number, division_name FROM divisions_non_age_groups")
+        self.divisions = {(number(row[0]), text(row[1])) + tuple(number(age) for age in row[2:])
+                          for row in cursor.fetchall()}
+
+    def build(self, file_path, calls, fingerprint=None):
+        """ Return the Changeset of one file's recorded calls. """
+        changeset = Changeset(file_path, calls, self.use_age_group_birthday, fingerprint)
+        entries = []
+        relays = {}  # relay key -> participants, merged like RelayBulkImporter does
+        for method, args, kwargs in calls:
+            if method == "add_team":
+                self.add_team(changeset, *args, **kwargs)
+            elif method == "add_athlete":
+                self.add_athlete(changeset, *athlete_fields(*args, **kwargs))
+            elif method == "add_entry":
+                self.queue_entry(changeset, entries, *entry_fields(*args, **kwargs))
+            elif method == "add_relay":
+                team_code, team_name, event_code, seed_mark, division_number, participants, gender = relay_fields(
+                    *args, **kwargs)
+                if team_code and event_code:
+                    self.add_team(changeset, team_code, team_name)
+                    relay = relays.setdefault((team_code, event_code, text(division_number), text(gender)), [])
+                    relay.extend(participants)
+            elif method == "add_meet_event":
+                self.add_meet_event(changeset, *args, **kwargs)
+            elif method == "add_division":
+                self.add_division(changeset, *args)
+
+        # Entries and relay legs resolve against every athlete of the file, as the writers flush athletes first
+        for entry in entries:
+            self.add_entry(changeset, *entry)
+        for key, participants in relays.items():
+            self.add_relay(changeset, key, participants)
+        return changeset
+
+    def add_team(self, changeset, team_code, team_name):
+        if team_code in self.teams:
+            return
+        self.teams[team_code] = team_name
+        changeset.add("New team", team_name, team_code)
+
+    def add_athlete(self, changeset, last_name, first_name, middle_initials, gender, dob, team_code, team_name,
+                    membership_number, bib_number):
+        record = f"{last_name or ''}, {first_name or ''}"
+        if not last_name or not first_name:
+            changeset.add("Skipped athlete", record, team_code, "Missing first or last name")
+            return
+        import_hash = athlete_record_hash(last_name, first_name, middle_initials, gender, dob, team_code, team_name,
+                                          membership_number, bib_number)
+        if import_hash in self.athlete_hashes:
+            changeset.counts["Unchanged athlete"] += 1
+            return
+        self.athlete_hashes.add(import_hash)
+
+        self.add_team(changeset, team_code, team_name)
+
+        key = (last_name, first_name, team_code)
+        if key not in self.athletes:
+            details = f"DOB {dob}" if dob else ""
+            bib_number = bib_key(bib_number)
+            if bib_number is not None:
+                if bib_number in self.bib_numbers:
+                    changeset.add("Bib dropped", record, team_code, f"Bib {bib_number} already belongs to another athlete")
+                else:
+                    self.bib_numbers.add(bib_number)
+                    details = f"{details}, bib {bib_number}" if details else f"Bib {bib_number}"
+            self.athletes[key] = (None, membership_number)
+            self.athlete_dobs.add((last_name, first_name, dob or "", team_code))
+            changeset.add("New athlete", record, team_code, details)
+            return
+
+        athlete_id, existing_membership_number = self.athletes[key]
+        if membership_number and existing_membership_number != membership_number:
+            self.athletes[key] = (athlete_id, membership_number)
+            if athlete_id is None:
+                return  # Added earlier in this file; the new row is written with this number
+            changeset.add("Membership update", record, team_code,
+                          f"{existing_membership_number or '(none)'} -> {membership_number}")
+        else:
+            changeset.counts["Unchanged athlete"] += 1
+
+    def queue_entry(self, changeset, entries, last_name, first_name, team_code, event_code, seed_mark,
+                    division_number, division_name):
+        """ Skip an entry imported unchanged before, like EntryBulkImporter; resolve the rest after the athletes. """
+        if event_code:
+            import_hash = entry_record_hash(last_name, first_name, team_code, event_code, seed_mark,
+                                            division_number, division_name)
+            if import_hash in self.entry_hashes:
+                changeset.counts["Unchanged entry"] += 1
+                return
+            self.entry_hashes.add(import_hash)
+        entries.append(((last_name, first_name, team_code), event_code, seed_mark, division_number, division_name))
+
+    def add_entry(self, changeset, key, event_code, seed_mark, division_number, division_name):
+        record = f"{key[0] or ''}, {key[1] or ''}"
+        if not event_code or key not in self.athletes:
+            changeset.add("Unresolved entry", record, key[2], f"Event {event_code or '(none)'}: athlete not found")
+            return
+
+        athlete_id = self.athletes[key][0]
+        incoming = (text(seed_mark), text(division_number), text(division_name))
+        existing = self.entries.get((athlete_id, event_code)) if athlete_id is not None else None
+        if existing is None:
+            changeset.add("New entry", record, key[2], f"Event {event_code}, seed {seed_mark or '-'}")
+        elif existing != incoming:
+            changeset.add("Entry update", record, key[2], f"Event {event_code}, seed {existing[0] or '-'} -> {seed_mark or '-'}")
+        else:
+            changeset.counts["Unchanged entry"] += 1
+            return
+        if athlete_id is not None:
+            self.entries[(athlete_id, event_code)] = incoming
+
+    def add_relay(self, changeset, key, participants):
+        team_code, event_code, division_number, gender = key
+        legs = {(participant.get("lastname"), participant.get("firstname"), participant.get("birthdate", ""))
+                for participant in participants}
+        unresolved = sum(1 for last_name, first_name, dob in legs
+                         if (last_name, first_name, dob, team_code) not in self.athlete_dobs
+                         and (last_name, first_name, team_code) not in self.athletes)
+        details = f"Event {event_code}, division {division_number or '-'}, {len(legs)} legs"
+        if unresolved:
+            details += f" ({unresolved} not found)"
+        if key in self.relays:
+            # Stored legs are replaced by the imported ones
+            changeset.add("Relay update", f"{event_code} {gender}".strip(), team_code, details)
+        else:
+            self.relays.add(key)
+            changeset.add("New relay", f"{event_code} {gender}".strip(), team_code, details)
+
+    def add_meet_event(self, changeset, event, division_name, gender):
+        if not event or not division_name or not gender:
+            return
+        event_name = self.event_names.get(event.strip().lower(), event.strip())
+        key = (event_name, division_name, gender)
+        if key in self.events:
+            changeset.counts["Unchanged event"] += 1
+            return
+        self.events.add(key)
+        changeset.add("New event", event_name, "", f"{division_name}, {gender}")
+
+    def add_division(self, changeset, division):
+        if self.use_age_group_birthday:
+            key = (number(division.get("division_number")), text(division.get("division_name", "")),
+                   number(division.get("from_age")), number(division.get("to_age")))
+            details = f"Number {key[0]}, ages {key[2]}-{key[3]}"
+        else:
+            key = (number(division.get("division_number")), text(division.get("division_name", "")))
+            details = f"Number {key[0]}"
+        if key in self.divisions:
+            changeset.counts["Unchanged division"] += 1
+            return
+        self.divisions.add(key)
+        changeset.add("New division", key[1], "", details)
+
+
+def build_changeset(cursor, file_path, calls, use_age_group_birthday, event_names=None, fingerprint=None):
+    """ Compute what replaying the recorded calls would change, without writing. """
+    return ChangesetBuilder(cursor, use_age_group_birthday, event_names).build(file_path, calls, fingerprint)
+
+
+class ChangesetTableModel(QAbstractTableModel):
+    """ Read-only view of Changeset.rows; the view only asks for the cells it paints. """
+
+    def __init__(self, rows, parent=None):
+        super().__init__(parent)
+        self.rows = rows
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(CHANGESET_COLUMNS)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or role != Qt.ItemDataRole.DisplayRole:
+            return None
+        value = self.rows[index.row()][index.column()]
+        return "" if value is None else str(value)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return CHANGESET_COLUMNS[section]
+        return None
+
+
+class ChangesetFilterProxyModel(QSortFilterProxyModel):
+    """ Sorting and change type filtering on top of ChangesetTableModel. """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.change = None  # None shows every change type
+
+    def set_change_filter(self, change):
+        self.change = change
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        return self.change is None or self.sourceModel().rows[source_row][0] == self.change
+
+
+class ChangesetPreviewDialog(QDialog):
+    """
+    Lists the changes of a dry-run import. Apply writes the changeset in one
+    transaction through apply_changeset(changeset), which returns the ImportReport.
+    """
+
+    def __init__(self, changeset, apply_changeset, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Import Preview")
+        self.setGeometry(150, 150, 900, 600)
+        self.changeset = changeset
+        self.apply_changeset = apply_changeset
+        self.report = None
+
+        layout = QVBoxLayout(self)
+        summary_label = QLabel(changeset.summary(), self)
+        summary_label.setWordWrap(True)
+        layout.addWidget(summary_label)
+
+        self.change_combo = QComboBox(self)
+        self.change_combo.addItem("All Changes")
+        self.change_combo.addItems([change for change in CHANGE_TYPES if changeset.counts[change]])
+        self.change_combo.currentTextChanged.connect(self.filter_changes)
+        layout.addWidget(self.change_combo)
+
+        self.model = ChangesetTableModel(changeset.rows, self)
+        self.proxy_model = ChangesetFilterProxyModel(self)
+        self.proxy_model.setSourceModel(self.model)
+        self.table = QTableView(self)
+        self.table.setModel(self.proxy_model)
+        self.table.setSortingEnabled(True)
+        self.table.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Interactive)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        layout.addWidget(self.table)
+
+        btn_layout = QHBoxLayout()
+        self.apply_btn = QPushButton("Apply Changes")
+        self.apply_btn.clicked.connect(self.apply)
+        self.apply_btn.setEnabled(not changeset.is_empty())
+        self.cancel_btn = QPushButton("Cancel")
+        self.cancel_btn.clicked.connect(self.reject)
+        btn_layout.addWidget(self.apply_btn)
+        btn_layout.addWidget(self.cancel_btn)
+        layout.addLayout(btn_layout)
+
+    def filter_changes(self, change):
+        self.proxy_model.set_change_filter(None if change == "All Changes" else change)
+
+    def apply(self):
+        try:
+            QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
+            try:
+                self.report = self.apply_changeset(self.changeset)
+            finally:
+                QApplication.restoreOverrideCursor()
+        except Exception as e:
+            QMessageBox.critical(self, "Import Error", f"Failed to apply the changes: {e}")
+            return
+        show_import_report(self, self.report, message="Changes applied successfully.")
+        self.accept()
@@ -0,0 +1,37 @@
+import hashlib
+import os
+from datetime import datetime
+
+# Tables whose rows come from meet files. Deleting any of them forgets the
+# imported file fingerprints, so the next import of a file runs in full again.
+IMPORTED_TABLES = ('teams', 'athletes', 'entries', 'relay_teams', 'events', 'divisions_age_group',
+                   'divisions_non_age_groups')
+
+
+def record_hash(*values):
+    """ 64-bit content hash of one import record, stored in an INTEGER column. """
+    digest = hashlib.blake2b(repr(values).encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big', signed=True)
+
+
+def file_fingerprint(file_path):
+    """ Content hash of a whole meet file. """
+    digest = hashlib.blake2b(digest_size=16)
+    with open(file_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def is_file_imported(cursor, fingerprint):
+    """ True when a file with this content was imported and none of its data was deleted since. """
+    cursor.execute("SELECT 1 FROM import_files WHERE fingerprint = ?", (fingerprint,))
+    return cursor.fetchone() is not None
+
+
+def record_file_import(cursor, file_path, fingerprint):
+    """ Remember an imported file; the caller commits together with the imported rows. """
+    cursor.execute("""
+        INSERT INTO import_files (fingerprint, file_name, imported_at) VALUES (?, ?, ?)
+        ON CONFLICT (fingerprint) DO UPDATE SET file_name = excluded.file_name, imported_at = excluded.imported_at
+    """, (fingerprint, os.path.basename(file_path), datetime.now().isoformat(timespec='seconds')))
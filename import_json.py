@@ -1,8 +1,22 @@
 import sqlite3
-import json
 from PyQt6.QtWidgets import QFileDialog, QMessageBox, QApplication
 import sys
-from datetime import datetime
+
+from bulk_import import (
+    PROGRESS_INTERVAL, BulkImporter, EntryBulkImporter, MeetEventBulkImporter, RecordCollector, RecordWriter,
+    RelayBulkImporter
+)
+from db_connection import open_connection
+from import_changeset import Changeset, build_changeset
+from import_hashes import file_fingerprint, is_file_imported, record_file_import
+from import_report import ImportReport
+from json_stream import JsonArrayStream, iter_json_sections
+from schema import migrate_database
+
+
+def team_code_of(team):
+    """ Team code of a 'team' object. Registration exports such as entries.json carry it as 'hytek_code'. """
+    return team.get("team_code") or team.get("hytek_code", "")
 
 
 class ImportJson:
@@ -10,9 +24,9 @@ class ImportJson:
         self.db_file_path = db_file_path
 
     def connect_db(self):
-        """ Connect to the SQLite database. """
+        """ Open a private connection to the SQLite database for this import. """
         try:
-            return sqlite3.connect(self.db_file_path)
+            return open_connection(self.db_file_path)
         except sqlite3.Error as e:
             print(f"Failed to connect to the database: {e}")
             sys.exit(1)
@@ -32,183 +46,210 @@ class ImportJson:
             QMessageBox.critical(None, "Database Error", f"Failed to fetch settings: {e}")
             return False
 
-    def import_file(self, file_path):
-        """ Import data from the .json file into the athletes, teams, and divisions tables. """
-        try:
+    def import_file_streaming(self, file_path, use_age_group_birthday=None, progress=None):
+        """
+        Import the .json file one record at a time instead of loading it whole.
+        Each element of the known sections is handed to its handler as soon as it
+        is parsed, so peak memory stays flat regardless of the file size.
+
+        progress(records, bytes_read) is called every PROGRESS_INTERVAL records; it
+        may raise ImportCancelled to roll the import back. A file imported before,
+        with none of its data deleted since, is skipped by its fingerprint. Pass
+        the meet setting in when importing off the GUI thread. Returns the
+        ImportReport; errors are re-raised.
+        """
+        if use_age_group_birthday is None:
             use_age_group_birthday = self.get_age_group_birthday_setting()
-            print(use_age_group_birthday)
-            with open(file_path, 'r', encoding='utf-8') as file:
-                data = json.load(file)
-                conn = self.connect_db()
-                cursor = conn.cursor()
-
-                # Import divisions data
-                divisions_data = data.get("divisions", [])
-                for division in divisions_data:
-                    self.insert_division_data(cursor, division,use_age_group_birthday)
-
-                # Import team and athlete data
-                athletes_data = data.get("athletes", [])
-                for athlete in athletes_data:
-                    team = athlete.get("team", {})
-                    dob = athlete.get("birthdate", "") if use_age_group_birthday else ""
-                    age = None
-
-                    # Calculate age if DOB is present and setting is True
-                    if dob and use_age_group_birthday:
-                        dob_date = datetime.strptime(dob, '%m/%d/%Y')  # Adjust format as needed
-                        today = datetime.today()
-                        age = today.year - dob_date.year - ((today.month, today.day) < (dob_date.month, dob_date.day))
-
-                    self.insert_team_data(cursor, team)  # Insert team data
-                    self.insert_or_update_athlete_data(cursor, athlete, team, dob, age)  # Insert athlete data with age
-
+        conn = self.connect_db()
+        try:
+            migrate_database(conn)
+            cursor = conn.cursor()
+            report = ImportReport(file_path)
+            fingerprint = file_fingerprint(file_path)
+            if is_file_imported(cursor, fingerprint):
+                report.count("file_unchanged")
+                return report
+            bulk = BulkImporter(cursor, report)
+            entries = EntryBulkImporter(cursor, bulk)
+            relays = RelayBulkImporter(cursor, bulk)
+            meet_events = MeetEventBulkImporter(cursor, report=report)
+            handlers = self.get_section_handlers(cursor, bulk, entries, relays, meet_events, use_age_group_birthday)
+            records = 0
+
+            with report.stage("Read and queue records"), open(file_path, 'rb') as file:
+                stream = JsonArrayStream(file)
+                for section, record in stream.iter_sections():
+                    records += 1
+                    if progress is not None and records % PROGRESS_INTERVAL == 0:
+                        progress(records, stream.bytes_read)
+                    handler = handlers.get(section)
+                    if handler is None or not isinstance(record, dict):
+                        continue
+                    handler(record)
+                    report.count(section)
+                if progress is not None:
+                    progress(records, stream.bytes_read)
+
+            for stage, writer in (("Write athletes", bulk), ("Write entries", entries), ("Write relays", relays),
+                                  ("Write events", meet_events)):
+                with report.stage(stage):
+                    report.update(writer.flush())
+            with report.stage("Commit"):
+                record_file_import(cursor, file_path, fingerprint)
                 conn.commit()
-                conn.close()
-
-            print(f"Data from {file_path} imported successfully.")
         except Exception as e:
+            conn.rollback()
             print(f"Failed to import data: {e}")
+            raise
+        finally:
+            conn.close()
 
-    def insert_division_data(self, cursor, division, use_age_group_birthday):
-        """Insert division data into the divisions table, avoiding duplicates."""
-
+        report.log_summary()
+        return report
+
+    def collect_records(self, file_path, collector, use_age_group_birthday):
+        """ Parse the .json file into recorded writer calls on a RecordCollector, without opening the database. """
+        handlers = self.get_section_handlers(None, collector, collector, collector, collector, use_age_group_birthday)
+        handlers["divisions"] = collector.add_division  # Divisions are written when the calls are replayed
+        for section, record in iter_json_sections(file_path):
+            handler = handlers.get(section)
+            if handler is not None and isinstance(record, dict):
+                handler(record)
+        return collector
+
+    def dry_run(self, file_path, use_age_group_birthday=None):
+        """
+        Compute the Changeset the import of the .json file would write, without
+        writing anything. Pass it to apply_changeset to import it.
+        """
+        if use_age_group_birthday is None:
+            use_age_group_birthday = self.get_age_group_birthday_setting()
+        conn = self.connect_db()
         try:
-            print(use_age_group_birthday)
-            if not use_age_group_birthday:
-                # Non-age-group division data
-                division_number = division.get("division_number")
-                division_name = division.get("division_name", "")
-
-                # Check if the division already exists in divisions_non_age_groups
-                cursor.execute("""
-                    SELECT id FROM divisions_non_age_groups 
-                    WHERE division_number = ? AND division_name = ?
-                """, (division_number, division_name))
-                existing_division = cursor.fetchone()
-
-                if existing_division:
-                    print(
-                        f"Division {division_name} with number {division_number} already exists in non-age-groups. Skipping insert.")
-                else:
-                    # Insert into divisions_non_age_groups
-                    cursor.execute("""
-                        INSERT INTO divisions_non_age_groups (division_number, division_name)
-                        VALUES (?, ?)
-                    """, (division_number, division_name))
-                    print(f"Inserted new non-age-group division {division_name} with number {division_number}.")
-            else:
-                # Age-group division data
-                division_number = division.get("division_number")
-                division_name = division.get("division_name", "")
-                from_age = division.get("from_age")
-                to_age = division.get("to_age")
-
-                # Check if the division already exists in divisions_age_group
-                cursor.execute("""
-                    SELECT id FROM divisions_age_group 
-                    WHERE division_number = ? AND division_name = ? AND from_age = ? AND to_age = ?
-                """, (division_number, division_name, from_age, to_age))
-                existing_division = cursor.fetchone()
-
-                if existing_division:
-                    print(
-                        f"Division {division_name} with number {division_number} (ages {from_age}-{to_age}) already exists in age-groups. Skipping insert.")
-                else:
-                    # Insert into divisions_age_group
-                    cursor.execute("""
-                        INSERT INTO divisions_age_group (division_number, division_name, from_age, to_age)
-                        VALUES (?, ?, ?, ?)
-                    """, (division_number, division_name, from_age, to_age))
-                    print(
-                        f"Insertedddd new age-group division {division_name} with number {division_number} (ages {from_age}-{to_age}).")
+            migrate_database(conn)
+            cursor = conn.cursor()
+            # Same fingerprint check as import_file_streaming: an unchanged file is not parsed
+            fingerprint = file_fingerprint(file_path)
+            if is_file_imported(cursor, fingerprint):
+                return Changeset(file_path, [], use_age_group_birthday, fingerprint, file_unchanged=True)
+            calls = self.collect_records(file_path, RecordCollector(), use_age_group_birthday).calls
+            return build_changeset(cursor, file_path, calls, use_age_group_birthday, fingerprint=fingerprint)
+        finally:
+            conn.close()
 
-        except sqlite3.Error as e:
-            print(f"Failed to insert division data: {e}")
+    def apply_changeset(self, changeset):
+        """ Write a changeset computed by dry_run in one transaction. Returns the ImportReport. """
+        conn = self.connect_db()
+        try:
+            migrate_database(conn)
+            cursor = conn.cursor()
+            writer = RecordWriter(cursor, lambda bulk, division: self.import_division(
+                cursor, bulk, division, changeset.use_age_group_birthday), ImportReport(changeset.file_path))
+            writer.replay(changeset.calls)
+            if changeset.fingerprint:
+                record_file_import(cursor, changeset.file_path, changeset.fingerprint)
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            print(f"Failed to import data: {e}")
             raise
+        finally:
+            conn.close()
+        writer.report.log_summary()
+        return writer.report
+
+    def get_section_handlers(self, cursor, bulk, entries, relays, meet_events, use_age_group_birthday):
+        """ Map each top-level section of the meet file to the function that imports one of its records. """
+        return {
+            "divisions": lambda division: self.import_division(cursor, bulk, division, use_age_group_birthday),
+            "athletes": lambda athlete: self.import_athlete(bulk, athlete, use_age_group_birthday),
+            "event_entries": lambda entry: self.import_entry(entries, entry),
+            "relays": lambda relay: self.import_relay(relays, relay),
+            "meet_events": lambda meet_event: self.import_meet_event(meet_events, meet_event),
+        }
+
+    def import_division(self, cursor, bulk, division, use_age_group_birthday):
+        """ Insert one record of the 'divisions' section; athletes queued afterwards see the new age range. """
+        self.insert_division_data(cursor, division, use_age_group_birthday, bulk.report)
+        bulk.reload_age_context()
+
+    def import_athlete(self, bulk, athlete, use_age_group_birthday):
+        """ Queue the team and athlete described by one record of the 'athletes' section on the bulk importer. """
+        team = athlete.get("team", {})
+        # Age and division are computed by the bulk importer against the meet date
+        dob = athlete.get("birthdate", "") if use_age_group_birthday else ""
+
+        team_code = team_code_of(team)
+        team_name = team.get("organization_name", "")
+        bulk.add_team(team_code, team_name)
+
+        if "unattached" in team_name.lower():
+            team_name = "Unattached"
+        bulk.add_athlete(
+            athlete.get("lastname"), athlete.get("firstname"), athlete.get("middlename", ""),
+            athlete.get("gender", ""), dob, None, team_code, team_name, athlete.get("membership", "")
+        )
+
+    def import_entry(self, entries, entry):
+        """ Queue one record of the 'event_entries' section on the entry importer. """
+        athlete = entry.get("athlete", {})
+        team = athlete.get("team", {})
+        event = athlete.get("event", {})
+        division = athlete.get("division", {})
+        entries.add_entry(
+            athlete.get("lastname"), athlete.get("firstname"), team_code_of(team),
+            event.get("event_code"), event.get("mark", ""), division.get("number", ""), division.get("name", "")
+        )
+
+    def import_relay(self, relays, relay):
+        """ Queue one record of the 'relays' section on the relay importer. """
+        team = relay.get("team", {})
+        relays.add_relay(
+            team_code_of(team), team.get("organization_name", ""), relay.get("event_code"), relay.get("mark", ""),
+            relay.get("division_number", ""), relay.get("participants", []), relay.get("gender", "")
+        )
+
+    def import_meet_event(self, meet_events, meet_event):
+        """ Queue one record of the 'meet_events' section on the events importer. """
+        meet_events.add_meet_event(meet_event.get("event"), meet_event.get("division"), meet_event.get("gender"))
+
+    def insert_division_data(self, cursor, division, use_age_group_birthday, report=None):
+        """Insert division data into the divisions table, avoiding duplicates."""
+        division_number = division.get("division_number")
+        division_name = division.get("division_name", "")
 
-    def insert_or_update_athlete_data(self, cursor, athlete, team, dob="", age=None):
-        """ Insert athlete data into the athletes table, or update if it exists. """
-        try:
-            # Extracting athlete-related data from the JSON object
-            last_name = athlete.get("lastname")
-            first_name = athlete.get("firstname")
-            middle_initials = athlete.get("middlename", "")
-            gender = athlete.get("gender", "")
-            team_code = team.get("team_code", "")
-            team_name = team.get("organization_name", "")
-            membership_number = athlete.get("membership", "")
-            bib_number = ""  # No bib_number in this JSON structure
-            if "unattached" in team_name.lower():
-                team_name = "Unattached"
-
-
-            # Skip if last_name or first_name is empty or None
-            if not last_name or not first_name:
-                print("Skipping athlete with missing first or last name.")
-                return
-
-            # Check if the team exists in the team table
-            cursor.execute("SELECT id FROM teams WHERE team_code = ?", (team_code,))
-            team_record = cursor.fetchone()
-
-            if team_record:
-                team_id = team_record[0]
-            else:
-                # If the team doesn't exist, insert it and get the new team_id
-                cursor.execute("INSERT INTO teams (team_name, team_code) VALUES (?, ?)", (team_name, team_code))
-                team_id = cursor.lastrowid
-
-            # Check if the athlete already exists
+        if not use_age_group_birthday:
+            # Non-age-group division data
             cursor.execute("""
-                SELECT id, membership_number FROM athletes WHERE last_name = ? AND first_name = ? AND team_code = ?
-            """, (last_name, first_name, team_code))
-            existing_athlete = cursor.fetchone()
-
-            if existing_athlete:
-                # Update membership number if necessary
-                existing_membership_number = existing_athlete[1]
-                if membership_number and (
-                        not existing_membership_number or existing_membership_number != membership_number):
-                    cursor.execute("""
-                        UPDATE athletes
-                        SET membership_number = ?
-                        WHERE last_name = ? AND first_name = ? AND team_code = ?
-                    """, (membership_number, last_name, first_name, team_code))
-                    print(f"Updated membership number for {first_name} {last_name}.")
-            else:
-                # Insert the athlete if they don't exist
-                cursor.execute("""
-                    INSERT INTO athletes (bib_number, last_name, first_name, middle_initials, gender, dob, age, team_code, team_name, membership_number)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (bib_number, last_name, first_name, middle_initials, gender, dob, age, team_code, team_name,
-                      membership_number))
-                print(f"Inserted new athlete {first_name} {last_name}.")
-
-        except sqlite3.Error as e:
-            print(f"Failed to insert or update athlete data: {e}")
-            raise
+                SELECT id FROM divisions_non_age_groups
+                WHERE division_number = ? AND division_name = ?
+            """, (division_number, division_name))
+            existing_division = cursor.fetchone()
 
-    def insert_team_data(self, cursor, team):
-        """ Insert team data into the teams table, avoiding duplicates. """
-        try:
-            team_code = team.get("team_code")
-            team_name = team.get("organization_name", "")
+            if not existing_division:
+                cursor.execute("""
+                    INSERT INTO divisions_non_age_groups (division_number, division_name)
+                    VALUES (?, ?)
+                """, (division_number, division_name))
+        else:
+            # Age-group division data
+            from_age = division.get("from_age")
+            to_age = division.get("to_age")
 
-            # Check if the team already exists
-            cursor.execute("SELECT id FROM teams WHERE team_code = ?", (team_code,))
-            existing_team = cursor.fetchone()
+            cursor.execute("""
+                SELECT id FROM divisions_age_group
+                WHERE division_number = ? AND division_name = ? AND from_age = ? AND to_age = ?
+            """, (division_number, division_name, from_age, to_age))
+            existing_division = cursor.fetchone()
 
-            if existing_team:
-                print(f"Team {team_name} with code {team_code} already exists. Skipping insert.")
-            else:
-                # Insert team into the team table
-                cursor.execute("INSERT INTO teams (team_name, team_code) VALUES (?, ?)", (team_name, team_code))
-                print(f"Inserted new team {team_name} with code {team_code}.")
+            if not existing_division:
+                cursor.execute("""
+                    INSERT INTO divisions_age_group (division_number, division_name, from_age, to_age)
+                    VALUES (?, ?, ?, ?)
+                """, (division_number, division_name, from_age, to_age))
 
-        except sqlite3.Error as e:
-            print(f"Failed to insert team data: {e}")
-            raise
+        if report is not None:
+            report.count("divisions_existing" if existing_division else "divisions_inserted")
 
 
 def run_import():
@@ -225,7 +266,7 @@ def run_import():
 
         if file_path:
             try:
-                import_data.import_file(file_path)
+                import_data.import_file_streaming(file_path)
                 QMessageBox.information(None, "Import", f"Data imported successfully from {file_path}")
             except Exception as e:
                 QMessageBox.critical(None, "Import Error", f"Failed to import data: {e}")
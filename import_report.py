@@ -0,0 +1,143 @@
+import json
+import logging
+import logging.handlers
+import os
+import time
+from contextlib import contextmanager
+
+from PyQt6.QtWidgets import QFileDialog, QMessageBox
+
+# Verbose import log; silent unless enable_verbose_log attached a handler
+logger = logging.getLogger("meet_import")
+logger.addHandler(logging.NullHandler())
+logger.propagate = False
+
+VERBOSE_LOG_CAPACITY = 1000  # Records buffered in memory between writes to the log file
+
+
+class ImportReport:
+    """
+    Outcome of one import, collected in memory while the import runs: counters,
+    the time spent in each stage, and the first MAX_WARNINGS warnings. Nothing
+    is printed per record; the report is shown or exported at the end.
+    """
+
+    MAX_WARNINGS = 100
+
+    def __init__(self, source=""):
+        self.source = source
+        self.counts = {}
+        self.timings = {}  # stage -> seconds, in the order the stages ran
+        self.warnings = []
+        self.warning_count = 0
+
+    def count(self, key, amount=1):
+        self.counts[key] = self.counts.get(key, 0) + amount
+
+    def update(self, counts):
+        """ Take over the running totals of a bulk writer. """
+        self.counts.update(counts)
+
+    @contextmanager
+    def stage(self, name):
+        """ Time a stage of the import; a stage entered again adds to its total. """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - started
+            logger.debug("%s: %s took %.3f s", self.source, name, self.timings[name])
+
+    def warn(self, message):
+        """ Record a skipped or partly imported record. Only the first MAX_WARNINGS are kept. """
+        self.warning_count += 1
+        if len(self.warnings) < self.MAX_WARNINGS:
+            self.warnings.append(message)
+        logger.warning("%s: %s", self.source, message)
+
+    def summary(self, include_warnings=True):
+        """ Human readable report for a message box or a text export. """
+        lines = [f"{key.replace('_', ' ')}: {value}" for key, value in self.counts.items()]
+        if self.timings:
+            lines.append("")
+            lines.extend(f"{stage}: {seconds:.2f} s" for stage, seconds in self.timings.items())
+        if self.warning_count and not include_warnings:
+            lines.append("")
+            lines.append(f"{self.warning_count} warnings, listed under Show Details.")
+        elif self.warning_count:
+            lines.append("")
+            lines.append(f"Warnings ({self.warning_count}):")
+            lines.extend(self.warnings)
+            if self.warning_count > len(self.warnings):
+                lines.append(f"... and {self.warning_count - len(self.warnings)} more")
+        return "\n".join(lines)
+
+    def as_dict(self):
+        return {
+            "source": self.source,
+            "counts": self.counts,
+            "timings": {stage: round(seconds, 3) for stage, seconds in self.timings.items()},
+            "warning_count": self.warning_count,
+            "warnings": self.warnings,
+        }
+
+    def export(self, file_path):
+        """ Write the report as JSON for a .json path, as plain text otherwise. """
+        with open(file_path, 'w', encoding='utf-8') as file:
+            if file_path.lower().endswith('.json'):
+                json.dump(self.as_dict(), file, indent=2)
+            else:
+                file.write(f"{self.source}\n\n{self.summary()}\n")
+
+    def log_summary(self):
+        logger.info("%s imported: %s", self.source, self.counts)
+
+
+def enable_verbose_log(log_path):
+    """
+    Write import warnings, stage timings and summaries to log_path. Records are
+    buffered in memory and written in blocks, so logging does not slow imports.
+    """
+    disable_verbose_log()
+    target = logging.FileHandler(log_path, encoding='utf-8')
+    target.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+    handler = logging.handlers.MemoryHandler(VERBOSE_LOG_CAPACITY, flushLevel=logging.ERROR, target=target)
+    logger.addHandler(handler)
+    logger.setLevel(logging.DEBUG)
+
+
+def disable_verbose_log():
+    """ Flush and detach the verbose log, if any. """
+    for handler in list(logger.handlers):
+        if isinstance(handler, logging.handlers.MemoryHandler):
+            target = handler.target
+            handler.close()  # Flushes the buffer to the file first
+            target.close()
+            logger.removeHandler(handler)
+    logger.setLevel(logging.WARNING)
+
+
+def flush_verbose_log():
+    """ Write the buffered records, e.g. once an import has finished. """
+    for handler in logger.handlers:
+        handler.flush()
+
+
+def show_import_report(parent, report, title="Import", message="Data imported successfully."):
+    """ Show a finished import's report, with the option to save it to a file. """
+    flush_verbose_log()
+    box = QMessageBox(QMessageBox.Icon.Information, title, f"{message}\n\n{report.summary(False)}", parent=parent)
+    if report.warning_count:
+        box.setDetailedText(report.summary())
+    box.addButton(QMessageBox.StandardButton.Ok)
+    save_btn = box.addButton("Save Report...", QMessageBox.ButtonRole.ActionRole)
+    box.exec()
+    if box.clickedButton() is save_btn:
+        default_name = os.path.splitext(os.path.basename(report.source))[0] + "_import_report.txt"
+        file_path, _ = QFileDialog.getSaveFileName(parent, "Save Import Report", default_name,
+                                                   "Text Files (*.txt);;JSON Files (*.json)")
+        if file_path:
+            try:
+                report.export(file_path)
+            except OSError as e:
+                QMessageBox.critical(parent, "Error", f"Failed to save the report: {e}")
@@ -3,121 +3,207 @@ import csv
 from PyQt6.QtWidgets import QFileDialog, QMessageBox, QApplication
 import sys
 
+from bulk_import import PROGRESS_INTERVAL, BulkImporter, EntryBulkImporter, RecordCollector, RecordWriter, RelayBulkImporter
+from db_connection import open_connection
+from import_changeset import Changeset, build_changeset
+from import_hashes import file_fingerprint, is_file_imported, record_file_import
+from import_report import ImportReport
+from schema import migrate_database
+
+# Field positions of the semicolon-delimited HyTek records, by record type (field 0 is the type).
+
+# I and D: individual athlete records
+ATHLETE_LAST_NAME = 1
+ATHLETE_FIRST_NAME = 2
+ATHLETE_MIDDLE_INITIALS = 3
+ATHLETE_GENDER = 4
+ATHLETE_DOB = 5
+ATHLETE_TEAM_CODE = 6
+ATHLETE_TEAM_NAME = 7
+ATHLETE_MEMBERSHIP_NUMBER = 21
+ATHLETE_BIB_NUMBER = 22
+
+# E: one individual event entry
+ENTRY_LAST_NAME = 1
+ENTRY_FIRST_NAME = 2
+ENTRY_TEAM_CODE = 3
+ENTRY_EVENT_CODE = 4
+ENTRY_SEED_MARK = 5
+ENTRY_DIVISION_NUMBER = 6
+ENTRY_DIVISION_NAME = 7
+
+# R: one relay team, followed by a (last name, first name, DOB) triple per leg
+RELAY_TEAM_CODE = 1
+RELAY_TEAM_NAME = 2
+RELAY_EVENT_CODE = 3
+RELAY_SEED_MARK = 4
+RELAY_DIVISION_NUMBER = 5
+RELAY_GENDER = 6
+RELAY_FIRST_LEG = 7
+RELAY_LEG_FIELDS = 3
+
+
+def field(row, index, default=""):
+    """ Return a stripped field, or the default when the record is shorter. """
+    return row[index].strip() if len(row) > index else default
+
 
 class ImportData:
     def __init__(self, db_file_path):
         self.db_file_path = db_file_path
 
     def connect_db(self):
-        """ Connect to the SQLite database. """
+        """ Open a private connection to the SQLite database for this import. """
         try:
-            return sqlite3.connect(self.db_file_path)
+            return open_connection(self.db_file_path)
         except sqlite3.Error as e:
             print(f"Failed to connect to the database: {e}")
             sys.exit(1)
 
-    def import_file(self, file_path):
-        """ Import data from the .txt or .csv file into the athletes and teams table. """
+    def import_file(self, file_path, progress=None):
+        """
+        Import a HyTek semicolon file in one streaming pass. Each record is handed
+        to the handler of its type and queued on the batched writers; the whole
+        file is written in a single transaction.
+
+        progress(records, bytes_read) is called every PROGRESS_INTERVAL records; it
+        may raise ImportCancelled to roll the import back. A file imported before,
+        with none of its data deleted since, is skipped by its fingerprint.
+        Returns the ImportReport; errors are re-raised.
+        """
+        conn = self.connect_db()
         try:
-            with open(file_path, newline='', encoding='utf-8') as file:
-                reader = csv.reader(file, delimiter=';')
-                conn = self.connect_db()
-                cursor = conn.cursor()
-
-                for row in reader:
-                    membership_number = row[21] if len(row) > 21 else ""  # Extract membership number if present
-
-                    if row[0] == "I":  # Data related to athletes (I records)
-                        self.insert_or_update_athlete_data(cursor, row, membership_number)
-                        self.insert_team_data(cursor, row)
-                    elif row[0] == "D":  # Data related to athletes (D records)
-                        self.insert_or_update_athlete_data(cursor, row,
-                                                           membership_number)  # Use same insert for D records
-                        self.insert_team_data(cursor, row)
-
+            migrate_database(conn)
+            cursor = conn.cursor()
+            report = ImportReport(file_path)
+            fingerprint = file_fingerprint(file_path)
+            if is_file_imported(cursor, fingerprint):
+                report.count("file_unchanged")
+                return report
+            bulk = BulkImporter(cursor, report)
+            entries = EntryBulkImporter(cursor, bulk)
+            relays = RelayBulkImporter(cursor, bulk)
+            handlers = self.get_record_handlers(bulk, entries, relays)
+            records = 0
+
+            with report.stage("Read and queue records"), open(file_path, newline='', encoding='utf-8') as file:
+                for row in csv.reader(file, delimiter=';'):
+                    records += 1
+                    if progress is not None and records % PROGRESS_INTERVAL == 0:
+                        progress(records, file.buffer.tell())  # Bytes handed to the text decoder so far
+                    handler = handlers.get(row[0].strip()) if row else None
+                    if handler is None:
+                        continue  # Header and unknown record types
+                    handler(row)
+                    report.count(row[0].strip())
+                if progress is not None:
+                    progress(records, file.buffer.tell())
+
+            for stage, writer in (("Write athletes", bulk), ("Write entries", entries), ("Write relays", relays)):
+                with report.stage(stage):
+                    report.update(writer.flush())
+            with report.stage("Commit"):
+                record_file_import(cursor, file_path, fingerprint)
                 conn.commit()
-                conn.close()
-
-            print(f"Data from {file_path} imported successfully.")
         except Exception as e:
+            conn.rollback()
             print(f"Failed to import data: {e}")
-
-    def insert_or_update_athlete_data(self, cursor, row, membership_number):
-        """ Insert athlete data into the athletes table, or update if it exists, including the membership number. """
-        try:
-            # Parsing athlete-related data from the row
-            last_name = row[1]
-            first_name = row[2]
-            middle_initials = row[3]
-            gender = row[4]
-            dob = row[5]
-            team_code = row[6]
-            team_name = row[7]
-            bib_number = row[22] if len(row) > 22 else ""  # Extract bib number if present
-
-            # Check if the team exists in the team table
-            cursor.execute("SELECT id FROM teams WHERE team_code = ?", (team_code,))
-            team = cursor.fetchone()
-
-            if team:
-                team_id = team[0]
-            else:
-                # Insert team if it doesn't exist
-                cursor.execute("INSERT INTO teams (team_name, team_code) VALUES (?, ?)", (team_name, team_code))
-                team_id = cursor.lastrowid
-
-            # Check if the athlete already exists (avoid duplicates)
-            cursor.execute("""
-                SELECT id, membership_number FROM athletes WHERE last_name = ? AND first_name = ? AND team_code = ?
-            """, (last_name, first_name, team_code))
-            athlete = cursor.fetchone()
-
-            if athlete:
-                # If athlete exists, update the membership number if it's not already there or needs updating
-                existing_membership_number = athlete[1]
-                if membership_number and (
-                        not existing_membership_number or existing_membership_number != membership_number):
-                    cursor.execute("""
-                        UPDATE athletes
-                        SET membership_number = ?
-                        WHERE last_name = ? AND first_name = ? AND team_code = ?
-                    """, (membership_number, last_name, first_name, team_code))
-                    print(f"Updated membership number for {first_name} {last_name}.")
-                else:
-                    print(f"Athlete {first_name} {last_name} already exists with membership number. Skipping update.")
-            else:
-                # Insert athlete into the athletes table if they don't exist
-                cursor.execute("""
-                    INSERT INTO athletes (bib_number, last_name, first_name, middle_initials, gender, dob, team_code, team_name, membership_number)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (bib_number, last_name, first_name, middle_initials, gender, dob, team_code, team_name,
-                      membership_number))
-                print(f"Inserted new athlete {first_name} {last_name}.")
-
-        except sqlite3.Error as e:
-            print(f"Failed to insert or update athlete data: {e}")
             raise
-
-    def insert_team_data(self, cursor, row):
-        """ Insert team data into the teams table, avoiding duplicates. """
+        finally:
+            conn.close()
+
+        report.log_summary()
+        return report
+
+    def collect_records(self, file_path, collector):
+        """ Parse the HyTek file into recorded writer calls on a RecordCollector, without opening the database. """
+        handlers = self.get_record_handlers(collector, collector, collector)
+        with open(file_path, newline='', encoding='utf-8') as file:
+            for row in csv.reader(file, delimiter=';'):
+                handler = handlers.get(row[0].strip()) if row else None
+                if handler is not None:
+                    handler(row)
+        return collector
+
+    def dry_run(self, file_path):
+        """
+        Compute the Changeset the import of the HyTek file would write, without
+        writing anything. Pass it to apply_changeset to import it.
+        """
+        conn = self.connect_db()
         try:
-            team_code = row[6]
-            team_name = row[7]
-
-            # Check if the team already exists (avoid duplicates)
-            cursor.execute("SELECT id FROM teams WHERE team_code = ?", (team_code,))
-            team = cursor.fetchone()
-
-            if team:
-                print(f"Team {team_name} with code {team_code} already exists. Skipping insert.")
-            else:
-                # Insert team into the team table
-                cursor.execute("INSERT INTO teams (team_name, team_code) VALUES (?, ?)", (team_name, team_code))
-                print(f"Inserted new team {team_name}.")
-
-        except sqlite3.Error as e:
-            print(f"Failed to insert team data: {e}")
+            migrate_database(conn)
+            cursor = conn.cursor()
+            # Same fingerprint check as import_file_streaming: an unchanged file is not parsed
+            fingerprint = file_fingerprint(file_path)
+            if is_file_imported(cursor, fingerprint):
+                return Changeset(file_path, [], False, fingerprint, file_unchanged=True)
+            calls = self.collect_records(file_path, RecordCollector()).calls
+            # HyTek files carry no division records, so the division setting is irrelevant here
+            return build_changeset(cursor, file_path, calls, False, fingerprint=fingerprint)
+        finally:
+            conn.close()
+
+    def apply_changeset(self, changeset):
+        """ Write a changeset computed by dry_run in one transaction. Returns the ImportReport. """
+        conn = self.connect_db()
+        try:
+            migrate_database(conn)
+            cursor = conn.cursor()
+            writer = RecordWriter(cursor, report=ImportReport(changeset.file_path))
+            writer.replay(changeset.calls)
+            if changeset.fingerprint:
+                record_file_import(cursor, changeset.file_path, changeset.fingerprint)
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            print(f"Failed to import data: {e}")
             raise
+        finally:
+            conn.close()
+        writer.report.log_summary()
+        return writer.report
+
+    def get_record_handlers(self, bulk, entries, relays):
+        """ Map each record type to the function that imports one record of it. """
+        return {
+            "I": lambda row: self.add_athlete_row(bulk, row),
+            "D": lambda row: self.add_athlete_row(bulk, row),
+            "E": lambda row: self.add_entry_row(entries, row),
+            "R": lambda row: self.add_relay_row(relays, row),
+        }
+
+    def add_athlete_row(self, bulk, row):
+        """ Queue the athlete and team of one I or D record on the bulk importer. """
+        bulk.add_athlete(
+            last_name=field(row, ATHLETE_LAST_NAME), first_name=field(row, ATHLETE_FIRST_NAME),
+            middle_initials=field(row, ATHLETE_MIDDLE_INITIALS), gender=field(row, ATHLETE_GENDER),
+            dob=field(row, ATHLETE_DOB), team_code=field(row, ATHLETE_TEAM_CODE),
+            team_name=field(row, ATHLETE_TEAM_NAME), membership_number=field(row, ATHLETE_MEMBERSHIP_NUMBER),
+            bib_number=field(row, ATHLETE_BIB_NUMBER) or None
+        )
+
+    def add_entry_row(self, entries, row):
+        """ Queue one E record on the entry importer. """
+        entries.add_entry(
+            field(row, ENTRY_LAST_NAME), field(row, ENTRY_FIRST_NAME), field(row, ENTRY_TEAM_CODE),
+            field(row, ENTRY_EVENT_CODE), field(row, ENTRY_SEED_MARK), field(row, ENTRY_DIVISION_NUMBER),
+            field(row, ENTRY_DIVISION_NAME)
+        )
+
+    def add_relay_row(self, relays, row):
+        """ Queue one R record on the relay importer; its legs become relay participants. """
+        participants = []
+        for start in range(RELAY_FIRST_LEG, len(row) - 1, RELAY_LEG_FIELDS):
+            last_name, first_name = field(row, start), field(row, start + 1)
+            if last_name and first_name:
+                participants.append({"lastname": last_name, "firstname": first_name,
+                                     "birthdate": field(row, start + 2)})
+        relays.add_relay(
+            field(row, RELAY_TEAM_CODE), field(row, RELAY_TEAM_NAME), field(row, RELAY_EVENT_CODE),
+            field(row, RELAY_SEED_MARK), field(row, RELAY_DIVISION_NUMBER), participants,
+            field(row, RELAY_GENDER)
+        )
 
 
 def run_import():
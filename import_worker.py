@@ -0,0 +1,133 @@
+import os
+
+from PyQt6.QtCore import QThread, pyqtSignal
+from PyQt6.QtWidgets import QDialog, QVBoxLayout, QLabel, QProgressBar, QPushButton, QMessageBox
+
+from bulk_import import ImportCancelled
+from folder_import import format_summaries, import_folder, list_import_files
+from import_json import ImportJson
+from import_report import ImportReport, show_import_report
+from import_txt import ImportData
+
+
+class ImportWorker(QThread):
+    """
+    Runs one file or folder import on its own thread. The importers open a
+    private connection there, and everything they need from the GUI side, such
+    as the meet settings, is passed in up front.
+    """
+
+    progress = pyqtSignal(int, int)  # records read (files done for a folder), bytes read
+    completed = pyqtSignal(object)  # ImportReport
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+    def __init__(self, db_file_path, file_path, use_age_group_birthday, parent=None):
+        super().__init__(parent)
+        self.db_file_path = db_file_path
+        self.file_path = file_path
+        self.use_age_group_birthday = use_age_group_birthday
+        self.cancel_requested = False
+        self.summaries = []  # (file name, counts, error) per file of a folder import
+
+    def cancel(self):
+        """ Ask the import to stop; it rolls back at the next progress report. """
+        self.cancel_requested = True
+
+    def report_progress(self, records, bytes_read):
+        if self.cancel_requested:
+            raise ImportCancelled("Import cancelled by the user.")
+        self.progress.emit(records, bytes_read)
+
+    def run(self):
+        try:
+            if os.path.isdir(self.file_path):
+                report = ImportReport(self.file_path)
+                self.summaries = import_folder(self.db_file_path, self.file_path, self.use_age_group_birthday,
+                                               report=report, progress=self.report_progress)
+            elif os.path.splitext(self.file_path)[1].lower() == '.json':
+                report = ImportJson(self.db_file_path).import_file_streaming(
+                    self.file_path, self.use_age_group_birthday, progress=self.report_progress)
+            else:
+                report = ImportData(self.db_file_path).import_file(self.file_path, progress=self.report_progress)
+        except ImportCancelled:
+            self.cancelled.emit()
+        except Exception as e:
+            self.failed.emit(str(e))
+        else:
+            self.completed.emit(report)
+
+
+class ImportProgressDialog(QDialog):
+    """ Shows the progress of an ImportWorker, for a file or a whole folder, and lets the user cancel it. """
+
+    def __init__(self, db_file_path, file_path, use_age_group_birthday, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Importing")
+        self.setMinimumWidth(400)
+        self.is_folder = os.path.isdir(file_path)
+        if self.is_folder:
+            self.file_size = max(sum(os.path.getsize(path) for path in list_import_files(file_path)), 1)
+        else:
+            self.file_size = max(os.path.getsize(file_path), 1)
+        self.report = None
+
+        layout = QVBoxLayout(self)
+        layout.addWidget(QLabel(f"Importing {'folder ' if self.is_folder else ''}{os.path.basename(file_path)}", self))
+        self.progress_bar = QProgressBar(self)
+        self.progress_bar.setRange(0, 100)
+        layout.addWidget(self.progress_bar)
+        self.records_label = QLabel("Files: 0" if self.is_folder else "Records: 0", self)
+        layout.addWidget(self.records_label)
+        self.cancel_btn = QPushButton("Cancel")
+        self.cancel_btn.clicked.connect(self.cancel_import)
+        layout.addWidget(self.cancel_btn)
+
+        self.worker = ImportWorker(db_file_path, file_path, use_age_group_birthday, self)
+        self.worker.progress.connect(self.update_progress)
+        self.worker.completed.connect(self.import_completed)
+        self.worker.failed.connect(self.import_failed)
+        self.worker.cancelled.connect(self.import_cancelled)
+        self.worker.start()
+
+    def update_progress(self, records, bytes_read):
+        self.progress_bar.setValue(min(100, bytes_read * 100 // self.file_size))
+        unit = "Files" if self.is_folder else "Records"
+        self.records_label.setText(f"{unit}: {records}  ({bytes_read // 1024} of {self.file_size // 1024} KB)")
+
+    def cancel_import(self):
+        self.cancel_btn.setEnabled(False)
+        self.records_label.setText("Cancelling, rolling back...")
+        self.worker.cancel()
+
+    def reject(self):
+        # Closing the dialog cancels the import instead of leaving it running unseen
+        if self.worker.isRunning():
+            self.cancel_import()
+        else:
+            super().reject()
+
+    def import_completed(self, report):
+        self.worker.wait()
+        self.report = report
+        if self.is_folder:
+            if self.worker.summaries:
+                show_import_report(self, report, message=f"Imported {len(self.worker.summaries)} files.\n\n"
+                                                         f"{format_summaries(self.worker.summaries)}")
+            else:
+                QMessageBox.warning(self, "Import", "The folder contains no .txt, .csv or .json files.")
+        elif report.counts.get("file_unchanged"):
+            QMessageBox.information(self, "Import", "This file is unchanged since its last import; nothing to do.")
+        else:
+            show_import_report(self, report)
+        self.accept()
+
+    def import_failed(self, error):
+        self.worker.wait()
+        QMessageBox.critical(self, "Import Error", f"Failed to import data: {error}")
+        super().reject()
+
+    def import_cancelled(self):
+        self.worker.wait()
+        QMessageBox.information(self, "Import Cancelled", "The import was cancelled; no changes were made.")
+        super().reject()
@@ -0,0 +1,121 @@
+import codecs
+import json
+
+
+# Characters that can follow a complete number in an array or object
+NUMBER_DELIMITERS = ",]} \t\r\n"
+
+
+class JsonArrayStream:
+    """
+    Incremental reader for meet export files shaped like {"section": [...], ...}.
+
+    The file is read in fixed-size chunks and every element of a top-level array is
+    decoded on its own, so memory use depends on the size of one record rather than
+    on the size of the whole file. The file is opened in binary mode so bytes_read
+    counts bytes, which progress compares with the file size.
+    """
+
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, file):
+        self.file = file
+        self.decoder = json.JSONDecoder()
+        self.text_decoder = codecs.getincrementaldecoder('utf-8')()
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+        self.bytes_read = 0
+
+    def _fill(self):
+        """ Read the next chunk into the buffer. Returns False at end of file. """
+        if self.eof:
+            return False
+        data = self.file.read(self.CHUNK_SIZE)
+        self.bytes_read += len(data)
+        # A multi-byte character cut at the chunk boundary is completed by the next read
+        chunk = self.text_decoder.decode(data, final=not data)
+        if not data:
+            self.eof = True
+            if not chunk:
+                return False
+        # Drop the consumed part of the buffer before appending the new chunk
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def _skip_whitespace(self):
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buffer) or not self._fill():
+                return
+
+    def _peek(self):
+        self._skip_whitespace()
+        if self.pos >= len(self.buffer):
+            raise ValueError("Unexpected end of JSON file.")
+        return self.buffer[self.pos]
+
+    def _expect(self, char):
+        if self._peek() != char:
+            raise ValueError(f"Expected '{char}' in JSON file.")
+        self.pos += 1
+
+    def _decode_value(self):
+        """ Decode one complete JSON value, reading more chunks until it is complete. """
+        self._skip_whitespace()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+                # A number cut at the chunk boundary ('6.' or '1e') decodes as its first part;
+                # it is complete only when a delimiter follows it
+                if isinstance(value, (int, float)) and not isinstance(value, bool) and \
+                        (end == len(self.buffer) or self.buffer[end] not in NUMBER_DELIMITERS) and self._fill():
+                    continue
+                self.pos = end
+                return value
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+
+    def iter_sections(self):
+        """
+        Yield (section_name, element) for every element of every top-level array,
+        in file order. Top-level values that are not arrays are yielded as a single
+        (section_name, value) pair.
+        """
+        self._expect("{")
+        if self._peek() == "}":
+            return
+        while True:
+            key = self._decode_value()
+            self._expect(":")
+            if self._peek() == "[":
+                self.pos += 1
+                if self._peek() == "]":
+                    self.pos += 1
+                else:
+                    while True:
+                        yield key, self._decode_value()
+                        separator = self._peek()
+                        self.pos += 1
+                        if separator == "]":
+                            break
+                        if separator != ",":
+                            raise ValueError(f"Malformed array in section '{key}'.")
+            else:
+                yield key, self._decode_value()
+
+            separator = self._peek()
+            self.pos += 1
+            if separator == "}":
+                return
+            if separator != ",":
+                raise ValueError("Malformed JSON object at top level.")
+
+
+def iter_json_sections(file_path):
+    """ Stream (section_name, element) pairs from a meet export .json file. """
+    with open(file_path, 'rb') as file:
+        yield from JsonArrayStream(file).iter_sections()
@@ -1,12 +1,20 @@
 import sys
 import os
 import sqlite3
+import multiprocessing
 from PyQt6.QtWidgets import QApplication, QMainWindow, QLabel, QFileDialog, QMessageBox
 from PyQt6.QtGui import QPixmap, QIcon, QAction
 from PyQt6.QtCore import Qt
 from create_database import open_meet_setup  # Correctly import the open_meet_setup function from create_database
+from import_worker import ImportProgressDialog
+from import_changeset import ChangesetPreviewDialog
 from import_json import ImportJson
 from import_txt import ImportData
+from import_report import disable_verbose_log, enable_verbose_log
+from db_connection import close_connections, get_connection
+from schema import migrate_database
+from bib_lookup import invalidate_bib_lookups
+from settings_service import get_settings, invalidate_settings
 global_db_file_path = None
 global_age_group_birthday = False  # Default value
 from resource_path import resource_path
@@ -57,6 +65,9 @@ class MeetManager(QMainWindow):
         event_action = QAction('Event Setup', self)
         event_action.triggered.connect(self.event_setup)
         event_menu.addAction(event_action)
+        event_matrix_action = QAction('Event Matrix', self)
+        event_matrix_action.triggered.connect(self.event_matrix)
+        event_menu.addAction(event_matrix_action)
 
 
         # Add other menus (File, Meet Setup, Athletes, Teams, etc.)
@@ -84,6 +95,19 @@ class MeetManager(QMainWindow):
         import_action.triggered.connect(self.import_data)
         file_menu.addAction(import_action)
 
+        import_preview_action = QAction('Import Preview', self)
+        import_preview_action.triggered.connect(self.import_preview)
+        file_menu.addAction(import_preview_action)
+
+        import_folder_action = QAction('Import Folder', self)
+        import_folder_action.triggered.connect(self.import_folder_data)
+        file_menu.addAction(import_folder_action)
+
+        self.verbose_log_action = QAction('Verbose Import Log', self)
+        self.verbose_log_action.setCheckable(True)
+        self.verbose_log_action.toggled.connect(self.toggle_verbose_log)
+        file_menu.addAction(self.verbose_log_action)
+
     def event_setup(self):
         """Open the Events dialog if the database is open."""
         print("Event window opened")
@@ -94,6 +118,14 @@ class MeetManager(QMainWindow):
         else:
             print("No database is currently open. Please open a database first.")
             QMessageBox.warning(self, "Database Not Open", "Please open a database before accessing Events.")
+    def event_matrix(self):
+        """Open the Event Matrix to add events to many divisions and genders at once."""
+        if global_db_file_path:
+            from event_matrix import show_event_matrix
+            show_event_matrix(global_db_file_path, self)
+        else:
+            QMessageBox.warning(self, "Database Not Open", "Please open a database before accessing Events.")
+
     def division_templates(self):
         """
         Open the Division Templates dialog if the database is open.
@@ -131,21 +163,29 @@ class MeetManager(QMainWindow):
         confirmation = QMessageBox.question(
             self,
             "Confirm Purge",
-            "This will delete all data in the Athletes, Divisions, and Teams tables except for 'Unattached'. Are you sure?",
+            "This will delete all data in the Athletes, Entries, Relays, Divisions, and Teams tables except for 'Unattached'. Are you sure?",
             QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
         )
 
         if confirmation == QMessageBox.StandardButton.Yes:
+            conn = get_connection(global_db_file_path)
             try:
-                conn = sqlite3.connect(global_db_file_path)
                 cursor = conn.cursor()
 
                 # Purge athletes table
                 cursor.execute("DELETE FROM athletes")
 
+                # Purge entries and relay tables
+                cursor.execute("DELETE FROM entries")
+                cursor.execute("DELETE FROM relay_legs")
+                cursor.execute("DELETE FROM relay_teams")
+                cursor.execute("DELETE FROM bib_ranges")
+
                 # Purge events table
                 # Delete all rows from the events table
                 cursor.execute("DELETE FROM events")
+                # The saved custom order belongs to these events, not to the next meet's
+                cursor.execute("DELETE FROM event_order")
 
                 # Reset the auto-increment counter for the events table
                 cursor.execute("DELETE FROM sqlite_sequence WHERE name='events'")
@@ -163,10 +203,10 @@ class MeetManager(QMainWindow):
                 """)
 
                 conn.commit()
-                conn.close()
 
                 QMessageBox.information(self, "Purge Complete", "Data purged successfully, except for 'Unattached'.")
             except sqlite3.Error as e:
+                conn.rollback()
                 QMessageBox.critical(self, "Error", f"Failed to purge data. Error: {str(e)}")
 
     def resizeEvent(self, event):
@@ -187,16 +227,14 @@ class MeetManager(QMainWindow):
         if file_path:
 
             try:
-                conn = sqlite3.connect(file_path)
-                cursor = conn.cursor()
-                cursor.execute("SELECT setting_value FROM settings WHERE setting_name = 'use_age_group_birthday'")
-                result = cursor.fetchone()
-                if result:
-                    global_age_group_birthday = result[0] == 'True'
-                else:
-                    global_age_group_birthday = False
-
-                conn.close()
+                # Connections of the previously opened meet are no longer needed
+                close_connections()
+                invalidate_settings()
+                invalidate_bib_lookups()
+                conn = get_connection(file_path)
+                migrate_database(conn)  # Bring older meet databases up to the current schema
+                global_age_group_birthday = get_settings(file_path).use_age_group_birthday
+
                 self.open_db_label.setText(f"Opened Database: {os.path.basename(file_path)}")
                 self.open_db_label.adjustSize()
                 self.center_label_on_menu_bar()
@@ -209,23 +247,68 @@ class MeetManager(QMainWindow):
         if global_db_file_path:
             file_path, _ = QFileDialog.getOpenFileName(self, "Import Data", "", "Text or CSV Files (*.txt *.csv *.json)")
             if file_path:
-                file_extension = os.path.splitext(file_path)[1].lower()
-                try:
-                    if file_extension == '.json':
-                       importer = ImportJson(global_db_file_path)
-                       importer.import_file(file_path)
-                    elif file_extension in ['.txt', '.csv']:
-                        importer = ImportData(global_db_file_path)
-                        importer.import_file(file_path)
-
-                    QMessageBox.information(self, "Import", "Data imported successfully.")
-                except Exception as e:
-                    QMessageBox.critical(self, "Import Error", f"Failed to import data: {e}")
+                # The import runs on a worker thread; the dialog shows its progress and final report
+                dialog = ImportProgressDialog(global_db_file_path, file_path, global_age_group_birthday, self)
+                dialog.exec()
             else:
                 QMessageBox.warning(self, "Import Cancelled", "No file selected.")
         else:
             QMessageBox.warning(self, "Warning", "Please open a database first.")
 
+    def import_preview(self):
+        """ Dry-run an import, list what it would change, and apply it only if accepted. """
+        if not global_db_file_path:
+            QMessageBox.warning(self, "Warning", "Please open a database first.")
+            return
+        file_path, _ = QFileDialog.getOpenFileName(self, "Import Preview", "", "Text or CSV Files (*.txt *.csv *.json)")
+        if not file_path:
+            QMessageBox.warning(self, "Import Cancelled", "No file selected.")
+            return
+        if os.path.splitext(file_path)[1].lower() == '.json':
+            importer = ImportJson(global_db_file_path)
+            dry_run = lambda: importer.dry_run(file_path, global_age_group_birthday)
+        else:
+            importer = ImportData(global_db_file_path)
+            dry_run = lambda: importer.dry_run(file_path)
+        try:
+            QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
+            try:
+                changeset = dry_run()
+            finally:
+                QApplication.restoreOverrideCursor()
+        except Exception as e:
+            QMessageBox.critical(self, "Import Error", f"Failed to read the file: {e}")
+            return
+        if changeset.file_unchanged:
+            QMessageBox.information(self, "Import Preview",
+                                    "This file is unchanged since its last import; there is nothing to import.")
+            return
+        ChangesetPreviewDialog(changeset, importer.apply_changeset, self).exec()
+
+    def import_folder_data(self):
+        """ Import every .txt, .csv and .json file of a folder, e.g. one entry file per team. """
+        if not global_db_file_path:
+            QMessageBox.warning(self, "Warning", "Please open a database first.")
+            return
+        folder_path = QFileDialog.getExistingDirectory(self, "Import Folder")
+        if not folder_path:
+            QMessageBox.warning(self, "Import Cancelled", "No folder selected.")
+            return
+        # Parsing and writing run on a worker thread; the dialog shows progress and the final report
+        dialog = ImportProgressDialog(global_db_file_path, folder_path, global_age_group_birthday, self)
+        dialog.exec()
+
+    def toggle_verbose_log(self, checked):
+        """ Log import warnings and stage timings to import.log next to the open database. """
+        if not checked:
+            disable_verbose_log()
+            return
+        if not global_db_file_path:
+            QMessageBox.warning(self, "Warning", "Please open a database first.")
+            self.verbose_log_action.setChecked(False)
+            return
+        enable_verbose_log(os.path.join(os.path.dirname(os.path.abspath(global_db_file_path)), "import.log"))
+
     def open_meet_setup(self):
         open_meet_setup(self)
 
@@ -248,6 +331,7 @@ class MeetManager(QMainWindow):
 
 
 if __name__ == '__main__':
+    multiprocessing.freeze_support()  # Folder imports start worker processes, also from a frozen build
     app = QApplication(sys.argv)
     ex = MeetManager()
     ex.show()
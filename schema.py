@@ -0,0 +1,231 @@
+from athlete_ages import recompute_athlete_ages
+from import_hashes import IMPORTED_TABLES
+
+
+def create_table(cursor, table_name, columns):
+    query = f"CREATE TABLE IF NOT EXISTS {table_name} ({columns})"
+    cursor.execute(query)
+
+
+def create_import_tables(cursor):
+    """ Version 1: tables filled by the meet-file importers. """
+    # Individual event entries, one per athlete and event
+    create_table(cursor, 'entries', '''
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        athlete_id INTEGER NOT NULL,
+        event_code TEXT NOT NULL,
+        seed_mark TEXT,
+        division_number TEXT,
+        division_name TEXT,
+        UNIQUE (athlete_id, event_code)
+    ''')
+
+    # Relay teams, one per team, event, division and gender
+    create_table(cursor, 'relay_teams', '''
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        team_code TEXT NOT NULL,
+        event_code TEXT NOT NULL,
+        division_number TEXT NOT NULL DEFAULT '',
+        gender TEXT NOT NULL DEFAULT '',
+        seed_mark TEXT,
+        UNIQUE (team_code, event_code, division_number, gender)
+    ''')
+
+    # Relay legs in listed order; athlete_id stays NULL when the participant is not a known athlete
+    create_table(cursor, 'relay_legs', '''
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        relay_team_id INTEGER NOT NULL,
+        leg_number INTEGER NOT NULL,
+        athlete_id INTEGER,
+        last_name TEXT,
+        first_name TEXT,
+        dob TEXT,
+        UNIQUE (relay_team_id, leg_number)
+    ''')
+
+
+def create_lookup_indexes(cursor):
+    """ Version 2: indexes for the team, athlete, bib and event lookups. """
+    # Blank bib numbers become NULL so they do not collide under the unique index
+    cursor.execute("UPDATE athletes SET bib_number = NULL WHERE bib_number = ''")
+
+    # Duplicate bibs cannot be kept under a unique index: the lowest athlete id keeps the bib
+    cursor.execute("""
+        UPDATE athletes SET bib_number = NULL
+        WHERE bib_number IS NOT NULL
+          AND id > (SELECT MIN(a.id) FROM athletes AS a WHERE a.bib_number = athletes.bib_number)
+    """)
+    if cursor.rowcount > 0:
+        print(f"Cleared {cursor.rowcount} duplicate bib numbers.")
+
+    # Duplicate team codes: keep the first team row, athletes reference the code itself
+    cursor.execute("""
+        DELETE FROM teams
+        WHERE id > (SELECT MIN(t.id) FROM teams AS t WHERE t.team_code = teams.team_code)
+    """)
+    if cursor.rowcount > 0:
+        print(f"Removed {cursor.rowcount} duplicate team codes.")
+
+    cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_teams_team_code ON teams (team_code)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_teams_team_name ON teams (team_name)")
+    cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_athletes_bib_number ON athletes (bib_number)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_athletes_team_code ON athletes (team_code)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_athletes_team_name ON athletes (team_name)")
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_athletes_name_team ON athletes (last_name, first_name, team_code)
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_events_event_division_gender ON events (event_name, division_name, gender)
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_entries_event_code ON entries (event_code)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_relay_legs_athlete_id ON relay_legs (athlete_id)")
+
+
+def add_athlete_division_columns(cursor):
+    """ Version 3: stored age and division of each athlete, filled in at write time. """
+    cursor.execute("ALTER TABLE athletes ADD COLUMN division_number INTEGER")
+    cursor.execute("ALTER TABLE athletes ADD COLUMN division_name TEXT")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_athletes_age ON athletes (age)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_athletes_division_number ON athletes (division_number)")
+    # Existing rows hold ages computed against the import date; bring them in line with the meet date
+    recompute_athlete_ages(cursor)
+
+
+def create_bib_ranges_table(cursor):
+    """ Version 4: bib number blocks reserved for a team or a division. """
+    # scope is 'team' (scope_value = team_code) or 'division' (scope_value = division_number)
+    create_table(cursor, 'bib_ranges', '''
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        scope TEXT NOT NULL,
+        scope_value TEXT NOT NULL,
+        start_bib INTEGER NOT NULL,
+        end_bib INTEGER NOT NULL,
+        UNIQUE (scope, scope_value)
+    ''')
+
+
+def add_athlete_check_in_column(cursor):
+    """ Version 5: time an athlete checked in at the meet; NULL until then. """
+    cursor.execute("ALTER TABLE athletes ADD COLUMN checked_in_at TEXT")
+
+
+def create_import_hash_tables(cursor):
+    """ Version 6: content hashes of imported athlete and entry records, and fingerprints of imported files. """
+    cursor.execute("ALTER TABLE athletes ADD COLUMN import_hash INTEGER")
+    cursor.execute("ALTER TABLE entries ADD COLUMN import_hash INTEGER")
+    create_table(cursor, 'import_files', '''
+        fingerprint TEXT PRIMARY KEY,
+        file_name TEXT,
+        imported_at TEXT
+    ''')
+    create_forget_import_triggers(cursor)
+
+
+def create_forget_import_triggers(cursor):
+    """
+    A file whose rows were deleted must be imported in full again, not skipped
+    as unchanged. The triggers fire per deleted row; the WHEN guard makes every
+    firing after the first a single lookup, so deleting N rows clears
+    import_files once instead of N times.
+    """
+    for table_name in IMPORTED_TABLES:
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table_name}_forget_imports AFTER DELETE ON {table_name}
+            WHEN EXISTS (SELECT 1 FROM import_files)
+            BEGIN
+                DELETE FROM import_files;
+            END
+        """)
+
+
+def create_event_order_table(cursor):
+    """ Version 7: saved custom schedule order of the events, used by the 'Custom Order' renumbering. """
+    create_table(cursor, 'event_order', '''
+        position INTEGER NOT NULL,
+        event_name TEXT NOT NULL,
+        division_name TEXT NOT NULL,
+        gender TEXT NOT NULL,
+        UNIQUE (event_name, division_name, gender)
+    ''')
+
+
+def create_event_unique_key(cursor):
+    """ Version 8: one events row per (division, gender, event), so selections can be saved with upserts. """
+    # Duplicates cannot be kept under a unique index: the first row added keeps its numbering and settings
+    cursor.execute("""
+        DELETE FROM events
+        WHERE ROWID > (
+            SELECT MIN(e.ROWID) FROM events AS e
+            WHERE e.division_name = events.division_name
+              AND e.gender = events.gender
+              AND e.event_name = events.event_name
+        )
+    """)
+    if cursor.rowcount > 0:
+        print(f"Removed {cursor.rowcount} duplicate events.")
+
+    cursor.execute("DROP INDEX IF EXISTS idx_events_event_division_gender")
+    cursor.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_events_division_gender_event
+        ON events (division_name, gender, event_name)
+    """)
+
+
+def guard_forget_import_triggers(cursor):
+    """ Version 9: replace the unguarded version 6 triggers, which cleared import_files once per deleted row. """
+    for table_name in IMPORTED_TABLES:
+        cursor.execute(f"DROP TRIGGER IF EXISTS trg_{table_name}_forget_imports")
+    create_forget_import_triggers(cursor)
+
+
+# Ordered list of (version, migration). Each migration brings the schema from version - 1 to version.
+MIGRATIONS = [
+    (1, create_import_tables),
+    (2, create_lookup_indexes),
+    (3, add_athlete_division_columns),
+    (4, create_bib_ranges_table),
+    (5, add_athlete_check_in_column),
+    (6, create_import_hash_tables),
+    (7, create_event_order_table),
+    (8, create_event_unique_key),
+    (9, guard_forget_import_triggers),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate_database(conn):
+    """
+    Bring a meet database up to SCHEMA_VERSION in place. Each pending migration
+    runs in its own explicit transaction and records its version in PRAGMA
+    user_version, so a failed migration leaves no half-applied schema behind.
+    Returns the resulting schema version.
+    """
+    version = get_schema_version(conn)
+    if version > SCHEMA_VERSION:
+        print(f"Database schema version {version} is newer than this application ({SCHEMA_VERSION}).")
+        return version
+
+    for target_version, migration in MIGRATIONS:
+        if target_version <= version:
+            continue
+        if conn.in_transaction:
+            conn.commit()
+        try:
+            cursor = conn.cursor()
+            # sqlite3 does not open a transaction for DDL by itself, so ALTER TABLE and
+            # CREATE INDEX would commit one by one; BEGIN makes the whole migration atomic
+            cursor.execute("BEGIN")
+            migration(cursor)
+            cursor.execute(f"PRAGMA user_version = {int(target_version)}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        print(f"Migrated database schema to version {target_version}.")
+        version = target_version
+    return version
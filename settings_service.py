@@ -0,0 +1,76 @@
+from datetime import datetime
+
+from db_connection import get_read_connection
+
+# One cached settings object per open meet database: db_file_path -> MeetSettings
+_settings_cache = {}
+
+SETTING_NAME = 'use_age_group_birthday'  # The meet settings are stored on this row of the settings table
+
+
+class MeetSettings:
+    """
+    In-memory copy of the settings table of one meet database.
+
+    The row is read once on first access and served from memory afterwards.
+    Whoever rewrites the row calls invalidate_settings() so it is read again.
+    """
+
+    def __init__(self, db_file_path):
+        self.db_file_path = db_file_path
+        self._row = None
+
+    def _load(self):
+        if self._row is None:
+            cursor = get_read_connection(self.db_file_path).cursor()
+            cursor.execute("""
+                SELECT setting_value, setting_meet_date, setting_row_count
+                FROM settings WHERE setting_name = ?
+            """, (SETTING_NAME,))
+            self._row = cursor.fetchone() or (None, None, None)
+        return self._row
+
+    def invalidate(self):
+        """ Drop the cached values; the next access reads the settings table again. """
+        self._row = None
+
+    @property
+    def use_age_group_birthday(self):
+        value = self._load()[0]
+        return bool(value) and value.lower() == 'true'
+
+    @property
+    def meet_date(self):
+        """ The meet date as a datetime, or None when it is not set or cannot be parsed. """
+        value = self._load()[1]
+        if not value:
+            return None
+        try:
+            return datetime.strptime(value, "%m/%d/%Y")
+        except ValueError:
+            return None
+
+    @property
+    def meet_year(self):
+        meet_date = self.meet_date
+        return meet_date.year if meet_date else None
+
+    @property
+    def row_count(self):
+        value = self._load()[2]
+        return int(value) if value is not None else None
+
+
+def get_settings(db_file_path):
+    """ Return the cached settings of a meet database, creating the cache entry on first use. """
+    settings = _settings_cache.get(db_file_path)
+    if settings is None:
+        settings = MeetSettings(db_file_path)
+        _settings_cache[db_file_path] = settings
+    return settings
+
+
+def invalidate_settings(db_file_path=None):
+    """ Forget the cached settings of one meet database, or of all of them. """
+    for path in [path for path in _settings_cache if db_file_path is None or path == db_file_path]:
+        del _settings_cache[path]
@@ -7,6 +7,7 @@ from PyQt6.QtWidgets import (
     QTableWidget, QTableWidgetItem, QMessageBox, QHeaderView
 )
 from PyQt6.QtCore import Qt
+from db_connection import get_connection, get_read_connection
 from resource_path import resource_path
 
 class TeamsWindow(QDialog):
@@ -78,15 +79,24 @@ class TeamsWindow(QDialog):
         self.load_teams_data()
 
     def connect_db(self):
+        """ Return the shared write connection to the SQLite database. """
         try:
-            return sqlite3.connect(self.db_file_path)
+            return get_connection(self.db_file_path)
+        except sqlite3.Error as e:
+            QMessageBox.critical(self, "Database Error", f"Failed to connect to the database: {e}")
+            sys.exit(1)
+
+    def connect_read_db(self):
+        """ Return the shared read-only connection used for display queries. """
+        try:
+            return get_read_connection(self.db_file_path)
         except sqlite3.Error as e:
             QMessageBox.critical(self, "Database Error", f"Failed to connect to the database: {e}")
             sys.exit(1)
 
     def load_teams_data(self):
         try:
-            conn = self.connect_db()
+            conn = self.connect_read_db()
             cursor = conn.cursor()
             cursor.execute("SELECT id, team_name, team_code FROM teams ORDER BY team_name ASC")
             teams_data = cursor.fetchall()
@@ -98,7 +108,6 @@ class TeamsWindow(QDialog):
                 for col, data in enumerate(row_data):
                     self.table.setItem(row, col, QTableWidgetItem(str(data)))
 
-            conn.close()
         except sqlite3.Error as e:
             QMessageBox.critical(self, "Database Error", f"Failed to fetch teams data: {e}")
 
@@ -115,11 +124,11 @@ class TeamsWindow(QDialog):
             cursor = conn.cursor()
             cursor.execute("INSERT INTO teams (team_name, team_code) VALUES (?, ?)", (team_name, team_code))
             conn.commit()
-            conn.close()
 
             self.clear_inputs()
             self.load_teams_data()
         except sqlite3.Error as e:
+            conn.rollback()
             QMessageBox.critical(self, "Database Error", f"Failed to add team: {e}")
 
     def update_team(self):
@@ -146,10 +155,10 @@ class TeamsWindow(QDialog):
             cursor = conn.cursor()
             cursor.execute("UPDATE teams SET team_name = ?, team_code = ? WHERE id = ?", (team_name, team_code, team_id))
             conn.commit()
-            conn.close()
 
             self.load_teams_data()
         except sqlite3.Error as e:
+            conn.rollback()
             QMessageBox.critical(self, "Database Error", f"Failed to update team: {e}")
 
     def delete_team(self):
@@ -181,18 +190,32 @@ class TeamsWindow(QDialog):
                 conn = self.connect_db()
                 cursor = conn.cursor()
 
-                # Delete athletes associated with the team
+                # Delete the team's relays and their legs
+                cursor.execute("""
+                    DELETE FROM relay_legs WHERE relay_team_id IN (SELECT id FROM relay_teams WHERE team_code = ?)
+                """, (team_code,))
+                cursor.execute("DELETE FROM relay_teams WHERE team_code = ?", (team_code,))
+
+                # Delete athletes associated with the team, and their entries; legs they ran
+                # for another team are kept by name
+                cursor.execute("""
+                    DELETE FROM entries WHERE athlete_id IN (SELECT id FROM athletes WHERE team_code = ?)
+                """, (team_code,))
+                cursor.execute("""
+                    UPDATE relay_legs SET athlete_id = NULL
+                    WHERE athlete_id IN (SELECT id FROM athletes WHERE team_code = ?)
+                """, (team_code,))
                 cursor.execute("DELETE FROM athletes WHERE team_code = ?", (team_code,))
 
                 # Delete the team itself
                 cursor.execute("DELETE FROM teams WHERE id = ?", (team_id,))
                 conn.commit()
-                conn.close()
 
                 QMessageBox.information(self, "Success",
                                         f"Team '{team_name}' and all associated athletes have been deleted.")
                 self.load_teams_data()
             except sqlite3.Error as e:
+                conn.rollback()
                 QMessageBox.critical(self, "Database Error", f"Failed to delete team and associated athletes: {e}")
 
     def clear_inputs(self):